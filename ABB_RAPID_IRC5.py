@@ -76,7 +76,7 @@ def angles_2_str(angles):
     # Generate a string like:
     # [10,20,30,40,50,60]
     # with up to 6 decimals
-    return '[%s]' % (','.join(format(ji, ".6f") for ji in angles[0:6]))
+    return '[%s]' % format_values(angles[0:6], '%.6f', ',')
 
 def extaxes_2_str(angles):
     """Prints the external axes, if any"""
@@ -86,7 +86,7 @@ def extaxes_2_str(angles):
         # should print 9E9 for unset external axes
         # [9E+09,9E+09,9E+09,9E+09,9E+09,9E+09]
         return '[9E+09,9E+09,9E+09,9E+09,9E+09,9E+09]'
-    extaxes_str = (','.join(format(ji, ".6f") for ji in angles[6:njoints]))
+    extaxes_str = format_values(angles[6:njoints], '%.6f', ',')
     if njoints < 12:
         extaxes_str = extaxes_str + ',' + ','.join(['9E9']*(12-njoints))
     # If angles is [j1,j2,j3,j4,j5,j6,10,20], it will generate a string like:
@@ -99,7 +99,10 @@ def extaxes_2_str(angles):
 class RobotPost(object):
     """Robot post object"""
     MAX_LINES_X_PROG = 5000  # maximum number of lines per program. It will then generate multiple "pages (files)"
+    MAX_BYTES_X_PROG = 0     # maximum size of each program page in bytes (0 means no limit)
+    MAX_TARGETS_X_PROG = 0   # maximum number of targets per program page (0 means no limit)
     INCLUDE_SUB_PROGRAMS = True
+    INCREMENTAL = False      # only save the program files that changed since the last save and only send the files that changed since the last successful upload
     PROG_EXT = 'mod'        # set the program extension
     
     # other variables
@@ -108,9 +111,10 @@ class RobotPost(object):
     PROG_NAMES = []
     PROG_FILES = []    
     PROG_LIST = []
+    MANIFEST = None
     PROG_CALLS = []
     PROG_CALLS_LIST = []   
-    nLines = 0
+    PAGER = None
     nProgs = 0
     
     PROG = []
@@ -131,6 +135,10 @@ class RobotPost(object):
     ARC_SEAMDATA = 'seam1'
 
     NEW_E_LENGTH = None
+    COLLINEAR_TOLERANCE = 0 # set the tolerance in mm to merge collinear linear movements (0 disables the filter)
+    COLLINEAR_TOLERANCE_DEG = 0.01 # set the orientation tolerance in deg to merge collinear linear movements
+    COLLINEAR_FILTER = None
+    TEMPLATES = None # movement line templates with the speed, zone, tool and work object names
     
     
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
@@ -139,11 +147,15 @@ class RobotPost(object):
         self.PROG = []
         self.LOG = ''
         self.nAxes = robot_axes
+        self.COLLINEAR_FILTER = CollinearFilter(self.add_movel, self.COLLINEAR_TOLERANCE, self.COLLINEAR_TOLERANCE_DEG)
+        self.TEMPLATES = LineTemplates()
         for k,v in kwargs.items():
             if k == 'lines_x_prog':
                 self.MAX_LINES_X_PROG = v      
+        self.PAGER = ProgramPager(self.MAX_LINES_X_PROG, self.MAX_BYTES_X_PROG, self.MAX_TARGETS_X_PROG, len(ONETAB + 'ENDPROC\n\nENDMODULE\n'))
         
     def ProgStart(self, progname, new_page = False):
+        self.COLLINEAR_FILTER.reset()
         progname_i = progname
         nPages = len(self.PROG_LIST)
         if new_page:            
@@ -187,6 +199,7 @@ class RobotPost(object):
         self.addline('ConfL \Off;')
         
     def ProgFinish(self, progname, new_page = False):
+        self.COLLINEAR_FILTER.reset()
         self.TAB = ONETAB
         self.PROG += [ONETAB + 'ENDPROC\n']
         if new_page or not self.INCLUDE_SUB_PROGRAMS:# or self.nProgs == 1:
@@ -195,7 +208,7 @@ class RobotPost(object):
             self.PROG_CALLS_LIST.append(self.PROG_CALLS)
             self.PROG = []
             self.PROG_CALLS = []
-            self.nLines = 0
+            self.PAGER.reset()
         #elif self.nProgs <= 1 or self.INCLUDE_SUB_PROGRAMS:
         #    self.PROG += ['ENDMODULE']
 
@@ -210,12 +223,16 @@ class RobotPost(object):
         else:
             filesave = folder + '/' + progname
             
-        fid = open(filesave, "w")
-        for line in self.PROG:
-            fid.write(line)
-            fid.write('\n') # print new line
-            
-        fid.close()
+        if self.INCREMENTAL and self.MANIFEST is None:
+            # the manifest is named after the first file saved (the main program)
+            self.MANIFEST = PageManifest(getFileDir(filesave) + '/' + getFileName(filesave) + '.manifest')
+        if self.MANIFEST is None or self.MANIFEST.changed(filesave, '\n'.join(self.PROG) + '\n'):
+            fid = open(filesave, "w")
+            for line in self.PROG:
+                fid.write(line)
+                fid.write('\n') # print new line
+                
+            fid.close()
         print('SAVED: %s\n' % filesave) # tell RoboDK the path of the saved file
         self.PROG_FILES.append(filesave)
         
@@ -238,13 +255,13 @@ class RobotPost(object):
 
     def ProgSave(self, folder, progname, ask_user = False, show_result = False):
         if len(self.PROG_LIST) >= 1:
-            if self.nLines > 0:
+            if self.PAGER.lines > 0:
                 self.PROG += ['ENDMODULE']
                 self.PROG_LIST.append(self.PROG)
                 self.PROG_CALLS_LIST.append(self.PROG_CALLS)
                 self.PROG = []
                 self.PROG_CALLS = []
-                self.nLines = 0
+                self.PAGER.reset()
                 
             npages = len(self.PROG_LIST)
             progname_main = progname + "Main"
@@ -277,19 +294,34 @@ class RobotPost(object):
         else:
             self.PROG += ['ENDMODULE'] # Very important!
             self.progsave(folder, progname, ask_user, show_result)
-        
+            
+        if self.MANIFEST is not None:
+            self.MANIFEST.save()
          
     def ProgSendRobot(self, robot_ip, remote_path, ftp_user, ftp_pass):
         """Send a program to the robot using the provided parameters. This method is executed right after ProgSave if we selected the option "Send Program to Robot".
         The connection parameters must be provided in the robot connection menu of RoboDK"""
-        UploadFTP(self.PROG_FILES, robot_ip, remote_path, ftp_user, ftp_pass)
+        if self.MANIFEST is not None:
+            # send the files that changed since the last successful upload only
+            files = self.MANIFEST.unsent(self.PROG_FILES)
+            if UploadFTP(files, robot_ip, remote_path, ftp_user, ftp_pass):
+                self.MANIFEST.set_sent(files)
+        else:
+            UploadFTP(self.PROG_FILES, robot_ip, remote_path, ftp_user, ftp_pass)
         
     def MoveJ(self, pose, joints, conf_RLF=None):
         """Add a joint movement"""
-        self.addline('MoveAbsJ [%s,%s],%s,%s,%s,\WObj:=%s;' % (angles_2_str(joints), extaxes_2_str(joints), self.SPEEDDATA, self.ZONEDATA, self.TOOLDATA, self.WOBJDATA))
+        self.COLLINEAR_FILTER.reset()
+        template = self.TEMPLATES.get('MoveAbsJ', 'MoveAbsJ [%s,%s],%s,%s,%s,\WObj:=%s;', [None, None, self.SPEEDDATA, self.ZONEDATA, self.TOOLDATA, self.WOBJDATA])
+        self.addline(template % (angles_2_str(joints), extaxes_2_str(joints)))
+        self.PAGER.add_target()
         
     def MoveL(self, pose, joints, conf_RLF=None):
         """Add a linear movement"""
+        self.COLLINEAR_FILTER.MoveL(pose, joints, conf_RLF)
+        
+    def add_movel(self, pose, joints, conf_RLF=None):
+        """Output a linear movement (collinear movements are merged by COLLINEAR_FILTER)"""
         
         # Control turning arc movement off
         if self.ARC_ON and self.NEW_E_LENGTH is None:
@@ -315,17 +347,22 @@ class RobotPost(object):
 
         if self.ARC_ON:
             # ArcL p100, v100, seam1, weld5 \Weave:=weave1, z10, gun1;
-            self.addline('ArcL %s,%s,%s,%s,\Weave:=%s,%s,%s,\WObj:=%s;' % (target, self.SPEEDDATA, self.ARC_SEAMDATA, self.ARC_WELDDATA, self.ARC_WEAVEDATA, self.ZONEDATA, self.TOOLDATA, self.WOBJDATA))
+            template = self.TEMPLATES.get('ArcL', 'ArcL %s,%s,%s,%s,\Weave:=%s,%s,%s,\WObj:=%s;', [None, self.SPEEDDATA, self.ARC_SEAMDATA, self.ARC_WELDDATA, self.ARC_WEAVEDATA, self.ZONEDATA, self.TOOLDATA, self.WOBJDATA])
+            self.addline(template % target)
         elif self.CLAD_ON:
-            self.addline('CladL %s,%s,%s,%s,%s,\WObj:=%s;' % (target, self.SPEEDDATA, self.CLAD_DATA, self.ZONEDATA, self.TOOLDATA, self.WOBJDATA))
+            template = self.TEMPLATES.get('CladL', 'CladL %s,%s,%s,%s,%s,\WObj:=%s;', [None, self.SPEEDDATA, self.CLAD_DATA, self.ZONEDATA, self.TOOLDATA, self.WOBJDATA])
+            self.addline(template % target)
         else:
-            self.addline('MoveL %s,%s,%s,%s,\WObj:=%s;' % (target, self.SPEEDDATA, self.ZONEDATA, self.TOOLDATA, self.WOBJDATA))
+            template = self.TEMPLATES.get('MoveL', 'MoveL %s,%s,%s,%s,\WObj:=%s;', [None, self.SPEEDDATA, self.ZONEDATA, self.TOOLDATA, self.WOBJDATA])
+            self.addline(template % target)
+        self.PAGER.add_target()
 
         # Modification for Paul
         self.NEW_E_LENGTH = None 
             
     def MoveC(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
         """Add a circular movement"""
+        self.COLLINEAR_FILTER.reset()
         target1 = ''
         target2 = ''
         if pose1 is None:
@@ -362,24 +399,33 @@ class RobotPost(object):
            
         if self.ARC_ON:
             # ArcL p100, v100, seam1, weld5 \Weave:=weave1, z10, gun1;
-            self.addline('ArcC %s,%s,%s,%s,%s,\Weave:=%s,%s,%s,\WObj:=%s;' % (target1, target2, self.SPEEDDATA, self.ARC_SEAMDATA, self.ARC_WELDDATA, self.ARC_WEAVEDATA, self.ZONEDATA, self.TOOLDATA, self.WOBJDATA))
+            template = self.TEMPLATES.get('ArcC', 'ArcC %s,%s,%s,%s,%s,\Weave:=%s,%s,%s,\WObj:=%s;', [None, None, self.SPEEDDATA, self.ARC_SEAMDATA, self.ARC_WELDDATA, self.ARC_WEAVEDATA, self.ZONEDATA, self.TOOLDATA, self.WOBJDATA])
+            self.addline(template % (target1, target2))
         elif self.CLAD_ON:
-            self.addline('CladC %s,%s,%s,%s,%s,%s,\WObj:=%s;' % (target1, target2, self.SPEEDDATA, self.CLAD_DATA, self.ZONEDATA, self.TOOLDATA, self.WOBJDATA))
+            template = self.TEMPLATES.get('CladC', 'CladC %s,%s,%s,%s,%s,%s,\WObj:=%s;', [None, None, self.SPEEDDATA, self.CLAD_DATA, self.ZONEDATA, self.TOOLDATA, self.WOBJDATA])
+            self.addline(template % (target1, target2))
         else:
-            self.addline('MoveC %s,%s,%s,%s,%s,\WObj:=%s;' % (target1, target2, self.SPEEDDATA, self.ZONEDATA, self.TOOLDATA, self.WOBJDATA))
+            template = self.TEMPLATES.get('MoveC', 'MoveC %s,%s,%s,%s,%s,\WObj:=%s;', [None, None, self.SPEEDDATA, self.ZONEDATA, self.TOOLDATA, self.WOBJDATA])
+            self.addline(template % (target1, target2))
+        self.PAGER.add_target(2)
                 
     def setFrame(self, pose, frame_id=None, frame_name=None):
         """Change the robot reference frame"""
+        self.COLLINEAR_FILTER.reset()
+        self.TEMPLATES.reset()
         #self.addline('%s := [FALSE, TRUE, "", [%s],[[0,0,0],[1,0,0,0]]];' % (self.WOBJDATA, pose_2_str(pose)))
         self.addline('%s.uframe := [%s];' % (self.WOBJDATA, pose_2_str(pose)))
         
     def setTool(self, pose, tool_id=None, tool_name=None):
         """Change the robot TCP"""
+        self.COLLINEAR_FILTER.reset()
+        self.TEMPLATES.reset()
         #self.addline('%s := [TRUE,[%s],[2,[0,0,15],[1,0,0,0],0,0,0.005]];' % (self.TOOLDATA, pose_2_str(pose)))
         self.addline('%s.tframe := [%s];' % (self.TOOLDATA, pose_2_str(pose)))
         
     def Pause(self, time_ms):
         """Pause the robot program"""
+        self.COLLINEAR_FILTER.flush()
         if time_ms <= 0:
             self.addline('STOP;')
         else:
@@ -387,30 +433,38 @@ class RobotPost(object):
         
     def setSpeed(self, speed_mms):
         """Changes the robot speed (in mm/s)"""
+        self.COLLINEAR_FILTER.flush()
+        self.TEMPLATES.reset()
         #self.SPEEDDATA = 'v%i' % speed_mms
         self.addline('%s := [%.2f,500,5000,1000];' % (self.SPEEDDATA, speed_mms))
     
     def setAcceleration(self, accel_mmss):
         """Changes the robot acceleration (in mm/s2)"""
+        self.COLLINEAR_FILTER.flush()
         self.addlog('setAcceleration is not defined')
         
     def setSpeedJoints(self, speed_degs):
         """Changes the robot joint speed (in deg/s)"""
+        self.COLLINEAR_FILTER.flush()
         self.addlog('setSpeedJoints not defined')
     
     def setAccelerationJoints(self, accel_degss):
         """Changes the robot joint acceleration (in deg/s2)"""
+        self.COLLINEAR_FILTER.flush()
         self.addlog('setAccelerationJoints not defined')
         
     def setZoneData(self, zone_mm):
         """Changes the zone data approach (makes the movement more smooth)"""
+        self.COLLINEAR_FILTER.flush()
         if zone_mm < 0:
             self.ZONEDATA = 'fine'
         else:
             self.ZONEDATA = 'z%i' % zone_mm
+        self.TEMPLATES.reset()
         
     def setDO(self, io_var, io_value):
         """Sets a variable (output) to a given value"""
+        self.COLLINEAR_FILTER.flush()
         if type(io_var) != str:  # set default variable name if io_var is a number
             io_var = 'D_OUT_%s' % str(io_var)        
         if type(io_value) != str: # set default variable value if io_value is a number            
@@ -424,6 +478,7 @@ class RobotPost(object):
         
     def waitDI(self, io_var, io_value, timeout_ms=-1):
         """Waits for an input io_var to attain a given value io_value. Optionally, a timeout can be provided."""
+        self.COLLINEAR_FILTER.flush()
         if type(io_var) != str:  # set default variable name if io_var is a number
             io_var = 'D_IN_%s' % str(io_var)        
         if type(io_value) != str: # set default variable value if io_value is a number            
@@ -440,6 +495,7 @@ class RobotPost(object):
         
     def RunCode(self, code, is_function_call = False):
         """Adds code or a function call"""
+        self.COLLINEAR_FILTER.flush()
         if is_function_call:
             code = code.replace(' ','_')
             if code.startswith('ArcLStart'):
@@ -469,16 +525,19 @@ class RobotPost(object):
             if code.startswith('END') or code.startswith('ELSEIF'):
                 # remove tab after ENDWHILE or ENDIF
                 self.TAB = self.TAB[:-len(ONETAB)]
+                self.PAGER.block_end()
                 
             self.addline(code.replace('\t','  '))# replace each tab by 2 spaces
 
             if code.startswith('IF ') or code.startswith('ELSEIF ') or code.startswith('WHILE '):
                 # add tab (one tab = two spaces)
                 self.TAB = self.TAB + ONETAB
+                self.PAGER.block_start() # do not split IF/WHILE blocks in different pages
             
         
     def RunMessage(self, message, iscomment = False):
         """Add a joint movement"""
+        self.COLLINEAR_FILTER.flush()
         if iscomment:
             self.addline('! ' + message)
         else:
@@ -490,13 +549,13 @@ class RobotPost(object):
         if self.nProgs > 1 and not self.INCLUDE_SUB_PROGRAMS:
             return
         
-        if self.nLines > self.MAX_LINES_X_PROG:
-            self.nLines = 0
+        if self.PAGER.full(self.TAB + newline):
+            self.PAGER.reset()
             self.ProgFinish(self.PROG_NAME, True)
             self.ProgStart(self.PROG_NAME, True)
             
         self.PROG += [self.TAB + newline]
-        self.nLines = self.nLines + 1
+        self.PAGER.add(self.TAB + newline)
         
     def addlog(self, newline):
         """Add a log message"""
@@ -507,6 +566,7 @@ class RobotPost(object):
     def addcode(self, code):
         """Adds custom code, such as a custom header"""
         self.PROG += [code]
+        self.PAGER.add(code + '\n', 0)
         
 
 # -------------------------------------------------
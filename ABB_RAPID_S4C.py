@@ -76,7 +76,7 @@ def angles_2_str(angles):
     # Generate a string like:
     # [10,20,30,40,50,60]
     # with up to 6 decimals
-    return '[%s]' % (','.join(format(ji, ".6f") for ji in angles[0:6]))
+    return '[%s]' % format_values(angles[0:6], '%.6f', ',')
 
 def extaxes_2_str(angles):
     """Prints the external axes, if any"""
@@ -86,7 +86,7 @@ def extaxes_2_str(angles):
         # should print 9E9 for unset external axes
         # [9E+09,9E+09,9E+09,9E+09,9E+09,9E+09]
         return '[9E+09,9E+09,9E+09,9E+09,9E+09,9E+09]'
-    extaxes_str = (','.join(format(ji, ".6f") for ji in angles[6:njoints]))
+    extaxes_str = format_values(angles[6:njoints], '%.6f', ',')
     if njoints < 12:
         extaxes_str = extaxes_str + ',' + ','.join(['9E9']*(12-njoints))
     # If angles is [j1,j2,j3,j4,j5,j6,10,20], it will generate a string like:
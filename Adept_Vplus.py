@@ -55,7 +55,7 @@ def pose_2_str(pose,joints=None,reference=None):
     
 def angles_2_str(angles):
     """Contverts a joint target to a string"""
-    return '{%s}' % (','.join(format(ji, ".5f") for ji in angles))
+    return '{%s}' % format_values(angles, '%.5f', ',')
 
 # ----------------------------------------------------    
 # Object class that handles the robot instructions/syntax
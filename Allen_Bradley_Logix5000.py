@@ -60,6 +60,35 @@ def angles_2_str(angles):
     str = str[:-1]
     return str
 
+# L5X file to import one tag (only the target tag of the file is created on import)
+L5X_TAG = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<RSLogix5000Content SchemaRevision="1.0" TargetName="%s" TargetType="Tag" ContainsContext="true" ExportOptions="DecoratedData Context">
+<Controller Use="Context" Name="RoboDK">
+<Tags Use="Context">
+%s
+</Tags>
+</Controller>
+</RSLogix5000Content>
+'''
+
+# REAL array tag with the table of joint targets
+L5X_TAG_TABLE = '''<Tag Use="Target" Name="%s" TagType="Base" DataType="REAL" Dimensions="%i" Radix="Float" Constant="false" ExternalAccess="Read/Write">
+<Description><![CDATA[Joint targets generated by RoboDK (%i moves x %i axes)]]></Description>
+<Data Format="Decorated">
+<Array DataType="REAL" Dimensions="%i" Radix="Float">
+%s
+</Array>
+</Data>
+</Tag>'''
+
+# DINT tag used to step through the table of joint targets
+L5X_TAG_INDEX = '''<Tag Use="Target" Name="%s" TagType="Base" DataType="DINT" Radix="Decimal" Constant="false" ExternalAccess="Read/Write">
+<Description><![CDATA[Index of the next joint target in %s]]></Description>
+<Data Format="Decorated">
+<DataValue DataType="DINT" Radix="Decimal" Value="0"/>
+</Data>
+</Tag>'''
+
 # ----------------------------------------------------    
 # Object class that handles the robot instructions/syntax
 class RobotPost(object):
@@ -75,6 +104,12 @@ class RobotPost(object):
     LOG = ''
     nAxes = 6
     
+    # Set to True to write all joint targets in a REAL array tag (imported from L5X files)
+    # and step through the array with one indexed state machine instead of one IF block per move
+    USE_MOVE_TABLE = False
+    MOVE_TABLE_TAG = 'Move_Table' # name of the REAL array tag with the joint targets
+    MOVE_INDEX_TAG = 'Move_Index' # name of the DINT tag used to step through the joint targets
+    
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
         self.ROBOT_POST = robotpost
         self.ROBOT_NAME = robotname
@@ -83,6 +118,8 @@ class RobotPost(object):
         self.nAxes = robot_axes
         self.COUNT_STATE = 0
         self.COUNT_MOVE = 0
+        self.MOVE_TABLE = []
+        self.TABLE_START = 0
         
         
     def ProgStart(self, progname):
@@ -99,6 +136,8 @@ class RobotPost(object):
         self.addline('\tgear_ratio := counter;');
         self.addline('(**\tMAG(Axis_0, Axis_1, Axis0_1_MAG, 1, gear_ratio, 1, 1, Actual, Real, Disabled, 10, 1 );**)');
         self.addline('\tState := 2;');
+        if self.USE_MOVE_TABLE:
+            self.addline('\t%s := 0;' % self.MOVE_INDEX_TAG);
         self.addline('end_if;');
         self.addline('')
         self.addline('(********** MOVE AXES START **********)')
@@ -106,6 +145,7 @@ class RobotPost(object):
 
         
     def ProgFinish(self, progname):
+        self.table_flush()
         self.addline('(***** Check if move is complete and axis is in position *****)')
         MAM_PC_ALL = ''
         for i in range(self.nAxes):
@@ -150,6 +190,8 @@ class RobotPost(object):
         fid.close()
         print('SAVED: %s\n' % filesave) # tell RoboDK the path of the saved file
         self.PROG_FILES = filesave
+        if self.USE_MOVE_TABLE:
+            self.table_save(filesave[:-len(self.PROG_EXT)-1])
         
         # open file with default application
         if show_result:
@@ -174,6 +216,9 @@ class RobotPost(object):
         
     def MoveJ(self, pose, joints, conf_RLF=None):
         """Add a joint movement"""
+        if self.USE_MOVE_TABLE:
+            self.table_addmove(joints)
+            return
         self.addline('(** move instruction %i (joint move)**)' % self.COUNT_MOVE)
         MAM_PC_ALL = ''
         for i in range(len(joints)):
@@ -190,6 +235,9 @@ class RobotPost(object):
         
     def MoveL(self, pose, joints, conf_RLF=None):
         """Add a linear movement"""
+        if self.USE_MOVE_TABLE:
+            self.table_addmove(joints)
+            return
         self.addline('(** move instruction %i (linear move)**)' % self.COUNT_MOVE)
         MAM_PC_ALL = ''
         for i in range(len(joints)):
@@ -251,6 +299,7 @@ class RobotPost(object):
                 io_value = 'FALSE'
         
         # at this point, io_var and io_value must be string values
+        self.table_flush()
         self.addline('%s=%s' % (io_var, io_value))
         
     def waitDI(self, io_var, io_value, timeout_ms=-1):
@@ -264,6 +313,7 @@ class RobotPost(object):
                 io_value = 'FALSE'
         
         # at this point, io_var and io_value must be string values
+        self.table_flush()
         if timeout_ms < 0:
             self.addline('WAIT FOR %s==%s' % (io_var, io_value))
         else:
@@ -278,6 +328,57 @@ class RobotPost(object):
         self.addlog('RunMessage not defined')
         
 # ------------------ private ----------------------                
+    def table_addmove(self, joints):
+        """Add a joint target to the table of joint targets"""
+        self.COUNT_MOVE  = self.COUNT_MOVE  + 1
+        joints = [joints[i] for i in range(len(joints))]
+        if len(joints) != self.nAxes:
+            # each move of the table has nAxes values: missing axes are set to 0 and extra axes are ignored
+            self.addlog('Move %i has %i axes, %i axes expected in %s' % (self.COUNT_MOVE, len(joints), self.nAxes, self.MOVE_TABLE_TAG))
+            joints = (joints + [0]*self.nAxes)[:self.nAxes]
+        self.MOVE_TABLE.append(joints)
+        
+    def table_flush(self):
+        """Add the state machine for the joint targets collected since the last non-motion line so that program lines keep their order"""
+        if not self.USE_MOVE_TABLE or self.COUNT_MOVE <= self.TABLE_START:
+            return
+        self.table_sequencer(self.TABLE_START, self.COUNT_MOVE)
+        self.TABLE_START = self.COUNT_MOVE
+        
+    def table_sequencer(self, move_start, move_end):
+        """Add the state machine that steps through the joint targets move_start to move_end-1 of the table"""
+        MAM_PC_ALL = ''
+        for i in range(self.nAxes):
+            MAM_PC_ALL = MAM_PC_ALL + ('Axis_%i_MAM.PC & ' % i)
+            
+        self.addline('(** %i moves from %s[%i] (%i axes per move)**)' % (move_end - move_start, self.MOVE_TABLE_TAG, move_start*self.nAxes, self.nAxes))
+        self.addline('if (%sState = %i) then' % (MAM_PC_ALL,  self.COUNT_STATE))
+        self.addline('\tif (%s < %i) then' % (self.MOVE_INDEX_TAG, move_end*self.nAxes))
+        for i in range(self.nAxes):
+            self.addline('\t\tMAM(Axis_%i, Axis_%i_MAM, 1, %s[%s + %i], Move_Speed, Unitspersec, 50, %%ofMaximum, 50, %%ofMaximum, 1,100.0,100.0,%%ofTime, 0, 0 ,0,None,0,0);' % (i, i, self.MOVE_TABLE_TAG, self.MOVE_INDEX_TAG, i))
+            
+        self.addline('\t\t%s := %s + %i;' % (self.MOVE_INDEX_TAG, self.MOVE_INDEX_TAG, self.nAxes))
+        self.addline('\telse')
+        self.COUNT_STATE = self.COUNT_STATE + 1
+        self.addline('\t\tState := %i;' % self.COUNT_STATE)
+        self.addline('\tend_if;')
+        self.addline('end_if;')
+        
+    def table_save(self, filesave_base):
+        """Save the table of joint targets and its index as L5X files to import the REAL array tag and the DINT tag (one file per tag)"""
+        size = max(self.COUNT_MOVE*self.nAxes, 1)
+        values = [value for joints in self.MOVE_TABLE for value in joints]
+        elements = '\n'.join(['<Element Index="[%i]" Value="%.3f"/>' % (i, values[i]) for i in range(len(values))])
+        tags = []
+        tags.append((self.MOVE_TABLE_TAG, L5X_TAG_TABLE % (self.MOVE_TABLE_TAG, size, self.COUNT_MOVE, self.nAxes, size, elements)))
+        tags.append((self.MOVE_INDEX_TAG, L5X_TAG_INDEX % (self.MOVE_INDEX_TAG, self.MOVE_TABLE_TAG)))
+        for tag_name, tag in tags:
+            filesave = filesave_base + '_' + tag_name + '.L5X'
+            fid = open(filesave, "w")
+            fid.write(L5X_TAG % (tag_name, tag))
+            fid.close()
+            print('SAVED: %s\n' % filesave)
+        
     def addline(self, newline):
         """Add a program line"""
         self.PROG = self.PROG + newline + '\n'
@@ -63,6 +63,70 @@ def get_safe_name(progname, max_chars = 7):
 from robodk import *
 import sys
 
+# ----------------------------------------------------
+# Targets of the PKT file: rows are fixed width, so the whole table is encoded in one pass
+class TargetTable(object):
+    """Columnar store of the pulse targets of a PKT file (one list per column)"""
+    DIGITS = None # characters of the numbers 00000 to 99999 (numpy array)
+    
+    def __init__(self):
+        self.header = None
+        self.ids = []
+        self.speeds = []
+        self.interpolations = []
+        self.outputs = []
+        self.pulses = [] # one list of pulses per axis
+        
+    def add(self, cid, speed, interpolation, outputs, pulses):
+        """Add a target given the pulses of each axis"""
+        if len(self.ids) == 0:
+            self.pulses = [[] for i in range(len(pulses))]
+        elif len(pulses) != len(self.pulses):
+            raise Exception("All the targets of a program must have the same number of axes")
+        self.ids.append(cid)
+        self.speeds.append(speed)
+        self.interpolations.append(interpolation)
+        self.outputs.append(outputs)
+        for i in range(len(pulses)):
+            self.pulses[i].append(pulses[i])
+            
+    def text(self):
+        """Returns the text of the PKT file"""
+        text = ''
+        if self.header is not None:
+            text = self.header + '\n'
+        if len(self.ids) == 0:
+            return text
+        if numpy_module() is not None:
+            table = self.text_numpy(numpy_module())
+            if table is not None:
+                return text + table
+        row_format = '%05i,%05i,%05i,%05i,' + ','.join(['%010i']*len(self.pulses)) + '\n'
+        return text + ''.join(map(row_format.__mod__, zip(self.ids, self.speeds, self.interpolations, self.outputs, *self.pulses)))
+        
+    def text_numpy(self, np):
+        """Returns the text of the targets, building the digits of all the rows at once with numpy (None if a value does not fit in its column)"""
+        columns = [self.ids, self.speeds, self.interpolations, self.outputs] + self.pulses
+        widths = [5,5,5,5] + [10]*len(self.pulses)
+        if len(self.pulses) == 0:
+            return None
+        if TargetTable.DIGITS is None:
+            TargetTable.DIGITS = (np.arange(100000)[:,None] // 10**np.arange(4, -1, -1) % 10 + ord('0')).astype(np.uint8)
+        digits = TargetTable.DIGITS
+        table = np.empty((len(self.ids), sum(widths) + len(widths)), dtype=np.uint8)
+        col = 0
+        for values, width in zip(columns, widths):
+            values = np.array(values).astype(np.int64) # same as %i: floats are truncated
+            if values.min() < 0 or values.max() >= 10**width:
+                return None
+            # columns are 5 or 10 digits wide: copy the characters of each group of 5 digits from a table
+            for digit in range(0, width, 5):
+                table[:,col+digit:col+digit+5] = digits[values // 10**(width-5-digit) % 100000]
+            table[:,col+width] = ord(',')
+            col = col + width + 1
+        table[:,-1] = ord('\n')
+        return table.tobytes().decode('ascii')
+        
 # ----------------------------------------------------    
 # Object class that handles the robot instructions/syntax
 class RobotPost(object):
@@ -104,7 +168,8 @@ class RobotPost(object):
     PROG_NAMES_MAIN = [] # List of programs called by a main program due to splitting
     
     PROG = []     # Save the program lines
-    PROG_TARGETS = []  # Save the program lines (targets section)
+    PROG_TARGETS = TargetTable()  # Save the targets (targets section)
+    PULSES_RUN = []    # Joint targets not added to PROG_TARGETS yet (converted to pulses all at once)
     LOG = '' # Save a log
     
     nAxes = 6 # Important: This is usually provided by RoboDK automatically. Otherwise, override the __init__ procedure. 
@@ -127,6 +192,8 @@ class RobotPost(object):
         self.ROBOT_NAME = robotname
         self.nAxes = robot_axes
         self.PROG = []
+        self.PROG_TARGETS = TargetTable()
+        self.PULSES_RUN = []
         self.LOG = ''
         #for k,v in kwargs.iteritems(): # python2
         for k,v in kwargs.items():
@@ -199,14 +266,15 @@ class RobotPost(object):
         self.PROG.insert(0, header)
         self.PROG.append('\nEND')
         
-        self.PROG_TARGETS.insert(0, header_pkt)
+        self.flush_pulses()
+        self.PROG_TARGETS.header = header_pkt
         
         # Save PROG in PROG_LIST
         self.PROG_LIST.append(self.PROG)
         self.PROG_TARGETS_LIST.append(self.PROG_TARGETS)
         
         self.PROG = []
-        self.PROG_TARGETS = []
+        self.PROG_TARGETS = TargetTable()
         self.LINE_COUNT = 0
         self.P_COUNT = 0
         self.C_COUNT = 0        
@@ -241,9 +309,7 @@ class RobotPost(object):
         # Save PKT file
         filesave_pkt = filesave[:-3]+'pkt'
         fid2 = open(filesave_pkt, "w")
-        for line in self.PROG_TARGETS:
-            fid2.write(line)
-            fid2.write('\n')
+        fid2.write(self.PROG_TARGETS.text())
         fid2.close()        
         
         print('SAVED: %s\n' % filesave) # tell RoboDK the path of the saved file
@@ -298,11 +364,12 @@ class RobotPost(object):
             if self.LINE_COUNT > 0:
                 # Progfinish was not called!
                 print("Warning: ProgFinish was not called properly")
+                self.flush_pulses()
                 self.PROG_LIST.append(self.PROG)
                 self.PROG_TARGETS_LIST.append(self.PROG_TARGETS)
                 self.PROG_NAMES.append("Unknown")
                 self.PROG = []
-                self.PROG_TARGETS = []                
+                self.PROG_TARGETS = TargetTable()                
                 self.LINE_COUNT = 0
                 self.P_COUNT = 0
                 self.C_COUNT = 0      
@@ -345,6 +412,7 @@ class RobotPost(object):
             
         else:
             print("Warning! Program has not been properly finished")
+            self.flush_pulses()
             self.progsave(folder, progname, ask_user, show_result)
 
         if show_result and len(self.LOG) > 0:
@@ -503,9 +571,15 @@ class RobotPost(object):
         self.LINE_COUNT = self.LINE_COUNT + 1
         self.PROG.append(newline)
             
-    def addline_targets(self, newline):
-        """Add a line at the end of the program (used for targets)"""
-        self.PROG_TARGETS.append(newline)
+    def flush_pulses(self):
+        """Add the joint targets of the current run to the targets table"""
+        if len(self.PULSES_RUN) == 0:
+            return
+        pulses = joints_2_pulses([target[4] for target in self.PULSES_RUN], self.PULSES_X_DEG, self.PULSES_ZERO)
+        for i in range(len(pulses)):
+            cid, speed, interpolation, outputs, joints = self.PULSES_RUN[i]
+            self.PROG_TARGETS.add(cid, speed, interpolation, outputs, pulses[i])
+        self.PULSES_RUN = []
         
     def addlog(self, newline):
         """Add a log message"""
@@ -523,13 +597,10 @@ class RobotPost(object):
         self.C_COUNT = self.C_COUNT + 1
         cid = self.C_COUNT
         
-        str_pulses=[]        
-        for i in range(len(joints)):
-            str_pulses.append('%010i' % round(self.PULSES_ZERO + joints[i] * self.PULSES_X_DEG[i]))
-        
         speed = self.SPEED_MMS
         outputs = 0
-        self.addline_targets('%05i,%05i,%05i,%05i,' % (cid, speed, interpolation, outputs) + ','.join(str_pulses))                
+        # consecutive joint targets are converted to pulses together (see flush_pulses)
+        self.PULSES_RUN.append([cid, speed, interpolation, outputs, list(joints)])
         return cid
         
 #cid,speed,0,0,
@@ -542,25 +613,8 @@ class RobotPost(object):
         if self.nProgs > 1 and not self.INCLUDE_SUB_PROGRAMS:
             return
             
+        # Cartesian targets are saved as joint targets (pulses)
         return self.add_target_joints(joints)
-            
-        xyzwpr = Pose_2_Motoman(pose)
-        
-        if conf_RLF is None:
-            conf_RLF = [0,0,0]
-
-        turns = [0,0,0]
-        if len(joints) >= 6:
-            turnJ4 = (joints[3]+180)//360
-            turnJ6 = (joints[5]+180)//360
-            turnJ1 = (joints[0]+180)//360
-            turns = [turnJ4, turnJ6, turnJ1]
-
-        confdata = '%i,%i,%i,%i,%i,%i,0,0' % tuple(conf_RLF[:3] + turns[:3])      
-        self.C_COUNT = self.C_COUNT + 1
-        cid = self.C_COUNT
-        self.addline_targets('%i,' % cid + '%.3f,%.3f,%.3f,%.2f,%.2f,%.2f' % tuple(xyzwpr))
-        return cid
    
 
 
@@ -614,8 +668,7 @@ def test_post():
         
     print("\n\n--------------- PKT file ----------------\n")
     robot.PROG_TARGETS = robot.PROG_TARGETS_LIST.pop()
-    for line in robot.PROG_TARGETS:
-        print(line)
+    sys.stdout.write(robot.PROG_TARGETS.text())
     
     if len(robot.LOG) > 0:
         mbox('Program generation LOG:\n\n' + robot.LOG)
@@ -64,6 +64,35 @@ from robodk import *
 RATIO_EXTAX = [1,1,1,1,1,1] #[10.6/360.0, 1, 1, 1, 1, 1]
 
 
+# ----------------------------------------------------
+# Sections of a PDL program that are only known when the program is finished or saved
+class VariableTable(object):
+    """Variable declarations of the VAR section of a routine. Each variable is declared once, in the order it was added"""
+    def __init__(self):
+        self.names = set()
+        self.declarations = []
+
+    def add(self, declaration):
+        """Adds a declaration such as 'lun: INTEGER'. Returns False if the variable was already declared"""
+        name = declaration.split(':')[0].strip().upper()
+        if name in self.names:
+            return False
+        self.names.add(name)
+        self.declarations.append(declaration)
+        return True
+
+    def __iter__(self):
+        for declaration in self.declarations:
+            yield '  ' + declaration
+
+class ImportSection(object):
+    """IMPORT lines of a program. The list of imported programs is read when the program is saved"""
+    def __init__(self, imports):
+        self.imports = imports
+
+    def __iter__(self):
+        for progname in self.imports:
+            yield "IMPORT '%s'" % progname
 
 # ----------------------------------------------------    
 # Object class that handles the robot instructions/syntax
@@ -83,13 +112,13 @@ class RobotPost(object):
     PROG_NAMES = []
     PROG_FILES = []    
     PROG_LIST = []
-    PROG_VARS = []
+    PROG_VARS = None # VariableTable of the routine being generated
     SPEED_MMS = 1000
     ACCEL_MMSS = 100
     FLY_DIST = -1 # set to >0 to use MOVEFLY
     IMPORTS = []
-    PROG = ''
-    ROUTINES = ''
+    PROG = None # ProgramPage: the main routine is added in sections (see add_section)
+    ROUTINES = []
     nLines = 0
     nProgs = 0
     LOG = ''
@@ -98,6 +127,7 @@ class RobotPost(object):
     LAST_POSE = None
     LAST_E_LENGTH = 0
     NEW_E_LENGTH = 0
+    CYCLE_TIME = None # cycle time estimator (the estimated time is reported when the program is saved)
     
     # ---------------------------------------------------
             
@@ -105,7 +135,7 @@ class RobotPost(object):
         """Contverts a joint target to a string"""
         if joints is not None and len(joints) > 6:
             joints[6] = joints[6]*RATIO_EXTAX[0]
-        return '{%s}' % (','.join(format(ji, ".5f") for ji in joints))
+        return '{%s}' % format_values(joints, '%.5f', ',')
     
     def pose_2_str(self, pose,joints=None,conf_RLF=None):
         """Converts a pose target to a string"""
@@ -149,14 +179,19 @@ class RobotPost(object):
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
         self.ROBOT_POST = robotpost
         self.ROBOT_NAME = robotname
-        self.PROG = ''
+        self.PROG = ProgramPage([[]])
+        self.PROG_VARS = VariableTable()
+        self.ROUTINES = []
+        self.IMPORTS = []
         self.LOG = ''
         self.nAxes = robot_axes
         for k,v in kwargs.items():
             if k == 'lines_x_prog':
                 self.MAX_LINES_X_PROG = v      
+        self.CYCLE_TIME = CycleTimeEstimator(self.SPEED_MMS, self.ACCEL_MMSS, zone_mm=self.FLY_DIST)
         
     def ProgStart(self, progname, new_page = False):
+        self.CYCLE_TIME.ProgStart(progname, new_page)
         progname_i = progname
         if new_page:
             if self.INCLUDE_SUB_PROGRAMS:
@@ -185,12 +220,12 @@ class RobotPost(object):
 
         self.PROG_NAMES.append(progname_i)
         self.addline('PROGRAM %s' % progname_i)
-        self.addline('-- IMPORTS --')
+        self.add_section(ImportSection(self.IMPORTS))
         #self.addline('CONST')
         self.addline('VAR')
         self.addline('ROUTINE R_%s EXPORTED FROM %s GLOBAL' % (progname_i, progname_i))
         self.addline('')
-        self.addline('-- ROUTINES --')
+        self.add_section(self.ROUTINES)
         
         #self.addline('BEGIN R_%s' % progname_i)
         self.addline('ROUTINE R_%s' % progname_i)
@@ -199,7 +234,7 @@ class RobotPost(object):
         if self.nAxes > 6:
             self.addline('  pxtn: XTNDPOS')
             
-        self.addline('-- VARIABLES --') # PROG_VARS
+        self.add_section(self.PROG_VARS)
         self.addline('BEGIN')
         self.TAB = '  '
         self.addline('$ORNT_TYPE := RS_WORLD')
@@ -218,26 +253,21 @@ class RobotPost(object):
         self.addline('$STRESS_PER:= 65')
         
     def ProgFinish(self, progname, new_page = False):
-        variables = ''
-        for line in self.PROG_VARS:
-            variables = '  %s\n' % line
-            
-        self.PROG = self.PROG.replace('-- VARIABLES --\n', variables,1)
-        self.PROG_VARS = []
+        # the variables section of the routine stays in the page: declare new variables in a new table
+        self.PROG_VARS = VariableTable()
         
         if self.nProgs > 1 and not self.INCLUDE_SUB_PROGRAMS:
             return
         self.TAB = ''
         if self.nProgs <= 1:
-            self.PROG = self.PROG + "END R_%s\n\n" % progname
             # Create a the main program which call the main routine
-            self.PROG = self.PROG + "BEGIN\n  R_%s\nEND %s\n\n" % (progname, progname)
+            self.PROG.segments[-1].extend(['END R_%s' % progname, '', 'BEGIN', '  R_%s' % progname, 'END %s' % progname, ''])
         else:
-            self.ROUTINES = self.ROUTINES + "END R_%s\n\n" % progname
+            self.ROUTINES.extend(['END R_%s' % progname, ''])
             
         if new_page:
             self.PROG_LIST.append(self.PROG)
-            self.PROG = ''
+            self.PROG = ProgramPage([[]])
             self.nLines = 0
     
     def progsave(self, folder, progname, ask_user = False, show_result = False):        
@@ -251,16 +281,11 @@ class RobotPost(object):
         else:
             filesave = folder + '/' + progname
         self.FILE_SAVED = filesave
-        # save imports
-        imports = ''
-        for i in range(len(self.IMPORTS)):
-            imports = imports + "IMPORT '%s'\n" % self.IMPORTS[i]
-        self.PROG = self.PROG.replace("-- IMPORTS --\n", imports, 1)
-        # save routines
-        self.PROG = self.PROG.replace("-- ROUTINES --\n", self.ROUTINES, 1)
-        
+        # imports, routines and variables are written from their sections
         fid = open(filesave, "w")
-        fid.write(self.PROG)
+        for line in self.PROG:
+            fid.write(line)
+            fid.write('\n')
         fid.close()
         print('SAVED: %s\n' % filesave) # tell RoboDK the path of the saved file
         self.PROG_FILES.append(filesave)
@@ -285,22 +310,21 @@ class RobotPost(object):
         if len(self.PROG_LIST) >= 1:
             if self.nLines > 0:
                 self.PROG_LIST.append(self.PROG)
-                self.PROG = ''
+                self.PROG = ProgramPage([[]])
                 self.nLines = 0
                 
             npages = len(self.PROG_LIST)
             progname_main = progname + "Main"
-            mainprog = "PROGRAM %s\n" % progname_main
+            mainprog = ["PROGRAM %s" % progname_main]
             for i in range(npages):
-                mainprog += "IMPORT '%s'\n" % self.PROG_NAMES[i]            
+                mainprog.append("IMPORT '%s'" % self.PROG_NAMES[i])
                 
-            mainprog += "CONST\nVAR\n"
-            mainprog += "BEGIN\n"
+            mainprog += ["CONST", "VAR", "BEGIN"]
             for i in range(npages):
-                mainprog += "  R_%s()\n" % self.PROG_NAMES[i]
+                mainprog.append("  R_%s()" % self.PROG_NAMES[i])
                 
-            mainprog += "END %s\n" % progname_main
-            self.PROG = mainprog
+            mainprog.append("END %s" % progname_main)
+            self.PROG = ProgramPage([mainprog])
             self.progsave(folder, progname_main, ask_user, show_result)
             self.LOG = ''
             folder_user = getFileDir(self.FILE_SAVED)
@@ -312,6 +336,8 @@ class RobotPost(object):
                 
         else:
             self.progsave(folder, progname, ask_user, show_result)
+            
+        print(self.CYCLE_TIME.report())
         
         
     def ProgSendRobot(self, robot_ip, remote_path, ftp_user, ftp_pass):
@@ -321,6 +347,7 @@ class RobotPost(object):
         
     def MoveJ(self, pose, joints, conf_RLF=None):
         """Add a joint movement"""
+        self.CYCLE_TIME.MoveJ(pose, joints)
         #self.addline('MOVE JOINT TO ' + joints_2_str(joints))# MOVE JOINT TO: won't use absolute axis position
         self.addline('MOVE TO ' + self.joints_2_str(joints)) # MOVE TO: absolute axis position
         
@@ -328,28 +355,13 @@ class RobotPost(object):
         if pose1 is None:
             return
             
-        def Calculate_Time(Dist, Vmax, Amax):
-            '''Calculate the time it takes to move a distance Dist at Amax acceleration and Vmax speed'''
-            tacc = Vmax/Amax;
-            Xacc = 0.5*Amax*tacc*tacc;
-            if Dist <= 2*Xacc:
-                # Vmax is not reached
-                tacc = sqrt(Dist/Amax)
-                Ttot = tacc*2
-            else:
-                # Vmax is reached
-                Xvmax = Dist - 2*Xacc
-                Tvmax = Xvmax/Vmax
-                Ttot = 2*tacc + Tvmax
-            return Ttot
-            
         add_material = self.NEW_E_LENGTH - self.LAST_E_LENGTH
         self.LAST_E_LENGTH = self.NEW_E_LENGTH
         
         if add_material > 0:
             distance_mm = norm(subs3(pose1.Pos(), pose2.Pos()))
             # calculate movement time in seconds
-            time_s = Calculate_Time(distance_mm, self.SPEED_MMS, self.ACCEL_MMSS)
+            time_s = move_time(distance_mm, self.SPEED_MMS, self.ACCEL_MMSS)
             # add material
             self.addline("$AOUT[5] := %.3f" % (add_material/time_s))
         else:
@@ -367,6 +379,7 @@ class RobotPost(object):
             if distance(pose.Pos(), self.LAST_POSE.Pos()) < 0.001 and pose_angle_between(pose, self.LAST_POSE) < 0.01:
                 return
         
+        self.CYCLE_TIME.MoveL(pose, joints)
         target = ''
         if pose is None:
             target = self.joints_2_str(joints)
@@ -383,6 +396,7 @@ class RobotPost(object):
         
     def MoveC(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
         """Add a circular movement"""
+        self.CYCLE_TIME.MoveC(pose1, joints1, pose2, joints2)
         #self.new_movec(self.LAST_POSE, pose1, pose2) #used for 3D printing
         if self.FLY_DIST > 0:
             self.addline('MOVEFLY CIRCULAR TO %s VIA %s ADVANCE' % (self.pose_2_str(pose2,joints2), self.pose_2_str(pose1,joints1)))
@@ -401,6 +415,7 @@ class RobotPost(object):
         
     def Pause(self, time_ms):
         """Pause the robot program"""
+        self.CYCLE_TIME.Pause(time_ms)
         if time_ms <= 0:
             self.addline('PAUSE')
         else:
@@ -408,25 +423,30 @@ class RobotPost(object):
     
     def setSpeed(self, speed_mms):
         """Changes the robot speed (in mm/s)"""
+        self.CYCLE_TIME.setSpeed(speed_mms)
         self.SPEED_MMS = speed_mms        
         self.addline('$SPD_OPT := SPD_LIN')
         self.addline('$LIN_SPD := %.3f' % (speed_mms*0.001))
     
     def setAcceleration(self, accel_mmss):
         """Changes the robot acceleration (in mm/s2)"""
+        self.CYCLE_TIME.setAcceleration(accel_mmss)
         self.ACCEL_MMSS = accel_mmss
         self.addlog('setAcceleration not defined')
     
     def setSpeedJoints(self, speed_degs):
         """Changes the robot joint speed (in deg/s)"""
+        self.CYCLE_TIME.setSpeedJoints(speed_degs)
         self.addline('$ROT_SPD := %.3f' % (speed_degs*pi/180.0))
     
     def setAccelerationJoints(self, accel_degss):
         """Changes the robot joint acceleration (in deg/s2)"""
+        self.CYCLE_TIME.setAccelerationJoints(accel_degss)
         self.addlog('setAccelerationJoints not defined')
         
     def setZoneData(self, zone_mm):
         """Changes the zone data approach (makes the movement more smooth)"""
+        self.CYCLE_TIME.setZoneData(zone_mm)
         #self.addlog('setZoneData not defined (%.1f mm)' % zone_mm)
         self.FLY_DIST = zone_mm
         self.addline('$FLY_DIST := %.3f' % zone_mm)
@@ -446,6 +466,7 @@ class RobotPost(object):
         
     def waitDI(self, io_var, io_value, timeout_ms=-1):
         """Waits for an input io_var to attain a given value io_value. Optionally, a timeout can be provided."""
+        self.CYCLE_TIME.stop()
         if type(io_var) != str:  # set default variable name if io_var is a number
             io_var = '$DIN[%s]' % str(io_var)        
         if type(io_value) != str: # set default variable value if io_value is a number            
@@ -474,6 +495,7 @@ class RobotPost(object):
         
     def RunCode(self, code, is_function_call = False):
         """Adds code or a function call"""
+        self.CYCLE_TIME.stop()
         if self.nProgs > 1 and not self.INCLUDE_SUB_PROGRAMS:
             return
         
@@ -510,7 +532,7 @@ class RobotPost(object):
         else:
             #self.addline('TYPE "' + message + '"')
             #-------- Option 1: Show message on the teach pendant: Important! Fails if there is no teach pendant
-            #self.PROG_VARS.append('lun: INTEGER')
+            #self.PROG_VARS.add('lun: INTEGER')
             #self.addline(MACRO_MESSAGE_TP % message)
             #-------- Option 2: Just comment the message
             self.addline('-- ' + message)
@@ -528,12 +550,17 @@ class RobotPost(object):
             self.ProgStart(self.PROG_NAME, True)
 
         if self.nProgs > 1:
-            self.ROUTINES = self.ROUTINES + self.TAB + newline + '\n'
+            self.ROUTINES.append(self.TAB + newline)
         else:
-            self.PROG = self.PROG + self.TAB + newline + '\n'
+            self.PROG.segments[-1].append(self.TAB + newline)
             
         self.nLines = self.nLines + 1
         
+    def add_section(self, section):
+        """Add a section to the program that is written when the program is saved (imports, routines or variables). Program lines continue after the section"""
+        self.PROG.add(section)
+        self.PROG.add([])
+        
     def addlog(self, newline):
         """Add a log message"""
         if self.nProgs > 1 and not self.INCLUDE_SUB_PROGRAMS:
@@ -582,7 +609,8 @@ def test_post():
     robot.MoveL(Pose([250, 150, 191.421356, 180, 0, -150]), [-43.82111, 3.29703, -40.29493, 56.02402, 56.61169, -249.23532] )
     robot.ProgFinish("Program")
     # robot.ProgSave(".","Program",True)
-    print(robot.PROG)
+    for line in robot.PROG:
+        print(line)
     if len(robot.LOG) > 0:
         mbox('Program generation LOG:\n\n' + robot.LOG)
 
@@ -98,6 +98,7 @@ class RobotPost(object):
     LAST_POSE = None
     LAST_E_LENGTH = 0
     NEW_E_LENGTH = 0
+    CYCLE_TIME = None # cycle time estimator (the estimated time is reported when the program is saved)
     
     # ---------------------------------------------------
             
@@ -105,7 +106,7 @@ class RobotPost(object):
         """Contverts a joint target to a string"""
         if joints is not None and len(joints) > 6:
             joints[6] = joints[6]*RATIO_EXTAX[0]
-        return '{%s}' % (','.join(format(ji, ".5f") for ji in joints))
+        return '{%s}' % format_values(joints, '%.5f', ',')
     
     def pose_2_str(self, pose,joints=None,conf_RLF=None):
         """Converts a pose target to a string"""
@@ -155,8 +156,10 @@ class RobotPost(object):
         for k,v in kwargs.items():
             if k == 'lines_x_prog':
                 self.MAX_LINES_X_PROG = v      
+        self.CYCLE_TIME = CycleTimeEstimator(self.SPEED_MMS, self.ACCEL_MMSS, zone_mm=self.FLY_DIST)
         
     def ProgStart(self, progname, new_page = False):
+        self.CYCLE_TIME.ProgStart(progname, new_page)
         progname_i = progname
         if new_page:
             if self.INCLUDE_SUB_PROGRAMS:
@@ -312,6 +315,8 @@ class RobotPost(object):
                 
         else:
             self.progsave(folder, progname, ask_user, show_result)
+            
+        print(self.CYCLE_TIME.report())
         
         
     def ProgSendRobot(self, robot_ip, remote_path, ftp_user, ftp_pass):
@@ -321,6 +326,7 @@ class RobotPost(object):
         
     def MoveJ(self, pose, joints, conf_RLF=None):
         """Add a joint movement"""
+        self.CYCLE_TIME.MoveJ(pose, joints)
         #self.addline('MOVE JOINT TO ' + joints_2_str(joints))# MOVE JOINT TO: won't use absolute axis position
         self.addline('MOVE TO ' + self.joints_2_str(joints)) # MOVE TO: absolute axis position
         
@@ -328,28 +334,13 @@ class RobotPost(object):
         if pose1 is None:
             return
             
-        def Calculate_Time(Dist, Vmax, Amax):
-            '''Calculate the time it takes to move a distance Dist at Amax acceleration and Vmax speed'''
-            tacc = Vmax/Amax;
-            Xacc = 0.5*Amax*tacc*tacc;
-            if Dist <= 2*Xacc:
-                # Vmax is not reached
-                tacc = sqrt(Dist/Amax)
-                Ttot = tacc*2
-            else:
-                # Vmax is reached
-                Xvmax = Dist - 2*Xacc
-                Tvmax = Xvmax/Vmax
-                Ttot = 2*tacc + Tvmax
-            return Ttot
-            
         add_material = self.NEW_E_LENGTH - self.LAST_E_LENGTH
         self.LAST_E_LENGTH = self.NEW_E_LENGTH
         
         if add_material > 0:
             distance_mm = norm(subs3(pose1.Pos(), pose2.Pos()))
             # calculate movement time in seconds
-            time_s = Calculate_Time(distance_mm, self.SPEED_MMS, self.ACCEL_MMSS)
+            time_s = move_time(distance_mm, self.SPEED_MMS, self.ACCEL_MMSS)
             # add material
             self.addline("$AOUT[5] := %.3f" % (add_material/time_s))
         else:
@@ -368,6 +359,7 @@ class RobotPost(object):
             if distance(pose.Pos(), self.LAST_POSE.Pos()) < 0.001 and pose_angle_between(pose, self.LAST_POSE) < 0.01:
                 return
         
+        self.CYCLE_TIME.MoveL(pose, joints)
         target = ''
         if pose is None:
             target = self.joints_2_str(joints)
@@ -384,6 +376,7 @@ class RobotPost(object):
         
     def MoveC(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
         """Add a circular movement"""
+        self.CYCLE_TIME.MoveC(pose1, joints1, pose2, joints2)
         #self.new_movec(self.LAST_POSE, pose1, pose2) #used for 3D printing
         if self.FLY_DIST > 0:
             self.addline('MOVEFLY CIRCULAR TO %s VIA %s ADVANCE' % (self.pose_2_str(pose2,joints2), self.pose_2_str(pose1,joints1)))
@@ -402,6 +395,7 @@ class RobotPost(object):
         
     def Pause(self, time_ms):
         """Pause the robot program"""
+        self.CYCLE_TIME.Pause(time_ms)
         if time_ms <= 0:
             self.addline('PAUSE')
         else:
@@ -409,25 +403,30 @@ class RobotPost(object):
     
     def setSpeed(self, speed_mms):
         """Changes the robot speed (in mm/s)"""
+        self.CYCLE_TIME.setSpeed(speed_mms)
         self.SPEED_MMS = speed_mms        
         self.addline('$SPD_OPT := SPD_LIN')
         self.addline('$LIN_SPD := %.3f' % (speed_mms*0.001))
     
     def setAcceleration(self, accel_mmss):
         """Changes the robot acceleration (in mm/s2)"""
+        self.CYCLE_TIME.setAcceleration(accel_mmss)
         self.ACCEL_MMSS = accel_mmss
         self.addlog('setAcceleration not defined')
     
     def setSpeedJoints(self, speed_degs):
         """Changes the robot joint speed (in deg/s)"""
+        self.CYCLE_TIME.setSpeedJoints(speed_degs)
         self.addline('$ROT_SPD := %.3f' % (speed_degs*pi/180.0))
     
     def setAccelerationJoints(self, accel_degss):
         """Changes the robot joint acceleration (in deg/s2)"""
+        self.CYCLE_TIME.setAccelerationJoints(accel_degss)
         self.addlog('setAccelerationJoints not defined')
         
     def setZoneData(self, zone_mm):
         """Changes the zone data approach (makes the movement more smooth)"""
+        self.CYCLE_TIME.setZoneData(zone_mm)
         #self.addlog('setZoneData not defined (%.1f mm)' % zone_mm)
         self.FLY_DIST = zone_mm
         self.addline('$FLY_DIST := %.3f' % zone_mm)
@@ -447,6 +446,7 @@ class RobotPost(object):
         
     def waitDI(self, io_var, io_value, timeout_ms=-1):
         """Waits for an input io_var to attain a given value io_value. Optionally, a timeout can be provided."""
+        self.CYCLE_TIME.stop()
         if type(io_var) != str:  # set default variable name if io_var is a number
             io_var = '$DIN[%s]' % str(io_var)        
         if type(io_value) != str: # set default variable value if io_value is a number            
@@ -475,6 +475,7 @@ class RobotPost(object):
         
     def RunCode(self, code, is_function_call = False):
         """Adds code or a function call"""
+        self.CYCLE_TIME.stop()
         if self.nProgs > 1 and not self.INCLUDE_SUB_PROGRAMS:
             return
         
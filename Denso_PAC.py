@@ -54,7 +54,7 @@ def pose_2_str(pose):
     
 def joints_2_str(angles):
     """Contverts a joint target to a string"""
-    return 'J(%s)' % (','.join(format(ji, ".5f") for ji in angles))
+    return 'J(%s)' % format_values(angles, '%.5f', ',')
 
 # ----------------------------------------------------    
 # Object class that handles the robot instructions/syntax
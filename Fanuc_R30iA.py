@@ -97,7 +97,7 @@ class RobotPost(object):
     nPages = 0           # Count the number of pages
     PROG_NAMES_MAIN = [] # List of programs called by a main program due to splitting
     
-    PROG = []     # Save the program lines
+    PROG = NumberedLines('%4i:%s')     # Save the program lines (numbered when the program is saved)
     PROG_TARGETS = []  # Save the program lines (targets section)
     LOG = '' # Save a log
     
@@ -113,13 +113,17 @@ class RobotPost(object):
     # Specific to ARC welding applications
     SPEED_BACKUP = None
     LAST_POSE = None
+    COLLINEAR_TOLERANCE = 0 # set the tolerance in mm to merge collinear linear movements (0 disables the filter)
+    COLLINEAR_TOLERANCE_DEG = 0.01 # set the orientation tolerance in deg to merge collinear linear movements
+    COLLINEAR_FILTER = None
     
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
         self.ROBOT_POST = robotpost
         self.ROBOT_NAME = robotname
         self.nAxes = robot_axes
-        self.PROG = []
+        self.PROG = NumberedLines('%4i:%s')
         self.LOG = ''
+        self.COLLINEAR_FILTER = CollinearFilter(self.add_movel, self.COLLINEAR_TOLERANCE, self.COLLINEAR_TOLERANCE_DEG)
         #for k,v in kwargs.iteritems(): # python2
         for k,v in kwargs.items():
             if k == 'lines_x_prog':
@@ -136,6 +140,7 @@ class RobotPost(object):
                 self.HAS_TURNTABLE = True        
                 
     def ProgStart(self, progname, new_page = False):
+        self.COLLINEAR_FILTER.reset()
         progname = get_safe_name(progname)
         progname_i = progname
         if new_page:
@@ -163,6 +168,7 @@ class RobotPost(object):
         self.PROG_NAMES.append(progname_i)
         
     def ProgFinish(self, progname, new_page = False):
+        self.COLLINEAR_FILTER.reset()
         progname = get_safe_name(progname)
         if not new_page:
             # Reset page count
@@ -204,14 +210,9 @@ class RobotPost(object):
         header = header + '/MN'
         #header = header + '/MN' + '\n'    # Important! Last line should not have \n
         
-        self.PROG.insert(0, header)
-        self.PROG.append('/POS')
-        self.PROG += self.PROG_TARGETS
-        self.PROG.append('/END')
-        
-        # Save PROG in PROG_LIST
-        self.PROG_LIST.append(self.PROG)
-        self.PROG = []
+        # Save PROG in PROG_LIST: the header, the program lines and the targets are written one after the other when the program is saved
+        self.PROG_LIST.append(ProgramPage([[header], self.PROG, ['/POS'], self.PROG_TARGETS, ['/END']]))
+        self.PROG = NumberedLines('%4i:%s')
         self.PROG_TARGETS = []
         #self.nLines = 0
         self.LINE_COUNT = 0
@@ -285,7 +286,7 @@ class RobotPost(object):
                 print("Warning: ProgFinish was not called properly")
                 self.PROG_LIST.append(self.PROG)
                 self.PROG_NAMES.append("Unknown")
-                self.PROG = []
+                self.PROG = NumberedLines('%4i:%s')
                 self.LINE_COUNT = 0
             
             if len(self.PROG_NAMES_MAIN) > 1:
@@ -335,6 +336,7 @@ class RobotPost(object):
         
     def MoveJ(self, pose, joints, conf_RLF=None):
         """Add a joint movement"""
+        self.COLLINEAR_FILTER.reset()
         self.page_size_control() # Important to control the maximum lines per program and not save last target on new program
         
         target_id = self.add_target_joints(pose, joints)
@@ -344,6 +346,10 @@ class RobotPost(object):
         
     def MoveL(self, pose, joints, conf_RLF=None):
         """Add a linear movement"""
+        self.COLLINEAR_FILTER.MoveL(pose, joints, conf_RLF)
+        
+    def add_movel(self, pose, joints, conf_RLF=None):
+        """Output a linear movement (collinear movements are merged by COLLINEAR_FILTER)"""
         
         #if self.LAST_POSE is not None and pose is not None:
         #    # Skip adding a new movement if the new position is the same as the last one
@@ -364,6 +370,7 @@ class RobotPost(object):
         
     def MoveC(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
         """Add a circular movement"""
+        self.COLLINEAR_FILTER.reset()
         self.page_size_control() # Important to control the maximum lines per program and not save last target on new program
         
         target_id1 = self.add_target_cartesian(pose1, joints1, conf_RLF_1)
@@ -374,6 +381,7 @@ class RobotPost(object):
         
     def setFrame(self, pose, frame_id=None, frame_name=None):
         """Change the robot reference frame"""
+        self.COLLINEAR_FILTER.reset()
         xyzwpr = Pose_2_Fanuc(pose)
         if frame_id is None or frame_id < 0:            
             for i in range(6):
@@ -389,6 +397,7 @@ class RobotPost(object):
         
     def setTool(self, pose, tool_id=None, tool_name=None):
         """Change the robot TCP"""
+        self.COLLINEAR_FILTER.reset()
         xyzwpr = Pose_2_Fanuc(pose)
         if tool_id is None or tool_id < 0:
             for i in range(6):
@@ -404,6 +413,7 @@ class RobotPost(object):
         
     def Pause(self, time_ms):
         """Pause the robot program"""
+        self.COLLINEAR_FILTER.flush()
         if time_ms <= 0:
             self.addline('PAUSE ;')
         else:
@@ -411,6 +421,7 @@ class RobotPost(object):
         
     def setSpeed(self, speed_mms):
         """Changes the robot speed (in mm/s)"""
+        self.COLLINEAR_FILTER.flush()
         if self.SPEED_BACKUP is None:
             # Set the normal speed
             self.SPEED = '%.0fmm/sec' % max(speed_mms, 0.01)
@@ -426,19 +437,23 @@ class RobotPost(object):
     
     def setAcceleration(self, accel_mmss):
         """Changes the robot acceleration (in mm/s2)"""
+        self.COLLINEAR_FILTER.flush()
         self.addlog('setAcceleration not defined')
     
     def setSpeedJoints(self, speed_degs):
         """Changes the robot joint speed (in deg/s)"""
+        self.COLLINEAR_FILTER.flush()
         #self.addlog('setSpeedJoints not defined')
         self.JOINT_SPEED = '%.0f%%' % max(min(100.0*speed_degs/200.0, 100.0), 1) # Saturate percentage speed between 1 and 100
     
     def setAccelerationJoints(self, accel_degss):
         """Changes the robot joint acceleration (in deg/s2)"""
+        self.COLLINEAR_FILTER.flush()
         self.addlog('setAccelerationJoints not defined')
         
     def setZoneData(self, zone_mm):
         """Changes the zone data approach (makes the movement more smooth)"""
+        self.COLLINEAR_FILTER.flush()
         if zone_mm < 0:
             self.CNT_VALUE = 'FINE'
         else:
@@ -446,6 +461,7 @@ class RobotPost(object):
         
     def setDO(self, io_var, io_value):
         """Sets a variable (output) to a given value"""
+        self.COLLINEAR_FILTER.flush()
         if type(io_var) != str:  # set default variable name if io_var is a number
             io_var = 'DO[%s]' % str(io_var)        
         if type(io_value) != str: # set default variable value if io_value is a number            
@@ -459,6 +475,7 @@ class RobotPost(object):
         
     def waitDI(self, io_var, io_value, timeout_ms=-1):
         """Waits for an input io_var to attain a given value io_value. Optionally, a timeout can be provided."""
+        self.COLLINEAR_FILTER.flush()
         if type(io_var) != str:  # set default variable name if io_var is a number
             io_var = 'DI[%s]' % str(io_var)        
         if type(io_value) != str: # set default variable value if io_value is a number            
@@ -480,11 +497,12 @@ class RobotPost(object):
        
     def addlastline(self, add_params):
         """Add parameters to the last command"""
-        if len(self.PROG) > 0 and self.PROG[-1].endswith(';\n'):
-            self.PROG[-1] = self.PROG[-1][:-2] + add_params + ';' # remove last 2 characters
+        if len(self.PROG.lines) > 0 and self.PROG.lines[-1].endswith(';\n'):
+            self.PROG.lines[-1] = self.PROG.lines[-1][:-2] + add_params + ';' # remove last 2 characters
             
     def RunCode(self, code, is_function_call = False):
         """Adds code or a function call"""
+        self.COLLINEAR_FILTER.flush()
         if is_function_call:
             code = get_safe_name(code, 12)
             if code.startswith("ArcStart"):
@@ -527,6 +545,7 @@ class RobotPost(object):
         
     def RunMessage(self, message, iscomment = False):
         """Add a joint movement"""
+        self.COLLINEAR_FILTER.flush()
         if iscomment:
             #pass
             for i in range(0,len(message), 20):
@@ -554,8 +573,7 @@ class RobotPost(object):
         self.page_size_control()
         
         self.LINE_COUNT = self.LINE_COUNT + 1
-        newline_ok = ('%4i:%s ' % (self.LINE_COUNT, movetype)) + newline            
-        self.PROG.append(newline_ok)
+        self.PROG.add(movetype + ' ' + newline)
             
     def addline_targets(self, newline):
         """Add a line at the end of the program (used for targets)"""
@@ -97,7 +97,7 @@ class RobotPost(object):
     nPages = 0           # Count the number of pages
     PROG_NAMES_MAIN = [] # List of programs called by a main program due to splitting
     
-    PROG = []     # Save the program lines
+    PROG = NumberedLines('%4i:%s')     # Save the program lines (numbered when the program is saved)
     PROG_TARGETS = []  # Save the program lines (targets section)
     LOG = '' # Save a log
     
@@ -118,7 +118,7 @@ class RobotPost(object):
         self.ROBOT_POST = robotpost
         self.ROBOT_NAME = robotname
         self.nAxes = robot_axes
-        self.PROG = []
+        self.PROG = NumberedLines('%4i:%s')
         self.LOG = ''
         #for k,v in kwargs.iteritems(): # python2
         for k,v in kwargs.items():
@@ -204,14 +204,9 @@ class RobotPost(object):
         header = header + '/MN'
         #header = header + '/MN' + '\n'    # Important! Last line should not have \n
         
-        self.PROG.insert(0, header)
-        self.PROG.append('/POS')
-        self.PROG += self.PROG_TARGETS
-        self.PROG.append('/END')
-        
-        # Save PROG in PROG_LIST
-        self.PROG_LIST.append(self.PROG)
-        self.PROG = []
+        # Save PROG in PROG_LIST: the header, the program lines and the targets are written one after the other when the program is saved
+        self.PROG_LIST.append(ProgramPage([[header], self.PROG, ['/POS'], self.PROG_TARGETS, ['/END']]))
+        self.PROG = NumberedLines('%4i:%s')
         self.PROG_TARGETS = []
         #self.nLines = 0
         self.LINE_COUNT = 0
@@ -285,7 +280,7 @@ class RobotPost(object):
                 print("Warning: ProgFinish was not called properly")
                 self.PROG_LIST.append(self.PROG)
                 self.PROG_NAMES.append("Unknown")
-                self.PROG = []
+                self.PROG = NumberedLines('%4i:%s')
                 self.LINE_COUNT = 0
             
             if len(self.PROG_NAMES_MAIN) > 1:
@@ -479,8 +474,8 @@ class RobotPost(object):
        
     def addlastline(self, add_params):
         """Add parameters to the last command"""
-        if len(self.PROG) > 0 and self.PROG[-1].endswith(';\n'):
-            self.PROG[-1] = self.PROG[-1][:-2] + add_params + ';' # remove last 2 characters
+        if len(self.PROG.lines) > 0 and self.PROG.lines[-1].endswith(';\n'):
+            self.PROG.lines[-1] = self.PROG.lines[-1][:-2] + add_params + ';' # remove last 2 characters
             
     def RunCode(self, code, is_function_call = False):
         """Adds code or a function call"""
@@ -553,8 +548,7 @@ class RobotPost(object):
         self.page_size_control()
         
         self.LINE_COUNT = self.LINE_COUNT + 1
-        newline_ok = ('%4i:%s ' % (self.LINE_COUNT, movetype)) + newline            
-        self.PROG.append(newline_ok)
+        self.PROG.add(movetype + ' ' + newline)
             
     def addline_targets(self, newline):
         """Add a line at the end of the program (used for targets)"""
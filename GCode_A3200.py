@@ -88,6 +88,8 @@ class RobotPost(object):
     nAxes = 6
     nId = 0
     REF_FRAME = eye(4)
+    ARC_TOLERANCE = 0       # set the chord tolerance in mm to collapse linear movements into circular movements (0 disables arc fitting)
+    ARC_FITTER = None
 
     
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
@@ -96,6 +98,7 @@ class RobotPost(object):
         self.PROG = ''
         self.LOG = ''
         self.nAxes = robot_axes
+        self.ARC_FITTER = ArcFitter(self.add_movel, self.MoveC, self.ARC_TOLERANCE)
         for k,v in kwargs.items():
             if k == 'lines_x_prog':
                 self.MAX_LINES_X_PROG = v       
@@ -105,6 +108,7 @@ class RobotPost(object):
         self.addline('VELOCITY ON')
         
     def ProgFinish(self, progname):
+        self.ARC_FITTER.reset()
         self.addline('// end of program ' + progname)
         
     def ProgSave(self, folder, progname, ask_user=False, show_result=False):
@@ -146,24 +150,32 @@ class RobotPost(object):
         
     def MoveJ(self, pose, joints, conf_RLF=None):
         """Add a joint movement"""
+        self.ARC_FITTER.reset()
         self.addline('JOINTS %s F%.2f' % (joints_2_str(joints), self.SPEED_MMS))
         
     def MoveL(self, pose, joints, conf_RLF=None):
         """Add a linear movement"""
+        self.ARC_FITTER.MoveL(pose, joints, conf_RLF)
+        
+    def add_movel(self, pose, joints, conf_RLF=None):
+        """Output a linear movement (arcs fitted by ARC_FITTER are output using MoveC)"""
         self.addline('LINEAR %s F%.2f' % (pose_2_str(self.REF_FRAME*pose, joints), self.SPEED_MMS))
         
     def MoveC(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
         """Add a circular movement"""    
+        self.ARC_FITTER.reset()
         self.addline('CIRCULAR %s F%.2f' % (pose_2_str(self.REF_FRAME*pose1, joints1), self.SPEED_MMS))
         self.addline('CIRCULAR %s F%.2f' % (pose_2_str(self.REF_FRAME*pose2, joints2), self.SPEED_MMS)) 
         
     def setFrame(self, pose, frame_id=None, frame_name=None):
         """Change the robot reference frame"""
+        self.ARC_FITTER.reset()
         self.REF_FRAME = pose
         self.addline('// Reference frame set to: ' + pose_2_str(pose))
         
     def setTool(self, pose, tool_id=None, tool_name=None):
         """Change the robot TCP"""
+        self.ARC_FITTER.reset()
         self.nId = self.nId + 1
         self.addline('// Tool frame set to: ' + pose_2_str(pose))
         
@@ -176,6 +188,7 @@ class RobotPost(object):
     
     def setSpeed(self, speed_mms):
         """Changes the robot speed (in mm/s)"""
+        self.ARC_FITTER.flush()
         self.SPEED_MMS = speed_mms
         #self.addline('F%.3f' % (speed_mms*60))
     
@@ -250,6 +263,7 @@ class RobotPost(object):
 # ------------------ private ----------------------                
     def addline(self, newline):
         """Add a program line"""
+        self.ARC_FITTER.flush()
         self.PROG = self.PROG + newline + '\n'
         
     def addlog(self, newline):
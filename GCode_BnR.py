@@ -77,19 +77,21 @@ class RobotPost(object):
     ROBOT_NAME = ''
     PROG_FILES = []
     
-    PROG = ''
+    PROG = NumberedLines('N%02i %s') # program lines (movements are numbered when the program is saved)
     LOG = ''
     nAxes = 6
-    nId = 0
     REF_FRAME = eye(4)
+    ARC_TOLERANCE = 0       # set the chord tolerance in mm to collapse linear movements into circular movements (0 disables arc fitting)
+    ARC_FITTER = None
 
     
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
         self.ROBOT_POST = robotpost
         self.ROBOT_NAME = robotname
-        self.PROG = ''
+        self.PROG = NumberedLines('N%02i %s')
         self.LOG = ''
         self.nAxes = robot_axes
+        self.ARC_FITTER = ArcFitter(self.add_movel, self.MoveC, self.ARC_TOLERANCE)
         
     def ProgStart(self, progname):
         self.addline('; program: %s()' % progname)
@@ -98,6 +100,7 @@ class RobotPost(object):
         self.addline('F15000')        
         
     def ProgFinish(self, progname):
+        self.ARC_FITTER.reset()
         self.addline('; ENDPROC')
         
     def ProgSave(self, folder, progname, ask_user=False, show_result=False):
@@ -111,7 +114,7 @@ class RobotPost(object):
         else:
             filesave = folder + '/' + progname
         fid = open(filesave, "w")
-        fid.write(self.PROG)
+        fid.write(self.PROG.text())
         fid.close()
         print('SAVED: %s\n' % filesave)
         self.PROG_FILES = filesave
@@ -139,34 +142,39 @@ class RobotPost(object):
         
     def MoveJ(self, pose, joints, conf_RLF=None):
         """Add a joint movement"""
-        self.nId = self.nId + 1
-        self.addline('N%02i G101 ' % self.nId + joints_2_str(joints))
+        self.ARC_FITTER.reset()
+        self.addline_numbered('G101 ' + joints_2_str(joints))
         
     def MoveL(self, pose, joints, conf_RLF=None):
         """Add a linear movement"""
-        self.nId = self.nId + 1
-        self.addline('N%02i G1 ' % self.nId + pose_2_str(self.REF_FRAME*pose, joints))
+        self.ARC_FITTER.MoveL(pose, joints, conf_RLF)
+        
+    def add_movel(self, pose, joints, conf_RLF=None):
+        """Output a linear movement (arcs fitted by ARC_FITTER are output using MoveC)"""
+        self.addline_numbered('G1 ' + pose_2_str(self.REF_FRAME*pose, joints))
         #self.addline('N%02i G90 G1 ' % self.nId + joints_2_str(joints))
         
     def MoveC(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
         """Add a circular movement"""
-        self.nId = self.nId + 1
+        self.ARC_FITTER.reset()
         xyz1 = (self.REF_FRAME*pose1).Pos()
         xyz2 = (self.REF_FRAME*pose2).Pos()        
-        self.addline('N%02i G90 G102 X%.3f Y%.3f Z%.3f I1=%.3f J1=%.3f K1=%.3f' % (self.nId, xyz2[0], xyz2[1], xyz2[2], xyz1[0], xyz1[1], xyz1[2]))
+        self.addline_numbered('G90 G102 X%.3f Y%.3f Z%.3f I1=%.3f J1=%.3f K1=%.3f' % (xyz2[0], xyz2[1], xyz2[2], xyz1[0], xyz1[1], xyz1[2]))
         #self.addline('N%02i G102 X%.3f Y%.3f Z%.3f I1=%.3f J1=%.3f K1=%.3f' % (self.nId, xyz1[0], xyz1[1], xyz1[2], xyz2[0]-xyz1[0], xyz2[1]-xyz1[1], xyz2[2]-xyz1[2]))		
         
     def setFrame(self, pose, frame_id=None, frame_name=None):
         """Change the robot reference frame"""
+        self.ARC_FITTER.reset()
         self.REF_FRAME = pose
         self.addline('; Reference frame set to: ' + pose_2_str(pose))
-        self.addline(('; N%02i G90 G92 ' % self.nId) + pose_2_str(pose))
+        self.addline(('; N%02i G90 G92 ' % self.PROG.number) + pose_2_str(pose))
         
     def setTool(self, pose, tool_id=None, tool_name=None):
         """Change the robot TCP"""
-        self.nId = self.nId + 1
+        self.ARC_FITTER.reset()
+        nId = self.PROG.skip()
         self.addline('; Tool frame set to: ' + pose_2_str(pose))
-        self.addline(('; N%02i G90 G92 ' % self.nId) + pose_2_str(pose))
+        self.addline(('; N%02i G90 G92 ' % nId) + pose_2_str(pose))
         pass
         
     def Pause(self, time_ms):
@@ -245,7 +253,13 @@ class RobotPost(object):
 # ------------------ private ----------------------                
     def addline(self, newline):
         """Add a program line"""
-        self.PROG = self.PROG + newline + '\n'
+        self.ARC_FITTER.flush()
+        self.PROG.add_unnumbered(newline)
+        
+    def addline_numbered(self, newline):
+        """Add a numbered program line (N number added when the program is saved)"""
+        self.ARC_FITTER.flush()
+        self.PROG.add(newline)
         
     def addlog(self, newline):
         """Add a log message"""
@@ -293,7 +307,7 @@ def test_post():
     robot.MoveJ(None, [-46.18419, -6.77518, -20.54925, 71.38674, 49.58727, -302.54752] )
     robot.ProgFinish("Program")
     # robot.ProgSave(".","Program",True)
-    print(robot.PROG)
+    print(robot.PROG.text())
     if len(robot.LOG) > 0:
         mbox('Program generation LOG:\n\n' + robot.LOG)
 
@@ -75,6 +75,8 @@ class RobotPost(object):
     nAxes = 6
     nId = 0
     REF_FRAME = eye(4)
+    ARC_TOLERANCE = 0       # set the chord tolerance in mm to collapse linear movements into circular movements (0 disables arc fitting)
+    ARC_FITTER = None
 
     
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
@@ -83,6 +85,7 @@ class RobotPost(object):
         self.PROG = ''
         self.LOG = ''
         self.nAxes = robot_axes
+        self.ARC_FITTER = ArcFitter(self.add_movel, self.MoveC, self.ARC_TOLERANCE)
         
     def ProgStart(self, progname):
         self.addline('; Program %s' % progname)
@@ -90,6 +93,7 @@ class RobotPost(object):
         self.addline('N%05i F15000 ; Set default speed' % self.nId)
         
     def ProgFinish(self, progname):
+        self.ARC_FITTER.reset()
         self.addline('; End of program: %s' % progname)
         self.nId = self.nId + 1
         self.addline('N%05i M30' % self.nId)
@@ -133,17 +137,23 @@ class RobotPost(object):
         
     def MoveJ(self, pose, joints, conf_RLF=None):
         """Add a joint movement"""
+        self.ARC_FITTER.reset()
         self.nId = self.nId + 1
         self.addline('N%05i G00 ' % self.nId + joints_2_str(joints))
         
     def MoveL(self, pose, joints, conf_RLF=None):
         """Add a linear movement"""
+        self.ARC_FITTER.MoveL(pose, joints, conf_RLF)
+        
+    def add_movel(self, pose, joints, conf_RLF=None):
+        """Output a linear movement (arcs fitted by ARC_FITTER are output using MoveC)"""
         self.nId = self.nId + 1
         self.addline('N%05i G07 ' % self.nId + pose_2_str(self.REF_FRAME*pose))
         #self.addline('N%05i G90 G1 ' % self.nId + joints_2_str(joints))
         
     def MoveC(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
         """Add a circular movement"""
+        self.ARC_FITTER.reset()
         self.nId = self.nId + 1
         xyz1 = (self.REF_FRAME*pose1).Pos()
         xyz2 = (self.REF_FRAME*pose2).Pos()        
@@ -152,6 +162,7 @@ class RobotPost(object):
         
     def setFrame(self, pose, frame_id=None, frame_name=None):
         """Change the robot reference frame"""
+        self.ARC_FITTER.reset()
         self.REF_FRAME = pose
         self.nId = self.nId + 1
         self.addline('; Using reference frame: ' + pose_2_str(pose))
@@ -159,6 +170,7 @@ class RobotPost(object):
         
     def setTool(self, pose, tool_id=None, tool_name=None):
         """Change the robot TCP"""        
+        self.ARC_FITTER.reset()
         self.addline('; Tool frame set to: ' + tool_name)
         self.addline('; ' + pose_2_str(pose))
         self.nId = self.nId + 1
@@ -168,6 +180,7 @@ class RobotPost(object):
         
     def Pause(self, time_ms):
         """Pause the robot program"""
+        self.ARC_FITTER.flush()
         self.nId = self.nId + 1
         if time_ms < 0:
             self.addline('N%05i M00 ; Machine halt' % self.nId)
@@ -225,6 +238,7 @@ class RobotPost(object):
         
     def RunCode(self, code, is_function_call = False):
         """Adds code or a function call"""
+        self.ARC_FITTER.flush()
         self.nId = self.nId + 1
         if is_function_call:
             code.replace(' ','_')
@@ -247,6 +261,7 @@ class RobotPost(object):
 # ------------------ private ----------------------                
     def addline(self, newline):
         """Add a program line"""
+        self.ARC_FITTER.flush()
         self.PROG = self.PROG + newline + '\r\n'
         
     def addlog(self, newline):
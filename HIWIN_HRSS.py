@@ -68,19 +68,13 @@ def pose_2_str_ext(pose,joints):
     if njoints <= 6:
         return pose_2_str(pose)
     else:     
-        extaxes = ''
-        for i in range(njoints-6):
-            extaxes = extaxes + (',E%i %.5f' % (i+1, joints[i+6]))
+        extaxes = ',' + format_values(joints[6:], '%.5f', ',', ['E%i ' % (i+1) for i in range(njoints-6)])
         return pose_2_str(pose) + extaxes
     
 def angles_2_str(angles):
     """Prints a joint target"""
-    str = ''
-    data = ['A1','A2','A3','A4','A5','A6','E1','E2','E3','E4','E5','E6']
-    for i in range(len(angles)):
-        str = str + ('%s %.5f,' % (data[i], angles[i]))
-    str = str[:-1]
-    return str
+    data = ['A1 ','A2 ','A3 ','A4 ','A5 ','A6 ','E1 ','E2 ','E3 ','E4 ','E5 ','E6 ']
+    return format_values(angles, '%.5f', ',', data)
     
 def get_safe_name(varname):
     """Get a safe program name"""
@@ -82,8 +82,10 @@ class RobotPost(object):
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
         self.ROBOT_POST = robotpost
         self.ROBOT_NAME = robotname
-        self.PROG = ''
-        self.PROG_VAR = ''
+        self.PROG = SpoolFile('.' + self.PROG_EXT)
+        self.PROG_VAR = SpoolFile('.' + self.PROG_EXT_VAR)
+        self.VARS_DECLARED = set()
+        self.VARS_USED = set()
         self.LOG = ''
         self.nAxes = robot_axes
         
@@ -106,20 +108,24 @@ class RobotPost(object):
             if filesave is not None:
                 filesave = filesave.name
             else:
+                self.PROG.close()
+                self.PROG_VAR.close()
                 return
         else:
             filesave = folder + '/' + prognametip
-        fid = open(filesave, "w")
-        fid.write(self.PROG)
-        fid.close()
+            
+        # check that every variable used by the program is declared in the variables file
+        vars_missing = sorted(self.VARS_USED - self.VARS_DECLARED)
+        if len(vars_missing) > 0:
+            self.addlog('Variables used but not declared: ' + ', '.join(vars_missing))
+            
+        self.PROG.save(filesave)
         print('SAVED: %s\n' % filesave) # tell RoboDK the path of the saved file
         self.PROG_FILES = filesave
         
         # variables file:
         filesave_var = filesave[:-3] + self.PROG_EXT_VAR
-        fid = open(filesave_var, "w")
-        fid.write(self.PROG_VAR)
-        fid.close()    
+        self.PROG_VAR.save(filesave_var)
         
         # open file with default application
         if show_result:
@@ -148,14 +154,14 @@ class RobotPost(object):
     def MoveJ(self, pose, joints, conf_RLF=None):
         """Add a joint movement"""
         varname = 'ap%i' % self.count_var_ptp
-        self.addline('PTP(%s, EROP_D0, EROP_OL)' % varname)
+        self.addline('PTP(%s, EROP_D0, EROP_OL)' % varname, [varname, 'EROP_D0', 'EROP_OL'])
         self.addline_var('%s : AXISPOS := (%s)' % (varname, angles_2_str(joints)))
         self.count_var_ptp = self.count_var_ptp + 1
         
     def MoveL(self, pose, joints, conf_RLF=None):
         """Add a linear movement"""
         varname = 'pos%i' % self.count_var_lin
-        self.addline('Lin(%s, EROP_D0, EROP_OL)' % varname)
+        self.addline('Lin(%s, EROP_D0, EROP_OL)' % varname, [varname, 'EROP_D0', 'EROP_OL'])
         self.addline_var('%s : CARTPOS := (%s)' % (varname, pose_2_str(pose)))
         self.count_var_lin = self.count_var_lin + 1
         
@@ -165,7 +171,7 @@ class RobotPost(object):
         self.count_var_lin = self.count_var_lin + 1
         varname2 = 'pos%i' % self.count_var_lin
         self.count_var_lin = self.count_var_lin + 1        
-        self.addline('Circ(%s, %s, EROP_D0, EROP_OL)' % (varname1, varname2))
+        self.addline('Circ(%s, %s, EROP_D0, EROP_OL)' % (varname1, varname2), [varname1, varname2, 'EROP_D0', 'EROP_OL'])
         self.addline_var('%s : CARTPOS := (%s)' % (varname1, pose_2_str(pose1)))
         self.addline_var('%s : CARTPOS := (%s)' % (varname2, pose_2_str(pose2)))
         
@@ -187,12 +193,12 @@ class RobotPost(object):
     
     def setSpeed(self, speed_mms):
         """Changes the robot speed (in mm/s)"""
-        self.addline('EROP_D0.vel := %.3f' % speed_mms)
+        self.addline('EROP_D0.vel := %.3f' % speed_mms, ['EROP_D0'])
     
     def setAcceleration(self, accel_mmss):
         """Changes the robot acceleration (in mm/s2)"""
-        self.addline('EROP_D0.acc := %.3f' % accel_mmss)
-        self.addline('EROP_D0.dec := %.3f' % accel_mmss)        
+        self.addline('EROP_D0.acc := %.3f' % accel_mmss, ['EROP_D0'])
+        self.addline('EROP_D0.dec := %.3f' % accel_mmss, ['EROP_D0'])        
     
     def setSpeedJoints(self, speed_degs):
         """Changes the robot joint speed (in deg/s)"""
@@ -251,13 +257,16 @@ class RobotPost(object):
             self.addlog('Show message on teach pendant not implemented (%s)' % message)
         
 # ------------------ private ----------------------                
-    def addline(self, newline):
-        """Add a program line"""
-        self.PROG = self.PROG + newline + '\n'
+    def addline(self, newline, variables=None):
+        """Add a program line (variables: names of the variables used by the line)"""
+        self.PROG.write(newline + '\n')
+        if variables is not None:
+            self.VARS_USED.update(variables)
     
     def addline_var(self, newline):
-        """Add a program line"""
-        self.PROG_VAR = self.PROG_VAR + newline + '\n'
+        """Add a variable declaration (name : TYPE := value)"""
+        self.PROG_VAR.write(newline + '\n')
+        self.VARS_DECLARED.add(newline.split(':', 1)[0].strip())
     
         
     def addlog(self, newline):
@@ -305,7 +314,7 @@ def test_post():
     robot.MoveL(Pose([250, 150, 191.421356, 180, 0, -150]), [-43.82111, 3.29703, -40.29493, 56.02402, 56.61169, -249.23532] )
     robot.ProgFinish("Program")
     # robot.ProgSave(".","Program",True)
-    print(robot.PROG)
+    print(robot.PROG.getvalue())
     if len(robot.LOG) > 0:
         mbox('Program generation LOG:\n\n' + robot.LOG)
 
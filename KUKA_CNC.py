@@ -96,6 +96,8 @@ class RobotPost(object):
     
     
     REF_FRAME = eye(4)
+    ARC_TOLERANCE = 0       # set the chord tolerance in mm to collapse linear movements into circular movements (0 disables arc fitting)
+    ARC_FITTER = None
 
     
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
@@ -104,6 +106,7 @@ class RobotPost(object):
         self.PROG = []
         self.LOG = ''
         self.nAxes = robot_axes
+        self.ARC_FITTER = ArcFitter(self.add_movel, self.MoveC, self.ARC_TOLERANCE)
         
     def ProgStart(self, progname):
         self.addline('%% program: %s()' % progname, False)
@@ -117,6 +120,7 @@ class RobotPost(object):
         self.addline('', False)
         
     def ProgFinish(self, progname):
+        self.ARC_FITTER.reset()
         self.set_move_type(self.MOVE_TYPE_NONE)
         self.addline('%% End of program %s' % progname, False)
         
@@ -173,6 +177,7 @@ class RobotPost(object):
             
     def MoveJ(self, pose, joints, conf_RLF=None):
         """Add a joint movement"""
+        self.ARC_FITTER.reset()
         self.set_move_type(self.MOVE_TYPE_MCS)
         self.addline('G0 ' + joints_2_str(joints))
         
@@ -182,12 +187,17 @@ class RobotPost(object):
         
     def MoveL(self, pose, joints, conf_RLF=None):
         """Add a linear movement"""
+        self.ARC_FITTER.MoveL(pose, joints, conf_RLF)
+        
+    def add_movel(self, pose, joints, conf_RLF=None):
+        """Output a linear movement (arcs fitted by ARC_FITTER are output using MoveC)"""
         self.set_move_type(self.MOVE_TYPE_HSC)
         self.addline('G1 ' + pose_2_str(self.REF_FRAME*pose, joints) + self.SPEED_F)
         self.SPEED_F = ''
         
     def MoveC(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
         """Add a circular movement"""
+        self.ARC_FITTER.reset()
         xyz1 = (self.REF_FRAME*pose1).Pos()
         xyz2 = (self.REF_FRAME*pose2).Pos()        
         self.addline('G2 X%.3f Y%.3f Z%.3f I1=%.3f J1=%.3f K1=%.3f' % (xyz2[0], xyz2[1], xyz2[2], xyz1[0], xyz1[1], xyz1[2]))
@@ -195,12 +205,14 @@ class RobotPost(object):
         
     def setFrame(self, pose, frame_id=None, frame_name=None):
         """Change the robot reference frame"""
+        self.ARC_FITTER.reset()
         self.REF_FRAME = pose
         self.addline('%% Using Reference %s: %s' % (frame_name, pose_2_str(pose)), False)
         self.addline('%% (Using absolute coordinates)', False)
         
     def setTool(self, pose, tool_id=None, tool_name=None):
         """Change the robot TCP"""
+        self.ARC_FITTER.reset()
         self.addline('', False)
         self.addline('%% Using Tool %s: %s' % (tool_name, pose_2_str(pose)), False)
         if tool_id < 1:
@@ -226,6 +238,7 @@ class RobotPost(object):
     
     def setSpeed(self, speed_mms):
         """Changes the robot speed (in mm/s)"""
+        self.ARC_FITTER.flush()
         self.SPEED_F = ' F%.3f' % (speed_mms*60)
     
     def setAcceleration(self, accel_mmss):
@@ -293,6 +306,7 @@ class RobotPost(object):
 # ------------------ private ----------------------                
     def addline(self, newline, add_N = True):
         """Add a program line"""
+        self.ARC_FITTER.flush()
         if add_N:
             self.nId += 1
             newline = 'N%i ' % self.nId + newline
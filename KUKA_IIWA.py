@@ -60,6 +60,7 @@ import com.kuka.roboticsAPI.geometricModel.math.Transformation;
 import com.kuka.roboticsAPI.motionModel.LIN;
 import com.kuka.roboticsAPI.motionModel.PTP;
 import com.kuka.roboticsAPI.motionModel.Spline;
+import com.kuka.roboticsAPI.motionModel.SplineMotionCP;
 import com.kuka.roboticsAPI.uiModel.ApplicationDialogType;
 
 public class %s extends RoboticsAPIApplication {
@@ -71,7 +72,33 @@ public class %s extends RoboticsAPIApplication {
 \t\trobot = getContext().getDeviceFromType(LBR.class);
 \t}
 \tpublic void run() {
-\t\tSpline move_curve;
+'''
+
+# Spline frames are stored as static arrays of the class. Each array is loaded at runtime from a string constant
+# (the data does not count for the size of the Java methods and the size of the static initializer remains small)
+SPLINE_DATA = '''
+\tprivate static double[][] loadFrames(String data) {
+\t\tString[] rows = data.split(";");
+\t\tdouble[][] frames = new double[rows.length][];
+\t\tfor (int i = 0; i < rows.length; i++) {
+\t\t\tString[] values = rows[i].split(",");
+\t\t\tframes[i] = new double[values.length];
+\t\t\tfor (int j = 0; j < values.length; j++) {
+\t\t\t\tframes[i][j] = Double.parseDouble(values[j]);
+\t\t\t}
+\t\t}
+\t\treturn frames;
+\t}
+\t
+\tprivate static Spline splineFrames(double[][] frames) {
+\t\tSplineMotionCP<?>[] segments = new SplineMotionCP<?>[frames.length];
+\t\tfor (int i = 0; i < frames.length; i++) {
+\t\t\tsegments[i] = spl(new Frame(frames[i][0], frames[i][1], frames[i][2], frames[i][3], frames[i][4], frames[i][5]));
+\t\t}
+\t\treturn new Spline(segments);
+\t}
+\t
+\t// Spline frames (x,y,z,a,b,c)
 '''
 
 # ----------------------------------------------------
@@ -126,9 +153,14 @@ class RobotPost(object):
     ACCEL_MMSS = 500
     TAB = '\t\t'
     MAIN_DONE = False
-    SPLINE = ''
-    SPLINE_COUNT = 0
-    SPLINE_LAST_FRAME = ''
+    SPLINE_MAX_SEGMENTS = 200   # maximum number of segments per Spline motion (longer paths are split in multiple Spline motions)
+    MAX_LINES_X_METHOD = 1000   # maximum number of lines per Java method (longer programs are split in multiple methods to respect the 64 KB method size limit)
+    SPLINE = []                 # buffered spline frames (as strings)
+    SPLINE_ID = 0
+    SPLINE_ARRAYS = []          # static arrays with the frames of each Spline motion
+    METHOD_NAME = 'run'
+    METHOD_PART = 1
+    METHOD_LINES = 0
     
     
     
@@ -138,13 +170,19 @@ class RobotPost(object):
         #self.PROG = HEADER
         self.LOG = ''
         self.nAxes = robot_axes
+        self.SPLINE = []
+        self.SPLINE_ARRAYS = []
         
     def ProgStart(self, progname):
         if self.MAIN_DONE:
-            self.addline('public void %s() {' % progname.replace(' ','_'))
+            self.METHOD_NAME = progname.replace(' ','_')
+            self.addline('public void %s() {' % self.METHOD_NAME)
             self.TAB = '\t\t'
         else:
             self.MAIN_DONE = True
+            self.METHOD_NAME = 'run'
+        self.METHOD_PART = 1
+        self.METHOD_LINES = 0
         
     def ProgFinish(self, progname):
         self.spline_flush()
@@ -153,6 +191,10 @@ class RobotPost(object):
         
     def ProgSave(self, folder, progname, ask_user = False, show_result = False):
         self.TAB = ''
+        if len(self.SPLINE_ARRAYS) > 0:
+            self.PROG = self.PROG + SPLINE_DATA
+            for line in self.SPLINE_ARRAYS:
+                self.addline('\t' + line)
         self.addline('}')
         progname_base = getFileName(progname)
         progname = progname + '.' + self.PROG_EXT
@@ -210,16 +252,14 @@ class RobotPost(object):
         """Add a linear movement"""   
         self.TARGET_LIN_id = self.TARGET_LIN_id + 1
         targetname = ('TargetLIN_%i' % self.TARGET_LIN_id)        
-        framename = ('FrameLIN_%i' % self.TARGET_LIN_id)
         #self.addline('')
         #self.addline('getLogger().info("Move linear to %s");' % targetname)
         #self.addline('robot.move(lin(new Frame(%s)).setCartVelocity(%.2f).setBlendingCart(%.2f));' % (pose_2_str(poseabs), self.SPEED_MMS, self.BLENDING_MM))
         if pose is not None:
             poseabs = self.REF_FRAME*pose  
-            self.addline('Frame %s = new Frame(%s);' % (framename, pose_2_str(poseabs)))
             #self.addline('// LIN %s = lin(%s);' % (targetname, framename))    
             #self.addline('robot.move(%s);' % targetname)
-            self.spline_addbuffer(framename)
+            self.spline_addbuffer(pose_2_str(poseabs))
         else:
             # move linear by joints
             self.spline_flush()
@@ -283,20 +323,24 @@ class RobotPost(object):
     
     def setAcceleration(self, accel_mmss):
         """Changes the current robot acceleration"""
+        self.spline_flush()
         self.addline('// Warning: set linear acceleration to %.3f mm/ss has no effect' % accel_mmss)
         self.ACCEL_MMSS = accel_mmss
         
     def setSpeedJoints(self, speed_degs):
         """Changes the robot joint speed (in deg/s)"""        
+        self.spline_flush()
         self.SPEED_RADS = speed_degs*pi()/180.0
         self.addline('// Joint speed set to %.3f rad/s' % self.SPEED_RADS)
     
     def setAccelerationJoints(self, accel_degss):
         """Changes the robot joint acceleration (in deg/s2)"""
+        self.spline_flush()
         self.addline('// Warning: set angular acceleration to %.3f deg/s has no effect' % accel_degss)
         
     def setZoneData(self, zone_mm):
         """Changes the zone data approach (makes the movement more smooth)"""        
+        self.spline_flush()
         if zone_mm < 0:
             zone_mm = 0            
         self.BLENDING_MM = zone_mm
@@ -305,6 +349,7 @@ class RobotPost(object):
         
     def setDO(self, io_var, io_value):
         """Sets a variable (output) to a given value"""
+        self.spline_flush()
         if type(io_var) != str:  # set default variable name if io_var is a number
             io_var = 'OUT[%s]' % str(io_var)        
         if type(io_value) != str: # set default variable value if io_value is a number            
@@ -318,6 +363,7 @@ class RobotPost(object):
         
     def waitDI(self, io_var, io_value, timeout_ms=-1):
         """Waits for an input io_var to attain a given value io_value. Optionally, a timeout can be provided."""
+        self.spline_flush()
         if type(io_var) != str:  # set default variable name if io_var is a number
             io_var = 'IN[%s]' % str(io_var)        
         if type(io_value) != str: # set default variable value if io_value is a number            
@@ -355,22 +401,36 @@ class RobotPost(object):
     def addline(self, newline):
         """Add a program line"""
         self.PROG = self.PROG + self.TAB + newline + '\n'
+        self.METHOD_LINES = self.METHOD_LINES + 1
         
     def spline_addbuffer(self, frame):
-        self.SPLINE = self.SPLINE + ('spl(%s),' % frame)
-        self.SPLINE_COUNT = self.SPLINE_COUNT + 1
-        self.SPLINE_LAST_FRAME = frame
+        """Add a frame (string) to the current spline"""
+        self.SPLINE.append(frame)
+        if len(self.SPLINE) >= self.SPLINE_MAX_SEGMENTS:
+            self.spline_flush()
         
     def spline_flush(self):
-        if self.SPLINE_COUNT == 1:
-            self.addline('%s.move(lin(%s));' % (self.MOVE_OBJECT, self.SPLINE_LAST_FRAME))
-        elif self.SPLINE_COUNT > 1:
-            self.PROG = self.PROG + self.TAB + 'move_curve = new Spline(' + self.SPLINE[:-1] + ');\n'
-            self.PROG = self.PROG + self.TAB + ('%s.move(move_curve);\n' % self.MOVE_OBJECT)
+        """Output the buffered frames as a linear movement (one frame) or a Spline motion loaded from a static array"""
+        if len(self.SPLINE) == 1:
+            self.addline('%s.move(lin(new Frame(%s)));' % (self.MOVE_OBJECT, self.SPLINE[0]))
+        elif len(self.SPLINE) > 1:
+            self.SPLINE_ID = self.SPLINE_ID + 1
+            arrayname = 'SPLINE_%i' % self.SPLINE_ID
+            self.SPLINE_ARRAYS.append('private static final double[][] %s = loadFrames("%s");' % (arrayname, ';'.join(self.SPLINE)))
+            self.addline('%s.move(splineFrames(%s));' % (self.MOVE_OBJECT, arrayname))
+        
+        self.SPLINE = []
+        self.method_split()
         
-        self.SPLINE = ''
-        self.SPLINE_COUNT = 0
-        self.SPLINE_LAST_FRAME = ''
+    def method_split(self):
+        """Continue the program in a new method if the current method is too long"""
+        if self.METHOD_LINES < self.MAX_LINES_X_METHOD:
+            return
+        self.METHOD_PART = self.METHOD_PART + 1
+        method_next = '%s_part%i' % (self.METHOD_NAME, self.METHOD_PART)
+        self.addline('%s();' % method_next)
+        self.PROG = self.PROG + '\t}\n\t\n\tprivate void %s() {\n' % method_next
+        self.METHOD_LINES = 0
         
     def addlog(self, newline):
         """Add a log message"""
@@ -69,6 +69,9 @@ BAS(#BASE,0)
 PTP $AXIS_ACT ; skip BCO quickly
 '''
 
+# Row of the CSV file (one row per target, the columns are described after addline_csv)
+CSV_ROW = '%i;%.4f;%.4f;%.4f;%.4f;%.4f;%.4f;%i;%.3f;1;0;0;0;%i;%.4f'
+
 # ----------------------------------------------------
 def pose_2_str(pose):
     """Converts a pose target to a string"""
@@ -82,19 +85,13 @@ def pose_2_str_ext(pose,joints):
     if njoints <= 6:
         return pose_2_str(pose)
     else:     
-        extaxes = ''
-        for i in range(njoints-6):
-            extaxes = extaxes + (',E%i %.5f' % (i+1, joints[i+6]))
+        extaxes = ',' + format_values(joints[6:], '%.5f', ',', ['E%i ' % (i+1) for i in range(njoints-6)])
         return pose_2_str(pose) + extaxes
     
 def angles_2_str(angles):
     """Prints a joint target"""
-    str = ''
-    data = ['A1','A2','A3','A4','A5','A6','E1','E2','E3','E4','E5','E6']
-    for i in range(len(angles)):
-        str = str + ('%s %.5f,' % (data[i], angles[i]))
-    str = str[:-1]
-    return str
+    data = ['A1 ','A2 ','A3 ','A4 ','A5 ','A6 ','E1 ','E2 ','E3 ','E4 ','E5 ','E6 ']
+    return format_values(angles, '%.5f', ',', data)
 
 # ----------------------------------------------------    
 # Object class that handles the robot instructions/syntax
@@ -108,7 +105,7 @@ class RobotPost(object):
     PROG_FILES = []
     
     PROG = ''
-    PROG_CSV = []
+    PROG_CSV = None # CSVTargetWriter
     LOG = ''
     nAxes = 6
     E01 = 0
@@ -132,6 +129,7 @@ class RobotPost(object):
         self.ROBOT_POST = robotpost
         self.ROBOT_NAME = robotname
         self.PROG = ''
+        self.PROG_CSV = CSVTargetWriter(CSV_ROW)
         self.LOG = ''
         self.nAxes = robot_axes
         
@@ -154,6 +152,7 @@ class RobotPost(object):
                 filesave = filesave.name
                 filesave_csv = getFileDir(filesave) + '/' + progname_csv
             else:
+                self.PROG_CSV.close()
                 return
         else:
             filesave = folder + '/' + progname
@@ -161,13 +160,10 @@ class RobotPost(object):
         fid = open(filesave, "w")
         fid.write(self.PROG)
         fid.close()
-        fidcsv = open(filesave_csv, "w")
-        for line in self.PROG_CSV:
-            fidcsv.write(line)
-            fidcsv.write('\n')        
-        fidcsv.close()
+        self.PROG_CSV.save(filesave_csv)
         
         print('SAVED: %s\n' % filesave) # tell RoboDK the path of the saved file
+        print(self.PROG_CSV.report())
         self.PROG_FILES = filesave
         
         # open file with default application
@@ -360,8 +356,7 @@ class RobotPost(object):
         self.nLineCSV = self.nLineCSV + 1
         [x,y,z,r,p,w] = pose_2_xyzrpw(pose_csv)
         speed_time_desired = self.SPEED_MMS    
-        newline = '%i;%.4f;%.4f;%.4f;%.4f;%.4f;%.4f;%i;%.3f;1;0;0;0;%i;%.4f' % (self.nLineCSV, x,y,z,r,p,w, self.nLineCSV, speed_time_desired, self.TOOL_ID, self.E01)
-        self.PROG_CSV.append(newline)
+        self.PROG_CSV.add([self.nLineCSV, x,y,z,r,p,w, self.nLineCSV, speed_time_desired, self.TOOL_ID, self.E01])
         
 #1 Order of targets    
 #2,3,4,5,6,7: X,Y,Z,A,B,C-axis movements (coordinates relative to the workspace frame)
@@ -424,7 +419,7 @@ def test_post():
     robot.ProgFinish("Program")
     # robot.ProgSave(".","Program",True)
     print(robot.PROG)
-    print(robot.PROG_CSV)
+    print(robot.PROG_CSV.getvalue())
     if len(robot.LOG) > 0:
         mbox('Program generation LOG:\n\n' + robot.LOG)
 
@@ -69,6 +69,9 @@ BAS(#BASE,0)
 PTP $AXIS_ACT ; skip BCO quickly
 '''
 
+# Row of the CSV file (one row per target, the columns are described after addline_csv)
+CSV_ROW = '%i;%.4f;%.4f;%.4f;%.4f;%.4f;%.4f;%i;%.3f;1;0;0;0;%i;%.4f'
+
 # ----------------------------------------------------
 def pose_2_str(pose):
     """Converts a pose target to a string"""
@@ -82,19 +85,13 @@ def pose_2_str_ext(pose,joints):
     if njoints <= 6:
         return pose_2_str(pose)
     else:     
-        extaxes = ''
-        for i in range(njoints-6):
-            extaxes = extaxes + (',E%i %.5f' % (i+1, joints[i+6]))
+        extaxes = ',' + format_values(joints[6:], '%.5f', ',', ['E%i ' % (i+1) for i in range(njoints-6)])
         return pose_2_str(pose) + extaxes
     
 def angles_2_str(angles):
     """Prints a joint target"""
-    str = ''
-    data = ['A1','A2','A3','A4','A5','A6','E1','E2','E3','E4','E5','E6']
-    for i in range(len(angles)):
-        str = str + ('%s %.5f,' % (data[i], angles[i]))
-    str = str[:-1]
-    return str
+    data = ['A1 ','A2 ','A3 ','A4 ','A5 ','A6 ','E1 ','E2 ','E3 ','E4 ','E5 ','E6 ']
+    return format_values(angles, '%.5f', ',', data)
 
 # ----------------------------------------------------    
 # Object class that handles the robot instructions/syntax
@@ -106,7 +103,7 @@ class RobotPost(object):
     ROBOT_POST = ''
     ROBOT_NAME = ''    
     PROG = ''
-    PROG_CSV = ''
+    PROG_CSV = None # CSVTargetWriter
     LOG = ''
     nAxes = 6
     E01 = 0
@@ -118,8 +115,9 @@ class RobotPost(object):
     ACCEL_MMSS = 2000    
     TOOL_ID = 0
     FRAME_ID = 0
-    LAST_POSE_CSV = None
+    LAST_POINT_CSV = None # last [x,y,z] point written to the CSV file
     PROG_NAME_CSV = None
+    CYCLE_TIME = None # cycle time estimator (the estimated time is reported when the program is saved)
     
     #APO_VALUE = 1
     C_DIS = ''#' C_DIS'
@@ -130,10 +128,13 @@ class RobotPost(object):
         self.ROBOT_POST = robotpost
         self.ROBOT_NAME = robotname
         self.PROG = ''
+        self.PROG_CSV = CSVTargetWriter(CSV_ROW, process=self.csv_speeds)
         self.LOG = ''
         self.nAxes = robot_axes
+        self.CYCLE_TIME = CycleTimeEstimator(self.SPEED_MMS, self.ACCEL_MMSS)
         
     def ProgStart(self, progname):
+        self.CYCLE_TIME.ProgStart(progname)
         self.nProgs = self.nProgs + 1
         self.PROG_NAME_CSV = progname
         self.addline('DEF %s ( )' % progname)
@@ -144,6 +145,7 @@ class RobotPost(object):
         self.addline('END')
         
     def ProgSave(self, folder, progname, ask_user = False, show_result = False):
+        self.PROG_CSV.flush() # speed warnings are added to the program
         progname = progname + '.' + self.PROG_EXT
         progname_csv = self.PROG_NAME_CSV + '.csv'        
         if ask_user or not DirExists(folder):
@@ -152,6 +154,7 @@ class RobotPost(object):
                 filesave = filesave.name
                 filesave_csv = getFileDir(filesave) + '/' + progname_csv
             else:
+                self.PROG_CSV.close()
                 return
         else:
             filesave = folder + '/' + progname
@@ -159,11 +162,11 @@ class RobotPost(object):
         fid = open(filesave, "w")
         fid.write(self.PROG)
         fid.close()
-        fidcsv = open(filesave_csv, "w")
-        fidcsv.write(self.PROG_CSV)
-        fidcsv.close()
+        self.PROG_CSV.save(filesave_csv)
         
         print('SAVED: %s\n' % filesave) # tell RoboDK the path of the saved file
+        print(self.CYCLE_TIME.report())
+        print(self.PROG_CSV.report())
         
         # open file with default application
         if show_result:
@@ -184,10 +187,12 @@ class RobotPost(object):
         
     def MoveJ(self, pose, joints, conf_RLF=None):
         """Add a joint movement"""
+        self.CYCLE_TIME.MoveJ(pose, joints)
         self.addline('PTP {' + angles_2_str(joints) + '}' + self.C_PTP)
         
     def MoveL(self, pose, joints, conf_RLF=None):
         """Add a linear movement"""
+        self.CYCLE_TIME.MoveL(pose, joints)
         if self.nAxes > 6:
             self.E01 = joints[6]
             
@@ -203,6 +208,7 @@ class RobotPost(object):
     def MoveC(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
         """Add a circular movement"""
         if self.ProgCSV < 0:
+            self.CYCLE_TIME.MoveC(pose1, joints1, pose2, joints2)
             self.addline('CIRC {' + pose_2_str_ext(pose1,joints1) + '},{' + pose_2_str_ext(pose2,joints2) + '}' + self.C_DIS)
         else:
             self.addlog('Warning: Can not move circular inside a CSV file')
@@ -230,6 +236,7 @@ class RobotPost(object):
     def Pause(self, time_ms):
         """Pause the robot program"""
         if self.ProgCSV < 0:
+            self.CYCLE_TIME.Pause(time_ms)
             if time_ms <= 0:
                 self.addline('HALT')
             else:
@@ -239,6 +246,7 @@ class RobotPost(object):
         
     def setSpeed(self, speed_mms):
         """Changes the robot speed (in mm/s)"""
+        self.CYCLE_TIME.setSpeed(speed_mms)
         self.SPEED_MMS = speed_mms
         if self.ProgCSV < 0:
             self.addline('$VEL.CP = %.5f' % (speed_mms/1000.0))
@@ -246,6 +254,7 @@ class RobotPost(object):
     def setAcceleration(self, accel_mmss):
         """Changes the current robot acceleration"""
         if self.ProgCSV < 0:
+            self.CYCLE_TIME.setAcceleration(accel_mmss)
             self.ACCEL_MMSS = accel_mmss
             self.addline('$ACC.CP = %.5f' % (accel_mmss/1000.0))
         else:
@@ -253,6 +262,7 @@ class RobotPost(object):
                 
     def setSpeedJoints(self, speed_degs):
         """Changes the robot joint speed (in deg/s)"""
+        self.CYCLE_TIME.setSpeedJoints(speed_degs)
         if self.ProgCSV < 0:
             self.ACCEL_MMSS = accel_mmss
             self.addline('$VEL.ORI1 = %.5f' % speed_degs)
@@ -262,6 +272,7 @@ class RobotPost(object):
     
     def setAccelerationJoints(self, accel_degss):
         """Changes the robot joint acceleration (in deg/s2)"""
+        self.CYCLE_TIME.setAccelerationJoints(accel_degss)
         if self.ProgCSV < 0:
             self.ACCEL_MMSS = accel_mmss
             self.addline('$ACC.ORI1 = %.5f' % accel_degss)
@@ -297,6 +308,7 @@ class RobotPost(object):
         
     def waitDI(self, io_var, io_value, timeout_ms=-1):
         """Waits for an input io_var to attain a given value io_value. Optionally, a timeout can be provided."""
+        self.CYCLE_TIME.stop()
         if type(io_var) != str:  # set default variable name if io_var is a number
             io_var = '$IN[%s]' % str(io_var)        
         if type(io_value) != str: # set default variable value if io_value is a number            
@@ -324,6 +336,7 @@ class RobotPost(object):
     def RunCode(self, code, is_function_call = False):
         """Adds code or a function call"""
         if self.ProgCSV < 0:
+            self.CYCLE_TIME.stop()
             if is_function_call:
                 code = code.replace(' ','_')
                 if not code.endswith(')'):
@@ -346,51 +359,58 @@ class RobotPost(object):
             
 # ------------------ private ----------------------                
     def addline_csv(self, pose_csv):
-        def Calculate_Time(Dist, Vmax, Amax):
-            '''Calculate the time it takes to move a distance Dist at Amax acceleration and Vmax speed'''
-            tacc = Vmax/Amax;
-            Xacc = 0.5*Amax*tacc*tacc;
-            if Dist <= 2*Xacc:
-                # Vmax is not reached
-                tacc = sqrt(Dist/Amax)
-                Ttot = tacc*2
-            else:
-                # Vmax is reached
-                Xvmax = Dist - 2*Xacc
-                Tvmax = Xvmax/Vmax
-                Ttot = 2*tacc + Tvmax
-            return Ttot
-            
-        def Calculate_Speed(d, T, a):
-            '''Calculate the speed required to move a distance d in T seconds with constant acceleration a'''
-            warning_msg = ''
-            to_root = a*a*T*T - 4*d*a
-            if to_root <= 0:
-                Treal = Calculate_Time(d, self.SPEED_MMS_MAX, a)
-                warning_msg = 'Warning: Move %i will take %.3f s instead of %.3f s (increase acceleration to reach speed)' % (self.nLineCSV, Treal, T)
-                print(warning_msg)
-                return self.SPEED_MMS_MAX, warning_msg
-            else:
-                speed_set = 0.5*(a*T - sqrt(to_root))
-                if speed_set > self.SPEED_MMS_MAX:
-                    warning_msg = 'Warning: Max speed reached %.3f mm/s > %.3f mm/s for move %i, increase max speed to respect average speed' % (self.nLineCSV, speed_set, self.SPEED_MMS_MAX)
-                    print(warning_msg)
-                    speed_set = self.SPEED_MMS_MAX
-                return max(speed_set, 0.01), warning_msg
-    
+        # the speed column is set to the average speed when the block of rows is written (csv_speeds)
         self.nLineCSV = self.nLineCSV + 1
         [x,y,z,r,p,w] = pose_2_xyzrpw(pose_csv)
-        speed_time_desired = self.SPEED_MMS
-        if self.LAST_POSE_CSV is not None:
-            dist = norm(subs3(pose_csv.Pos(), self.LAST_POSE_CSV.Pos()))
-            time_desired = dist/self.SPEED_MMS
-            speed_time_desired, warning_msg = Calculate_Speed(dist, time_desired, self.ACCEL_MMSS)
-            if len(warning_msg) > 0:
-                self.PROG = self.PROG + '; ' + warning_msg + '\n'
-        self.LAST_POSE_CSV = pose_csv
+        self.PROG_CSV.add([self.nLineCSV, x,y,z,r,p,w, self.nLineCSV, self.SPEED_MMS, self.TOOL_ID, self.E01])
         
-        newline = '%i;%.4f;%.4f;%.4f;%.4f;%.4f;%.4f;%i;%.3f;1;0;0;0;%i;%.4f' % (self.nLineCSV, x,y,z,r,p,w, self.nLineCSV, speed_time_desired, self.TOOL_ID, self.E01)
-        self.PROG_CSV = self.PROG_CSV + newline + '\n'
+    def csv_speed(self, nline, d, speed):
+        """Returns the speed required to move a distance d in the time it takes at the average speed, with constant acceleration, and a warning message if it can not be respected"""
+        a = self.ACCEL_MMSS
+        T = d/speed
+        warning_msg = ''
+        to_root = a*a*T*T - 4*d*a
+        if to_root <= 0:
+            Treal = move_time(d, self.SPEED_MMS_MAX, a)
+            warning_msg = 'Warning: Move %i will take %.3f s instead of %.3f s (increase acceleration to reach speed)' % (nline, Treal, T)
+            return self.SPEED_MMS_MAX, warning_msg
+        else:
+            speed_set = 0.5*(a*T - sqrt(to_root))
+            if speed_set > self.SPEED_MMS_MAX:
+                warning_msg = 'Warning: Max speed reached %.3f mm/s > %.3f mm/s for move %i, increase max speed to respect average speed' % (speed_set, self.SPEED_MMS_MAX, nline)
+                speed_set = self.SPEED_MMS_MAX
+            return max(speed_set, 0.01), warning_msg
+            
+    def csv_speeds(self, rows):
+        """Sets the speed column of a block of CSV rows (see csv_speed). Blocks are calculated with array operations if numpy is available"""
+        distances = target_distances([row[1:4] for row in rows], self.LAST_POINT_CSV)
+        self.LAST_POINT_CSV = rows[-1][1:4]
+        i0 = 1 if distances[0] is None else 0
+        warnings = []
+        np = numpy_module()
+        if np is None or len(rows) - i0 < 8:
+            for i in range(i0, len(rows)):
+                rows[i][8], warning_msg = self.csv_speed(rows[i][0], distances[i], rows[i][8])
+                if len(warning_msg) > 0:
+                    warnings.append(warning_msg)
+        else:
+            a = self.ACCEL_MMSS
+            d = np.array(distances[i0:], dtype=float)
+            T = d/np.array([row[8] for row in rows[i0:]], dtype=float)
+            to_root = a*a*T*T - 4*d*a
+            speeds = np.maximum(0.5*(a*T - np.sqrt(np.maximum(to_root, 0))), 0.01)
+            limited = (to_root <= 0) | (speeds > self.SPEED_MMS_MAX)
+            speeds[limited] = self.SPEED_MMS_MAX
+            for i in np.nonzero(limited)[0].tolist():
+                row = rows[i0 + i]
+                warnings.append(self.csv_speed(row[0], distances[i0 + i], row[8])[1])
+            speeds = speeds.tolist()
+            for i in range(len(speeds)):
+                rows[i0 + i][8] = speeds[i]
+                
+        for warning_msg in warnings:
+            print(warning_msg)
+            self.PROG = self.PROG + '; ' + warning_msg + '\n'
 #1 Order of targets    
 #2,3,4,5,6,7: X,Y,Z,A,B,C-axis movements (coordinates relative to the workspace frame)
 #8 User Parameter[1], Order of CNC line (same as column 1 if no other subprograms are running)
@@ -404,6 +424,7 @@ class RobotPost(object):
         
     def addline(self, newline):
         """Add a program line"""
+        self.PROG_CSV.flush() # speed warnings of the previous targets go first
         self.PROG = self.PROG + newline + '\n'
         
     def addlog(self, newline):
@@ -452,7 +473,7 @@ def test_post():
     robot.ProgFinish("Program")
     # robot.ProgSave(".","Program",True)
     print(robot.PROG)
-    print(robot.PROG_CSV)
+    print(robot.PROG_CSV.getvalue())
     if len(robot.LOG) > 0:
         mbox('Program generation LOG:\n\n' + robot.LOG)
 
@@ -84,19 +84,13 @@ def pose_2_str_ext(pose,joints):
     if njoints <= 6:
         return pose_2_str(pose)
     else:     
-        extaxes = ''
-        for i in range(njoints-6):
-            extaxes = extaxes + (',E%i %.5f' % (i+1, joints[i+6]))
+        extaxes = ',' + format_values(joints[6:], '%.5f', ',', ['E%i ' % (i+1) for i in range(njoints-6)])
         return pose_2_str(pose) + extaxes
     
 def angles_2_str(angles):
     """Prints a joint target"""
-    str = ''
-    data = ['A1','A2','A3','A4','A5','A6','E1','E2','E3','E4','E5','E6']
-    for i in range(len(angles)):
-        str = str + ('%s %.5f,' % (data[i], angles[i]))
-    str = str[:-1]
-    return str
+    data = ['A1 ','A2 ','A3 ','A4 ','A5 ','A6 ','E1 ','E2 ','E3 ','E4 ','E5 ','E6 ']
+    return format_values(angles, '%.5f', ',', data)
     
 def conf_2_str(confRLF):
     if confRLF is None:
@@ -154,7 +148,7 @@ class RobotPost(object):
     VEL_PTP = 100 # speed in percentage
         
     PROG = ''
-    PROG_DAT = ''
+    PROG_DAT = [] # lines of the DAT file
     nPosDat = 0
     LOG = ''
     nAxes = 6
@@ -167,6 +161,8 @@ class RobotPost(object):
     ARC_Pgno = 108
     
     PROG_CALLS = []
+    PDAT = None # PDAT records shared by the joint movements with the same speed and zone
+    LDAT = None # LDAT records shared by the linear movements with the same speed and zone
     
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
         self.ROBOT_POST = robotpost
@@ -174,6 +170,9 @@ class RobotPost(object):
         self.PROG = ''
         self.LOG = ''
         self.nAxes = robot_axes
+        self.PROG_DAT = []
+        self.PDAT = DataRecords('DECL PDAT PPDAT%s={VEL %.3f,ACC 100.000,APO_DIST %.3f,APO_MODE #CPTP}')
+        self.LDAT = DataRecords('DECL LDAT LCPDAT%s={VEL %.5f,ACC 100.000,APO_DIST %.3f,APO_FAC 50.0000,ORI_TYP #VAR,CIRC_TYP #BASE,JERK_FAC 50.0000}')
         
     def ProgStart(self, progname):
         self.PROG_COUNT = self.PROG_COUNT + 1
@@ -221,7 +220,9 @@ class RobotPost(object):
         for prog_nm in self.PROG_CALLS:
             fid2.write("EXT %s()\n" % prog_nm)
         fid2.write('\n')
-        fid2.write(self.PROG_DAT)
+        for line in self.PROG_DAT:
+            fid2.write(line)
+            fid2.write('\n')
         fid2.write('\nENDDAT\n\n')
         fid2.close()
         print('SAVED: %s\n' % filesave_dat) # tell RoboDK the path of the saved file
@@ -253,6 +254,14 @@ class RobotPost(object):
         self.nPosDat = self.nPosDat + 1
         vname = '%i' % self.nPosDat
         
+        # Write DAT information ---------------------------
+        #DECL E6POS XP1={X 27.0236969,Y 1220.23962,Z 669.846619,A -90.0563354,B 53.4202652,C -178.565933,S 2,T 35,E1 0.0,E2 0.0,E3 0.0,E4 0.0,E5 0.0,E6 0.0}
+        #DECL FDAT FP1={TOOL_NO 1,BASE_NO 0,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}
+        #DECL PDAT PPDAT1={VEL 100.000,ACC 100.000,APO_DIST 100.000,GEAR_JERK 50.0000,EXAX_IGN 0}
+        self.addDAT('DECL E6AXIS XP%s={%s}' % (vname, angles_2_str(joints))) 
+        self.addDAT('DECL FDAT FP%s={TOOL_NO %i,BASE_NO %i,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}' % (vname, self.TOOL_ID, self.BASE_ID)) 
+        pname = self.PDAT.get((self.VEL_PTP, max(self.APO_VALUE,1)), self.PROG_DAT)
+        
         # Write SRC information ---------------------------
         #;FOLD PTP P1 Vel=70 % PDAT1 Tool[1]:graco_negra Base[0];%{PE}%R 8.3.42,%MKUKATPBASIS,%CMOVE,%VPTP,%P 1:PTP, 2:P1, 3:, 5:70, 7:PDAT1
         #;FOLD PTP P1 Vel=70 % PDAT1 Tool[1]:graco_negra Base[0];%{PE}%R 8.3.32,%MKUKATPBASIS,%CMOVE,%VPTP,%P 1:PTP, 2:P1, 3:, 5:70, 7:PDAT1        
@@ -266,27 +275,33 @@ class RobotPost(object):
         if self.APO_VALUE >= 0:
             str_cdis = 'C_PTP'
             str_cont = 'CONT '        
-        self.addline(';FOLD PTP P%s %sVel=%.0f %% PDAT%s Tool[%i] Base[%i];%%{PE}%%R 5.5.31,%%MKUKATPBASIS,%%CMOVE,%%VPTP,%%P 1:PTP, 2:P%s, 3:%s, 5:%.0f, 7:PDAT%s' % (vname, str_cont, self.VEL_PTP, vname, self.TOOL_ID, self.BASE_ID, vname, str_cdis, self.VEL_PTP, vname))
+        self.addline(';FOLD PTP P%s %sVel=%.0f %% PDAT%s Tool[%i] Base[%i];%%{PE}%%R 5.5.31,%%MKUKATPBASIS,%%CMOVE,%%VPTP,%%P 1:PTP, 2:P%s, 3:%s, 5:%.0f, 7:PDAT%s' % (vname, str_cont, self.VEL_PTP, pname, self.TOOL_ID, self.BASE_ID, vname, str_cdis, self.VEL_PTP, pname))
         self.addline('$BWDSTART=FALSE')
-        self.addline('PDAT_ACT=PPDAT%s' % vname)
+        self.addline('PDAT_ACT=PPDAT%s' % pname)
         self.addline('FDAT_ACT=FP%s' % vname)
         self.addline('BAS(#PTP_PARAMS,%.0f)' % self.VEL_PTP)
         self.addline('PTP XP%s%s' % (vname,self.C_PTP))
         self.addline(';ENDFOLD')	
         
-        # Write DAT information ---------------------------
-        #DECL E6POS XP1={X 27.0236969,Y 1220.23962,Z 669.846619,A -90.0563354,B 53.4202652,C -178.565933,S 2,T 35,E1 0.0,E2 0.0,E3 0.0,E4 0.0,E5 0.0,E6 0.0}
-        #DECL FDAT FP1={TOOL_NO 1,BASE_NO 0,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}
-        #DECL PDAT PPDAT1={VEL 100.000,ACC 100.000,APO_DIST 100.000,GEAR_JERK 50.0000,EXAX_IGN 0}
-        self.addDAT('DECL E6AXIS XP%s={%s}' % (vname, angles_2_str(joints))) 
-        self.addDAT('DECL FDAT FP%s={TOOL_NO %i,BASE_NO %i,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}' % (vname, self.TOOL_ID, self.BASE_ID)) 
-        self.addDAT('DECL PDAT PPDAT%s={VEL %.3f,ACC 100.000,APO_DIST %.3f,APO_MODE #CPTP}' % (vname, self.VEL_PTP, max(self.APO_VALUE,1)))        
-        
     def MoveL(self, pose, joints, conf_RLF=None):
         """Add a linear movement"""        
         self.nPosDat = self.nPosDat + 1
         vname = '%i' % self.nPosDat
         
+        # Write DAT information ---------------------------
+        #DECL E6POS XP56={X -293.060028,Y 165.117493,Z 18.0715256,A -64.8358612,B 39.9032936,C -161.694565,S 2,T 3,E1 0.0,E2 0.0,E3 0.0,E4 0.0,E5 0.0,E6 0.0}
+        #DECL FDAT FP56={TOOL_NO 1,BASE_NO 1,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}
+        #DECL LDAT LCPDAT37={VEL 2.00000,ACC 100.000,APO_DIST 100.000,APO_FAC 50.0000,AXIS_VEL 100.000,AXIS_ACC 100.000,ORI_TYP #VAR,CIRC_TYP #BASE,JERK_FAC 50.0000,GEAR_JERK 50.0000,EXAX_IGN 0}
+
+        # with arc information:
+        #DECL E6POS XP3={X 663.532104,Y -614.288025,Z 2346.43799,A 171.796906,B -55.8371086,C 6.86900616,S 0,T 14,E1 -2848.03809,E2 0.0,E3 0.0,E4 0.0,E5 0.0,E6 0.0}
+        #DECL FDAT FP3={TOOL_NO 1,BASE_NO 0,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}
+        #DECL LDAT LCPDAT2={VEL 2.0,ACC 100.0,APO_DIST 100.0,APO_FAC 50.0,ORI_TYP #VAR,CIRC_TYP #BASE,JERK_FAC 50.0}
+        #DECL WELD_FI MW1={PRG_NO 1,VELOCITY 0.109999999,WEAVFIG_MECH 1,WEAVLEN_MECH 6.0,WEAVAMP_MECH 7.0,WEAVANG_MECH 180.0,END_TIME 0.0149999997}
+        self.addDAT('DECL E6POS XP%s={%s}' % (vname, pose_2_str_ext(pose,joints))) 
+        self.addDAT('DECL FDAT FP%s={TOOL_NO %i,BASE_NO %i,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}' % (vname, self.TOOL_ID, self.BASE_ID)) 
+        lname = self.LDAT.get((self.speed_ms, max(self.APO_VALUE,1)), self.PROG_DAT)
+        
         # Write SRC information ---------------------------
         #;FOLD LIN P56 Vel=2 m/s CPDAT37 Tool[1]:graco_negra Base[1]:vol1;%{PE}%R 8.3.42,%MKUKATPBASIS,%CMOVE,%VLIN,%P 1:LIN, 2:P56, 3:, 5:2, 7:CPDAT37
         #$BWDSTART=FALSE
@@ -312,13 +327,13 @@ class RobotPost(object):
 
         wid = ''
         if not self.ARC_ON:
-            self.addline(';FOLD LIN P%s %sVel=%.3f m/s CPDAT%s Tool[%i] Base[%i];%%{PE}%%R 5.5.0,%%MKUKATPA20,%%CARC_SWI,%%VLIN,%%P 1:LIN, 2:P%s, 3:%s, 5:%.0f, 7:CPDAT%s' % (vname, str_cont, self.speed_ms, vname, self.TOOL_ID, self.BASE_ID, vname, str_cdis, self.speed_ms, vname))
+            self.addline(';FOLD LIN P%s %sVel=%.3f m/s CPDAT%s Tool[%i] Base[%i];%%{PE}%%R 5.5.0,%%MKUKATPA20,%%CARC_SWI,%%VLIN,%%P 1:LIN, 2:P%s, 3:%s, 5:%.0f, 7:CPDAT%s' % (vname, str_cont, self.speed_ms, lname, self.TOOL_ID, self.BASE_ID, vname, str_cdis, self.speed_ms, lname))
         else:
             self.nArcId = self.nArcId + 1
             wid = 'W%i' % self.nArcId            
-            self.addline(';FOLD LIN P%s  CPDAT%s ARC  Pgno= %i %s Tool[%i] Base[%i];%%{PE}%%R 5.5.0,%%MKUKATPBASIS,%%CMOVE,%%VLIN,%%P 1:LIN, 2:P%s, 3:%s, 5:%.0f, 7:CPDAT%s, 10:%i, 11:%s' % (vname, str_cont, self.ARC_Pgno, wid, self.TOOL_ID, self.BASE_ID, vname, str_cdis, self.speed_ms, vname, self.ARC_Pgno, wid))
+            self.addline(';FOLD LIN P%s  CPDAT%s ARC  Pgno= %i %s Tool[%i] Base[%i];%%{PE}%%R 5.5.0,%%MKUKATPBASIS,%%CMOVE,%%VLIN,%%P 1:LIN, 2:P%s, 3:%s, 5:%.0f, 7:CPDAT%s, 10:%i, 11:%s' % (vname, str_cont, self.ARC_Pgno, wid, self.TOOL_ID, self.BASE_ID, vname, str_cdis, self.speed_ms, lname, self.ARC_Pgno, wid))
         self.addline('$BWDSTART=FALSE')
-        self.addline('LDAT_ACT=LCPDAT%s' % vname)
+        self.addline('LDAT_ACT=LCPDAT%s' % lname)
         self.addline('FDAT_ACT=FP%s' % vname)
         if not self.ARC_ON:            
             self.addline('BAS(#CP_PARAMS,%.0f)' % self.speed_ms)           
@@ -329,19 +344,6 @@ class RobotPost(object):
         self.addline('LIN XP%s%s' % (vname,self.C_DIS))
         self.addline(';ENDFOLD')
         
-        # Write DAT information ---------------------------
-        #DECL E6POS XP56={X -293.060028,Y 165.117493,Z 18.0715256,A -64.8358612,B 39.9032936,C -161.694565,S 2,T 3,E1 0.0,E2 0.0,E3 0.0,E4 0.0,E5 0.0,E6 0.0}
-        #DECL FDAT FP56={TOOL_NO 1,BASE_NO 1,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}
-        #DECL LDAT LCPDAT37={VEL 2.00000,ACC 100.000,APO_DIST 100.000,APO_FAC 50.0000,AXIS_VEL 100.000,AXIS_ACC 100.000,ORI_TYP #VAR,CIRC_TYP #BASE,JERK_FAC 50.0000,GEAR_JERK 50.0000,EXAX_IGN 0}
-
-        # with arc information:
-        #DECL E6POS XP3={X 663.532104,Y -614.288025,Z 2346.43799,A 171.796906,B -55.8371086,C 6.86900616,S 0,T 14,E1 -2848.03809,E2 0.0,E3 0.0,E4 0.0,E5 0.0,E6 0.0}
-        #DECL FDAT FP3={TOOL_NO 1,BASE_NO 0,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}
-        #DECL LDAT LCPDAT2={VEL 2.0,ACC 100.0,APO_DIST 100.0,APO_FAC 50.0,ORI_TYP #VAR,CIRC_TYP #BASE,JERK_FAC 50.0}
-        #DECL WELD_FI MW1={PRG_NO 1,VELOCITY 0.109999999,WEAVFIG_MECH 1,WEAVLEN_MECH 6.0,WEAVAMP_MECH 7.0,WEAVANG_MECH 180.0,END_TIME 0.0149999997}
-        self.addDAT('DECL E6POS XP%s={%s}' % (vname, pose_2_str_ext(pose,joints))) 
-        self.addDAT('DECL FDAT FP%s={TOOL_NO %i,BASE_NO %i,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}' % (vname, self.TOOL_ID, self.BASE_ID)) 
-        self.addDAT('DECL LDAT LCPDAT%s={VEL %.5f,ACC 100.000,APO_DIST %.3f,APO_FAC 50.0000,ORI_TYP #VAR,CIRC_TYP #BASE,JERK_FAC 50.0000}' % (vname, self.speed_ms, max(self.APO_VALUE,1))) 
         if not self.ARC_ON:
             pass
         else:
@@ -492,7 +494,7 @@ class RobotPost(object):
         self.PROG = self.PROG + newline + '\n'
         
     def addDAT(self, newline):
-        self.PROG_DAT = self.PROG_DAT + newline + '\n'
+        self.PROG_DAT.append(newline)
         
     def addlog(self, newline):
         """Add a log message"""
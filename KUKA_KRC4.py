@@ -45,6 +45,13 @@
 # Import RoboDK tools
 from robodk import *
 
+# File header written at the beginning of each program file
+FILE_HEADER = '''&ACCESS RVP
+&REL 1
+&COMMENT Generated by RoboDK
+&PARAM TEMPLATE = C:\\KRC\\Roboter\\Template\\vorgabe
+&PARAM EDITMASK = *
+'''
 
 HEADER = ''';FOLD INI
 BAS (#INITMOV,0 )
@@ -91,19 +98,13 @@ def pose_2_str_ext(pose,joints):
     if njoints <= 6:
         return pose_2_str(pose)
     else:     
-        extaxes = ''
-        for i in range(njoints-6):
-            extaxes = extaxes + (',E%i %.5f' % (i+1, joints[i+6]))
+        extaxes = ',' + format_values(joints[6:], '%.5f', ',', ['E%i ' % (i+1) for i in range(njoints-6)])
         return pose_2_str(pose) + extaxes
     
 def angles_2_str(angles):
     """Prints a joint target"""
-    str = 'AXIS: '
-    data = ['A1','A2','A3','A4','A5','A6','E1','E2','E3','E4','E5','E6']
-    for i in range(len(angles)):
-        str = str + ('%s %.5f,' % (data[i], angles[i]))
-    str = str[:-1]
-    return str
+    data = ['A1 ','A2 ','A3 ','A4 ','A5 ','A6 ','E1 ','E2 ','E3 ','E4 ','E5 ','E6 ']
+    return 'AXIS: ' + format_values(angles, '%.5f', ',', data)
 
 # ----------------------------------------------------    
 # Object class that handles the robot instructions/syntax
@@ -111,7 +112,10 @@ class RobotPost(object):
     """Robot post object"""
     PROG_EXT = 'src'         # set the program extension
     MAX_LINES_X_PROG = 1400  # maximum number of lines per program. It will then generate multiple "pages (files)"
+    MAX_BYTES_X_PROG = 0     # maximum size of each program page in bytes (0 means no limit)
+    MAX_TARGETS_X_PROG = 0   # maximum number of targets per program page (0 means no limit)
     INCLUDE_SUB_PROGRAMS = True
+    INCREMENTAL = False      # only save the program files that changed since the last save and only send the files that changed since the last successful upload
     
     # other variables
     ROBOT_POST = ''
@@ -121,8 +125,9 @@ class RobotPost(object):
     PROG_NAME = 'unknown' # single program name
     PROG_NAMES = []
     PROG_FILES = []    
-    PROG_LIST = []
-    nLines = 0
+    PAGES = None # PageWriter: pages are written as soon as they are complete
+    MANIFEST = None
+    PAGER = None
     nProgs = 0
     
     PROG = ''
@@ -131,6 +136,9 @@ class RobotPost(object):
     APO_VALUE = 1
     C_DIS = ''#' C_DIS'
     C_PTP = ''#' C_PTP'
+    COLLINEAR_TOLERANCE = 0 # set the tolerance in mm to merge collinear linear movements (0 disables the filter)
+    COLLINEAR_TOLERANCE_DEG = 0.01 # set the orientation tolerance in deg to merge collinear linear movements
+    COLLINEAR_FILTER = None
     
     
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
@@ -139,14 +147,18 @@ class RobotPost(object):
         self.PROG = ''
         self.LOG = ''
         self.nAxes = robot_axes
+        self.PAGES = PageWriter(FILE_HEADER, self.PROG_EXT)
+        self.COLLINEAR_FILTER = CollinearFilter(self.add_movel, self.COLLINEAR_TOLERANCE, self.COLLINEAR_TOLERANCE_DEG)
         for k,v in kwargs.items():
             if k == 'lines_x_prog':
                 self.MAX_LINES_X_PROG = v       
+        self.PAGER = ProgramPager(self.MAX_LINES_X_PROG, self.MAX_BYTES_X_PROG, self.MAX_TARGETS_X_PROG, len(FILE_HEADER) + len('END\n'))
         
     def ProgStart(self, progname, new_page = False):
+        self.COLLINEAR_FILTER.reset()
         progname_i = progname
         if new_page:
-            nPages = len(self.PROG_LIST)
+            nPages = len(self.PAGES.index())
             if nPages == 0:
                 progname_i = progname
             else:
@@ -164,15 +176,17 @@ class RobotPost(object):
         self.addline('DEF %s ( )' % progname_i)
         if not new_page:
             self.PROG = self.PROG + HEADER
+            self.PAGER.add(HEADER, 0)
             if self.nAxes > 6:
                 self.addline('$ACT_EX_AX = %i' % (self.nAxes-6))    
         
     def ProgFinish(self, progname, new_page = False):        
+        self.COLLINEAR_FILTER.reset()
         if new_page:
             self.PROG = self.PROG + "END\n"
-            self.PROG_LIST.append(self.PROG)
+            self.PAGES.add(self.PROG_NAMES[-1], self.PROG)
             self.PROG = ''
-            self.nLines = 0
+            self.PAGER.reset()
         elif self.nProgs <= 1 or self.INCLUDE_SUB_PROGRAMS:
             self.PROG = self.PROG + "END\n"
         
@@ -186,18 +200,20 @@ class RobotPost(object):
                 return
         else:
             filesave = folder + '/' + progname
-        fid = open(filesave, "w")
-        fid.write("&ACCESS RVP\n")
-        fid.write("&REL 1\n")
-        fid.write("&COMMENT Generated by RoboDK\n")
-        fid.write("&PARAM TEMPLATE = C:\\KRC\\Roboter\\Template\\vorgabe\n")
-        fid.write("&PARAM EDITMASK = *\n")
-        fid.write(self.PROG)
-        fid.close()
+        if self.INCREMENTAL and self.MANIFEST is None:
+            # the manifest is named after the first file saved (the main program)
+            self.MANIFEST = PageManifest(getFileDir(filesave) + '/' + getFileName(filesave) + '.manifest')
+        if self.MANIFEST is None or self.MANIFEST.changed(filesave, FILE_HEADER + self.PROG):
+            fid = open(filesave, "w")
+            fid.write(FILE_HEADER)
+            fid.write(self.PROG)
+            fid.close()
         print('SAVED: %s\n' % filesave) # tell RoboDK the path of the saved file
         self.PROG_FILES.append(filesave)
+        self.openfile(filesave, show_result)
         
-        # open file with default application
+    def openfile(self, filesave, show_result):
+        """Open a saved file (see show_result in ProgSave)"""
         if show_result:
             if type(show_result) is str:
                 # Open file with provided application
@@ -216,57 +232,74 @@ class RobotPost(object):
                 mbox('Program generation LOG:\n\n' + self.LOG)
 
     def ProgSave(self, folder, progname, ask_user = False, show_result = False):
-        if len(self.PROG_LIST) >= 1:
-            if self.nLines > 0:
-                self.PROG_LIST.append(self.PROG)
+        if len(self.PAGES.index()) >= 1:
+            if self.PAGER.lines > 0:
+                self.PAGES.add(self.PROG_NAMES[-1], self.PROG)
                 self.PROG = ''
-                self.nLines = 0
+                self.PAGER.reset()
                 
-            npages = len(self.PROG_LIST)
+            # the main program calls the pages in order
             progname_main = progname + "Main"
-            mainprog = "DEF %s ( )\n" % progname_main
-            for i in range(npages):
-                self.PROG = self.PROG_LIST[i]
-                mainprog += "%s()\n" % self.PROG_NAMES[i]
-                
-            mainprog += "END\n"
-            self.PROG = mainprog
+            self.PROG = "DEF %s ( )\n%sEND\n" % (progname_main, ''.join(["%s()\n" % name for name in self.PAGES.index()]))
             self.progsave(folder, progname_main, ask_user, show_result)
             self.LOG = ''
             if len(self.PROG_FILES) == 0:
                 # cancelled by user
+                self.PAGES.close()
                 return
                 
             first_file = self.PROG_FILES[0]
             folder_user = getFileDir(first_file)
             # progname_user = getFileName(self.FILE_SAVED)
             
-            for i in range(npages):
-                self.PROG = self.PROG_LIST[i]
-                self.progsave(folder_user, self.PROG_NAMES[i], False, show_result)
+            for filesave, changed in self.PAGES.save(folder_user, self.MANIFEST):
+                print('SAVED: %s\n' % filesave) # tell RoboDK the path of the saved file
+                self.PROG_FILES.append(filesave)
+                self.openfile(filesave, show_result)
+                
+            print(self.PAGES.report())
                 
         else:
             self.progsave(folder, progname, ask_user, show_result)
             
+        if self.MANIFEST is not None:
+            self.MANIFEST.save()
+            
     def ProgSendRobot(self, robot_ip, remote_path, ftp_user, ftp_pass):
         """Send a program to the robot using the provided parameters. This method is executed right after ProgSave if we selected the option "Send Program to Robot".
         The connection parameters must be provided in the robot connection menu of RoboDK"""
-        UploadFTP(self.PROG_FILES, robot_ip, remote_path, ftp_user, ftp_pass)
+        if self.MANIFEST is not None:
+            # send the files that changed since the last successful upload only
+            files = self.MANIFEST.unsent(self.PROG_FILES)
+            if UploadFTP(files, robot_ip, remote_path, ftp_user, ftp_pass):
+                self.MANIFEST.set_sent(files)
+        else:
+            UploadFTP(self.PROG_FILES, robot_ip, remote_path, ftp_user, ftp_pass)
         
     def MoveJ(self, pose, joints, conf_RLF=None):
         """Add a joint movement"""
+        self.COLLINEAR_FILTER.reset()
         self.addline('PTP {' + angles_2_str(joints) + '}' + self.C_PTP)
+        self.PAGER.add_target()
         
     def MoveL(self, pose, joints, conf_RLF=None):
         """Add a linear movement"""
+        self.COLLINEAR_FILTER.MoveL(pose, joints, conf_RLF)
+        
+    def add_movel(self, pose, joints, conf_RLF=None):
+        """Output a linear movement (collinear movements are merged by COLLINEAR_FILTER)"""
         self.addline('LIN {' + pose_2_str_ext(pose,joints) + '}' + self.C_DIS)
+        self.PAGER.add_target()
         
     def MoveC(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
         """Add a circular movement"""
+        self.COLLINEAR_FILTER.reset()
         self.addline('CIRC {' + pose_2_str_ext(pose1,joints1) + '},{' + pose_2_str_ext(pose2,joints2) + '}' + self.C_DIS)
+        self.PAGER.add_target(2)
         
     def setFrame(self, pose, frame_id=None, frame_name=None):
         """Change the robot reference frame"""
+        self.COLLINEAR_FILTER.reset()
         if self.nAxes <= 6:
             self.addline('$BASE = {FRAME: ' + pose_2_str(pose) + '}')
         else:
@@ -276,10 +309,12 @@ class RobotPost(object):
         
     def setTool(self, pose, tool_id=None, tool_name=None):
         """Change the robot TCP"""
+        self.COLLINEAR_FILTER.reset()
         self.addline('$TOOL = {FRAME: ' + pose_2_str(pose) + '}')
         
     def Pause(self, time_ms):
         """Pause the robot program"""
+        self.COLLINEAR_FILTER.flush()
         if time_ms <= 0:
             self.addline('HALT')
         else:
@@ -287,24 +322,29 @@ class RobotPost(object):
         
     def setSpeed(self, speed_mms):
         """Changes the robot speed (in mm/s)"""
+        self.COLLINEAR_FILTER.flush()
         self.addline('$VEL.CP = %.5f' % (speed_mms/1000.0))
     
     def setAcceleration(self, accel_mmss):
         """Changes the current robot acceleration"""
+        self.COLLINEAR_FILTER.flush()
         self.addline('$ACC.CP = %.5f' % (accel_mmss/1000.0))
                 
     def setSpeedJoints(self, speed_degs):
         """Changes the robot joint speed (in deg/s)"""
+        self.COLLINEAR_FILTER.flush()
         self.addline('$VEL.ORI1 = %.5f' % speed_degs)
         self.addline('$VEL.ORI2 = %.5f' % speed_degs)
     
     def setAccelerationJoints(self, accel_degss):
         """Changes the robot joint acceleration (in deg/s2)"""
+        self.COLLINEAR_FILTER.flush()
         self.addline('$ACC.ORI1 = %.5f' % accel_degss)
         self.addline('$ACC.ORI2 = %.5f' % accel_degss)
         
     def setZoneData(self, zone_mm):
         """Changes the zone data approach (makes the movement more smooth)"""
+        self.COLLINEAR_FILTER.flush()
         self.APO_VALUE = zone_mm
         if zone_mm >= 0:
             self.addline('$APO.CPTP = %.3f' % zone_mm)
@@ -317,6 +357,7 @@ class RobotPost(object):
         
     def setDO(self, io_var, io_value):
         """Sets a variable (output) to a given value"""
+        self.COLLINEAR_FILTER.flush()
         if type(io_var) != str:  # set default variable name if io_var is a number
             io_var = '$OUT[%s]' % str(io_var)        
         if type(io_value) != str: # set default variable value if io_value is a number            
@@ -330,6 +371,7 @@ class RobotPost(object):
         
     def waitDI(self, io_var, io_value, timeout_ms=-1):
         """Waits for an input io_var to attain a given value io_value. Optionally, a timeout can be provided."""
+        self.COLLINEAR_FILTER.flush()
         if type(io_var) != str:  # set default variable name if io_var is a number
             io_var = '$IN[%s]' % str(io_var)        
         if type(io_value) != str: # set default variable value if io_value is a number            
@@ -342,20 +384,24 @@ class RobotPost(object):
         if timeout_ms < 0:
             self.addline('WAIT FOR (%s==%s)' % (io_var, io_value))
         else:
-            self.addline('START_TIMER:')
-            self.addline('$TIMER_STOP[1]=TRUE')
-            self.addline('$TIMER_FLAG[1]=FALSE')
-            self.addline('$TIMER[1]=%.3f' % (float(timeout_ms)*0.001))
-            self.addline('$TIMER_STOP[1]=FALSE')
-            self.addline('WAIT FOR (%s==%s OR $TIMER_FLAG[1])' % (io_var, io_value))
-            self.addline('$TIMER_STOP[1]=TRUE')
-            self.addline('IF $TIMER_FLAG[1]== TRUE THEN')
-            self.addline('    HALT ; Timed out!')
-            self.addline('    GOTO START_TIMER')
-            self.addline('ENDIF')      
+            # the timeout construct must remain in the same page (GOTO START_TIMER)
+            block = []
+            block.append('START_TIMER:')
+            block.append('$TIMER_STOP[1]=TRUE')
+            block.append('$TIMER_FLAG[1]=FALSE')
+            block.append('$TIMER[1]=%.3f' % (float(timeout_ms)*0.001))
+            block.append('$TIMER_STOP[1]=FALSE')
+            block.append('WAIT FOR (%s==%s OR $TIMER_FLAG[1])' % (io_var, io_value))
+            block.append('$TIMER_STOP[1]=TRUE')
+            block.append('IF $TIMER_FLAG[1]== TRUE THEN')
+            block.append('    HALT ; Timed out!')
+            block.append('    GOTO START_TIMER')
+            block.append('ENDIF')
+            self.addblock(block)
         
     def RunCode(self, code, is_function_call = False):
         """Adds code or a function call"""
+        self.COLLINEAR_FILTER.flush()
         if is_function_call:
             code.replace(' ','_')
             if not code.endswith(')'):
@@ -366,6 +412,7 @@ class RobotPost(object):
         
     def RunMessage(self, message, iscomment = False):
         """Add a joint movement"""
+        self.COLLINEAR_FILTER.flush()
         if iscomment:
             self.addline('; ' + message)
         else:
@@ -379,13 +426,28 @@ class RobotPost(object):
         if self.nProgs > 1 and not self.INCLUDE_SUB_PROGRAMS:
             return
         
-        if self.nLines > self.MAX_LINES_X_PROG:
-            self.nLines = 0
+        if self.PAGER.full(newline):
+            self.PAGER.reset()
             self.ProgFinish(self.PROG_NAME, True)
             self.ProgStart(self.PROG_NAME, True)
 
         self.PROG = self.PROG + newline + '\n'
-        self.nLines = self.nLines + 1
+        self.PAGER.add(newline)
+        
+    def addblock(self, lines):
+        """Add a block of program lines that must remain in the same page"""
+        if self.nProgs > 1 and not self.INCLUDE_SUB_PROGRAMS:
+            return
+            
+        if self.PAGER.full('\n'.join(lines), len(lines)):
+            self.PAGER.reset()
+            self.ProgFinish(self.PROG_NAME, True)
+            self.ProgStart(self.PROG_NAME, True)
+            
+        self.PAGER.block_start()
+        for line in lines:
+            self.addline(line)
+        self.PAGER.block_end()
         
     def addlog(self, newline):
         """Add a log message"""
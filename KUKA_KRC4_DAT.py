@@ -91,19 +91,13 @@ def pose_2_str_ext(pose,joints):
     if njoints <= 6:
         return pose_2_str(pose)
     else:     
-        extaxes = ''
-        for i in range(njoints-6):
-            extaxes = extaxes + (',E%i %.5f' % (i+1, joints[i+6]))
+        extaxes = ',' + format_values(joints[6:], '%.5f', ',', ['E%i ' % (i+1) for i in range(njoints-6)])
         return pose_2_str(pose) + extaxes
     
 def angles_2_str(angles):
     """Prints a joint target"""
-    str = 'AXIS: '
-    data = ['A1','A2','A3','A4','A5','A6','E1','E2','E3','E4','E5','E6']
-    for i in range(len(angles)):
-        str = str + ('%s %.5f,' % (data[i], angles[i]))
-    str = str[:-1]
-    return str
+    data = ['A1 ','A2 ','A3 ','A4 ','A5 ','A6 ','E1 ','E2 ','E3 ','E4 ','E5 ','E6 ']
+    return 'AXIS: ' + format_values(angles, '%.5f', ',', data)
     
 def conf_2_str(confRLF):
     if confRLF is None:
@@ -161,13 +155,16 @@ class RobotPost(object):
     VEL_PTP = 100 # speed in percentage
     
     PROG = ''
-    PROG_DAT = ''
+    PROG_DAT = [] # lines of the DAT file
     nPosDat = 0
     LOG = ''
     nAxes = 6
     APO_VALUE = -1 # set to one for smooth path
     C_DIS = ' C_DIS'
     C_PTP = ' C_PTP'    
+    TEMPLATES = None # movement line templates with the speed, zone, tool and base already formatted
+    PDAT = None # PDAT records shared by the joint movements with the same speed and zone
+    LDAT = None # LDAT records shared by the linear movements with the same speed and zone
     
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
         self.ROBOT_POST = robotpost
@@ -175,6 +172,10 @@ class RobotPost(object):
         self.PROG = ''
         self.LOG = ''
         self.nAxes = robot_axes
+        self.TEMPLATES = LineTemplates()
+        self.PROG_DAT = []
+        self.PDAT = DataRecords('DECL PDAT PPDAT%s={VEL %.3f,ACC 100.000,APO_DIST %.3f,GEAR_JERK 50.0000,EXAX_IGN 0}')
+        self.LDAT = DataRecords('DECL LDAT LCPDAT%s={VEL %.5f,ACC 100.000,APO_DIST %.3f,APO_FAC 50.0000,AXIS_VEL 100.000,AXIS_ACC 100.000,ORI_TYP #VAR,CIRC_TYP #BASE,JERK_FAC 50.0000,GEAR_JERK 50.0000,EXAX_IGN 0}')
         
     def ProgStart(self, progname):
         self.PROG_COUNT = self.PROG_COUNT + 1
@@ -215,7 +216,9 @@ class RobotPost(object):
         fid2.write("&PARAM TEMPLATE = C:\\KRC\\Roboter\\Template\\vorgabe\n")
         fid2.write("&PARAM EDITMASK = *\n")
         fid2.write('DEFDAT  %s\n\n' % self.PROG_NAME)
-        fid2.write(self.PROG_DAT)
+        for line in self.PROG_DAT:
+            fid2.write(line)
+            fid2.write('\n')
         fid2.write('\nENDDAT\n\n')
         fid2.close()
         print('SAVED: %s\n' % filesave_dat) # tell RoboDK the path of the saved file
@@ -247,6 +250,14 @@ class RobotPost(object):
         self.nPosDat = self.nPosDat + 1
         vname = '%i' % self.nPosDat
         
+        # Write DAT information ---------------------------
+        #DECL E6POS XP1={X 27.0236969,Y 1220.23962,Z 669.846619,A -90.0563354,B 53.4202652,C -178.565933,S 2,T 35,E1 0.0,E2 0.0,E3 0.0,E4 0.0,E5 0.0,E6 0.0}
+        #DECL FDAT FP1={TOOL_NO 1,BASE_NO 0,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}
+        #DECL PDAT PPDAT1={VEL 100.000,ACC 100.000,APO_DIST 100.000,GEAR_JERK 50.0000,EXAX_IGN 0}
+        self.addDAT('DECL E6AXIS XP%s={%s}' % (vname, angles_2_str(joints))) 
+        self.addDAT(self.TEMPLATES.get('FDAT', 'DECL FDAT FP%s={TOOL_NO %i,BASE_NO %i,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}', [None, self.TOOL_ID, self.BASE_ID]) % vname)
+        pname = self.PDAT.get((self.VEL_PTP, max(self.APO_VALUE,1)), self.PROG_DAT)
+        
         # Write SRC information ---------------------------
         #;FOLD PTP P1 Vel=70 % PDAT1 Tool[1]:graco_negra Base[0];%{PE}%R 8.3.42,%MKUKATPBASIS,%CMOVE,%VPTP,%P 1:PTP, 2:P1, 3:, 5:70, 7:PDAT1
         #;FOLD PTP P1 Vel=70 % PDAT1 Tool[1]:graco_negra Base[0];%{PE}%R 8.3.32,%MKUKATPBASIS,%CMOVE,%VPTP,%P 1:PTP, 2:P1, 3:, 5:70, 7:PDAT1        
@@ -260,27 +271,29 @@ class RobotPost(object):
         if self.APO_VALUE >= 0:
             str_cdis = 'C_PTP'
             str_cont = 'CONT '        
-        self.addline(';FOLD PTP P%s %sVel=%.0f %% PDAT%s Tool[%i] Base[%i];%%{PE}%%R 8.3.42,%%MKUKATPBASIS,%%CMOVE,%%VPTP,%%P 1:PTP, 2:P%s, 3:%s, 5:%.0f, 7:PDAT%s' % (vname, str_cont, self.VEL_PTP, vname, self.TOOL_ID, self.BASE_ID, vname, str_cdis, self.VEL_PTP, vname))
+        template = self.TEMPLATES.get('PTP', ';FOLD PTP P%s %sVel=%.0f %% PDAT%s Tool[%i] Base[%i];%%{PE}%%R 8.3.42,%%MKUKATPBASIS,%%CMOVE,%%VPTP,%%P 1:PTP, 2:P%s, 3:%s, 5:%.0f, 7:PDAT%s', [None, str_cont, self.VEL_PTP, None, self.TOOL_ID, self.BASE_ID, None, str_cdis, self.VEL_PTP, None])
+        self.addline(template % (vname, pname, vname, pname))
         self.addline('$BWDSTART=FALSE')
-        self.addline('PDAT_ACT=PPDAT%s' % vname)
+        self.addline('PDAT_ACT=PPDAT%s' % pname)
         self.addline('FDAT_ACT=FP%s' % vname)
         self.addline('BAS(#PTP_PARAMS,%.0f)' % self.VEL_PTP)
         self.addline('PTP XP%s%s' % (vname,self.C_PTP))
         self.addline(';ENDFOLD')	
         
-        # Write DAT information ---------------------------
-        #DECL E6POS XP1={X 27.0236969,Y 1220.23962,Z 669.846619,A -90.0563354,B 53.4202652,C -178.565933,S 2,T 35,E1 0.0,E2 0.0,E3 0.0,E4 0.0,E5 0.0,E6 0.0}
-        #DECL FDAT FP1={TOOL_NO 1,BASE_NO 0,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}
-        #DECL PDAT PPDAT1={VEL 100.000,ACC 100.000,APO_DIST 100.000,GEAR_JERK 50.0000,EXAX_IGN 0}
-        self.addDAT('DECL E6AXIS XP%s={%s}' % (vname, angles_2_str(joints))) 
-        self.addDAT('DECL FDAT FP%s={TOOL_NO %i,BASE_NO %i,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}' % (vname, self.TOOL_ID, self.BASE_ID)) 
-        self.addDAT('DECL PDAT PPDAT%s={VEL %.3f,ACC 100.000,APO_DIST %.3f,GEAR_JERK 50.0000,EXAX_IGN 0}' % (vname, self.VEL_PTP, max(self.APO_VALUE,1)))        
-        
     def MoveL(self, pose, joints, conf_RLF=None):
         """Add a linear movement"""        
         self.nPosDat = self.nPosDat + 1
         vname = '%i' % self.nPosDat
         
+        # Write DAT information ---------------------------
+        #DECL E6POS XP56={X -293.060028,Y 165.117493,Z 18.0715256,A -64.8358612,B 39.9032936,C -161.694565,S 2,T 3,E1 0.0,E2 0.0,E3 0.0,E4 0.0,E5 0.0,E6 0.0}
+        #DECL FDAT FP56={TOOL_NO 1,BASE_NO 1,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}
+        #DECL LDAT LCPDAT37={VEL 2.00000,ACC 100.000,APO_DIST 100.000,APO_FAC 50.0000,AXIS_VEL 100.000,AXIS_ACC 100.000,ORI_TYP #VAR,CIRC_TYP #BASE,JERK_FAC 50.0000,GEAR_JERK 50.0000,EXAX_IGN 0}
+        self.addDAT('DECL E6POS XP%s={%s}' % (vname, pose_2_str_ext(pose,joints))) 
+        #self.addDAT('DECL E6POS XP%s={%s, S %s, T %s}' % (vname,pose_2_str_ext(pose,joints),conf_2_str(conf_RLF),joints_2_turn_str(joints)))
+        self.addDAT(self.TEMPLATES.get('FDAT', 'DECL FDAT FP%s={TOOL_NO %i,BASE_NO %i,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}', [None, self.TOOL_ID, self.BASE_ID]) % vname)
+        lname = self.LDAT.get((self.speed_ms, max(self.APO_VALUE,1)), self.PROG_DAT)
+        
         # Write SRC information ---------------------------
         #;FOLD LIN P56 Vel=2 m/s CPDAT37 Tool[1]:graco_negra Base[1]:vol1;%{PE}%R 8.3.42,%MKUKATPBASIS,%CMOVE,%VLIN,%P 1:LIN, 2:P56, 3:, 5:2, 7:CPDAT37
         #$BWDSTART=FALSE
@@ -294,29 +307,22 @@ class RobotPost(object):
             str_cdis = 'C_DIS'
             str_cont = 'CONT '
             
-        self.addline(';FOLD LIN P%s %sVel=%.0f m/s CPDAT%s Tool[%i] Base[%i];%%{PE}%%R 8.3.42,%%MKUKATPBASIS,%%CMOVE,%%VLIN,%%P 1:LIN, 2:P%s, 3:%s, 5:%.0f, 7:CPDAT%s' % (vname, str_cont, self.speed_ms, vname, self.TOOL_ID, self.BASE_ID, vname, str_cdis, self.speed_ms, vname))
+        template = self.TEMPLATES.get('LIN', ';FOLD LIN P%s %sVel=%.0f m/s CPDAT%s Tool[%i] Base[%i];%%{PE}%%R 8.3.42,%%MKUKATPBASIS,%%CMOVE,%%VLIN,%%P 1:LIN, 2:P%s, 3:%s, 5:%.0f, 7:CPDAT%s', [None, str_cont, self.speed_ms, None, self.TOOL_ID, self.BASE_ID, None, str_cdis, self.speed_ms, None])
+        self.addline(template % (vname, lname, vname, lname))
         self.addline('$BWDSTART=FALSE')
-        self.addline('LDAT_ACT=LCPDAT%s' % vname)
+        self.addline('LDAT_ACT=LCPDAT%s' % lname)
         self.addline('FDAT_ACT=FP%s' % vname)
         self.addline('BAS(#CP_PARAMS,%.0f)' % self.speed_ms)
         self.addline('LIN XP%s%s' % (vname,self.C_DIS))
         self.addline(';ENDFOLD')
         
-        # Write DAT information ---------------------------
-        #DECL E6POS XP56={X -293.060028,Y 165.117493,Z 18.0715256,A -64.8358612,B 39.9032936,C -161.694565,S 2,T 3,E1 0.0,E2 0.0,E3 0.0,E4 0.0,E5 0.0,E6 0.0}
-        #DECL FDAT FP56={TOOL_NO 1,BASE_NO 1,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}
-        #DECL LDAT LCPDAT37={VEL 2.00000,ACC 100.000,APO_DIST 100.000,APO_FAC 50.0000,AXIS_VEL 100.000,AXIS_ACC 100.000,ORI_TYP #VAR,CIRC_TYP #BASE,JERK_FAC 50.0000,GEAR_JERK 50.0000,EXAX_IGN 0}
-        self.addDAT('DECL E6POS XP%s={%s}' % (vname, pose_2_str_ext(pose,joints))) 
-        #self.addDAT('DECL E6POS XP%s={%s, S %s, T %s}' % (vname,pose_2_str_ext(pose,joints),conf_2_str(conf_RLF),joints_2_turn_str(joints)))
-        self.addDAT('DECL FDAT FP%s={TOOL_NO %i,BASE_NO %i,IPO_FRAME #BASE,POINT2[] " ",TQ_STATE FALSE}' % (vname, self.TOOL_ID, self.BASE_ID)) 
-        self.addDAT('DECL LDAT LCPDAT%s={VEL %.5f,ACC 100.000,APO_DIST %.3f,APO_FAC 50.0000,AXIS_VEL 100.000,AXIS_ACC 100.000,ORI_TYP #VAR,CIRC_TYP #BASE,JERK_FAC 50.0000,GEAR_JERK 50.0000,EXAX_IGN 0}' % (vname, self.speed_ms, max(self.APO_VALUE,1))) 
-        
     def MoveC(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
         """Add a circular movement"""
         self.addline('CIRC {' + pose_2_str_ext(pose1,joints1) + '},{' + pose_2_str_ext(pose2,joints2) + '}' + self.C_DIS)
         
     def setFrame(self, pose, frame_id=None, frame_name=None):
         """Change the robot reference frame"""
+        self.TEMPLATES.reset()
         if frame_name is not None and frame_name.endswith("Base"): # robot base frame
             frame_id = 0
             self.BASE_ID = frame_id
@@ -330,6 +336,7 @@ class RobotPost(object):
         
     def setTool(self, pose, tool_id=None, tool_name=None):
         """Change the robot TCP"""
+        self.TEMPLATES.reset()
         if tool_id is not None and tool_id >= 0:
             self.TOOL_ID = tool_id
             self.addline('TOOL_DATA[%i] = {FRAME: %s}' % (self.TOOL_ID, pose_2_str(pose)))
@@ -348,6 +355,7 @@ class RobotPost(object):
     def setSpeed(self, speed_mms):
         """Changes the robot speed (in mm/s)"""
         self.speed_ms = speed_mms/1000.0
+        self.TEMPLATES.reset()
         self.addline('$VEL.CP = %.5f' % (self.speed_ms))
     
     def setAcceleration(self, accel_mmss):
@@ -370,6 +378,7 @@ class RobotPost(object):
     def setZoneData(self, zone_mm):
         """Changes the zone data approach (makes the movement more smooth)"""
         self.APO_VALUE = zone_mm
+        self.TEMPLATES.reset()
         if zone_mm >= 0:
             self.addline('$APO.CPTP = %.3f' % zone_mm)
             self.addline('$APO.CDIS = %.3f' % zone_mm)
@@ -443,7 +452,7 @@ class RobotPost(object):
         self.PROG = self.PROG + newline + '\n'
         
     def addDAT(self, newline):
-        self.PROG_DAT = self.PROG_DAT + newline + '\n'
+        self.PROG_DAT.append(newline)
         
     def addlog(self, newline):
         """Add a log message"""
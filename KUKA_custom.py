@@ -103,12 +103,8 @@ def pose_2_str_ext(pose,joints):
     
 def angles_2_str(angles):
     """Contverts a joint target to a string"""
-    str = ''
-    data = ['A1','A2','A3','A4','A5','A6','E1','E2','E3','E4','E5','E6']
-    for i in range(len(angles)):
-        str = str + ('%s %.5f,' % (data[i], angles[i]))
-    str = str[:-1]
-    return str
+    data = ['A1 ','A2 ','A3 ','A4 ','A5 ','A6 ','E1 ','E2 ','E3 ','E4 ','E5 ','E6 ']
+    return format_values(angles, '%.5f', ',', data)
 
 # ----------------------------------------------------    
 # Object class that handles the robot instructions/syntax
@@ -56,7 +56,7 @@ def pose_2_str(pose,joints=None,reference=None):
     
 def joints_2_str(joints):
     """Contverts a joint target to a string"""
-    return '[%s]' % (', '.join(format(ji, ".5f") for ji in joints))
+    return '[%s]' % format_values(joints, '%.5f', ', ')
 
 # ----------------------------------------------------    
 # Object class that handles the robot instructions/syntax
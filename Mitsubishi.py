@@ -70,11 +70,10 @@ class RobotPost(object):
     ROBOT_NAME = ''
     PROG_FILES = []
     
-    PROG = ''
+    PROG = NumberedLines('%d %s') # program lines (numbered when the program is saved)
     LOG = ''
     FOOTER = ''
     STRUCT_FLAG = '(7,0)'
-    lineno = 0
     nAxes = 6
     nTargets = 0
     POSE_LAST = None
@@ -84,7 +83,7 @@ class RobotPost(object):
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
         self.ROBOT_POST = robotpost
         self.ROBOT_NAME = robotname
-        self.PROG = ''
+        self.PROG = NumberedLines('%d %s')
         self.LOG = ''
         self.nAxes = robot_axes
         
@@ -106,7 +105,7 @@ class RobotPost(object):
         else:
             filesave = folder + '/' + progname
         fid = open(filesave, "w")
-        fid.write(self.PROG)
+        fid.write(self.PROG.text())
         fid.write(self.FOOTER)
         fid.close()
         print('SAVED: %s\n' % filesave)
@@ -256,8 +255,7 @@ class RobotPost(object):
 # ------------------ private ----------------------                
     def addline(self, newline):
         """Add a program line"""
-        self.lineno += 1
-        self.PROG += '%d %s' % (self.lineno, newline) + '\n'
+        self.PROG.add(newline)
         
     def addlog(self, newline):
         """Add a log message"""
@@ -308,7 +306,7 @@ def test_post():
     robot.MoveJ(None, [-46.18419, -6.77518, -20.54925, 71.38674, 49.58727, -302.54752] )
     robot.ProgFinish("Program")
     # robot.ProgSave(".","Program",True)
-    print(robot.PROG)
+    print(robot.PROG.text())
     print(robot.FOOTER)
     if len(robot.LOG) > 0:
         mbox('Program generation LOG:\n\n' + robot.LOG)
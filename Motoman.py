@@ -109,6 +109,7 @@ class RobotPost(object):
     
     PROG = []     # Save the program lines
     PROG_TARGETS = []  # Save the program lines (targets section)
+    PULSES_RUN = []    # Joint targets not added to PROG_TARGETS yet (converted to pulses all at once)
     LOG = '' # Save a log
     
     nAxes = 6 # Important: This is usually provided by RoboDK automatically. Otherwise, override the __init__ procedure. 
@@ -126,6 +127,9 @@ class RobotPost(object):
     POSE_FRAME = eye(4)
     POSE_FRAME = eye(4)
     LAST_CONFDATA = [None, None, None, None] # [pulses(None, Pulses(0), Cartesian) ,  base(or None), tool, config]
+    COLLINEAR_TOLERANCE = 0 # set the tolerance in mm to merge collinear linear movements (0 disables the filter)
+    COLLINEAR_TOLERANCE_DEG = 0.01 # set the orientation tolerance in deg to merge collinear linear movements
+    COLLINEAR_FILTER = None
     
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
         if self.DONT_USE_MFRAME:
@@ -134,7 +138,9 @@ class RobotPost(object):
         self.ROBOT_NAME = robotname
         self.nAxes = robot_axes
         self.PROG = []
+        self.PULSES_RUN = []
         self.LOG = ''
+        self.COLLINEAR_FILTER = CollinearFilter(self.add_movel, self.COLLINEAR_TOLERANCE, self.COLLINEAR_TOLERANCE_DEG)
         #for k,v in kwargs.iteritems(): # python2
         for k,v in kwargs.items():
             if k == 'lines_x_prog':
@@ -154,6 +160,7 @@ class RobotPost(object):
 
                 
     def ProgStart(self, progname, new_page = False):
+        self.COLLINEAR_FILTER.reset()
         progname = get_safe_name(progname)
         progname_i = progname
         if new_page:
@@ -181,6 +188,7 @@ class RobotPost(object):
         self.PROG_NAMES.append(progname_i)
         
     def ProgFinish(self, progname, new_page = False):
+        self.COLLINEAR_FILTER.reset()
         progname = get_safe_name(progname)
         if not new_page:
             # Reset page count
@@ -217,17 +225,10 @@ class RobotPost(object):
         #if self.HAS_TURNTABLE:
         #    header = header + '/APPL' + '\n'
         
-        self.PROG.insert(0, header_ins)
-        self.PROG.append('END')
+        self.flush_pulses()
         
-        self.PROG_TARGETS.insert(0, header)
-        
-        self.PROG = self.PROG_TARGETS + self.PROG
-        
-        
-        
-        # Save PROG in PROG_LIST
-        self.PROG_LIST.append(self.PROG)
+        # Save PROG in PROG_LIST: the targets are written before the instructions when the program is saved
+        self.PROG_LIST.append(ProgramPage([[header], self.PROG_TARGETS, [header_ins], self.PROG, ['END']]))
         self.PROG = []
         self.PROG_TARGETS = []
         self.LINE_COUNT = 0
@@ -335,6 +336,7 @@ class RobotPost(object):
         
     def MoveJ(self, pose, joints, conf_RLF=None):
         """Add a joint movement"""
+        self.COLLINEAR_FILTER.reset()
         self.page_size_control() # Important to control the maximum lines per program and not save last target on new program
         target_id = self.add_target_joints(joints)
         self.addline("MOVJ C%05d %s%s" % (target_id, self.STR_VJ, self.STR_PL))                    
@@ -342,6 +344,10 @@ class RobotPost(object):
         
     def MoveL(self, pose, joints, conf_RLF=None):
         """Add a linear movement"""        
+        self.COLLINEAR_FILTER.MoveL(pose, joints, conf_RLF)
+        
+    def add_movel(self, pose, joints, conf_RLF=None):
+        """Output a linear movement (collinear movements are merged by COLLINEAR_FILTER)"""
         #if self.LAST_POSE is not None and pose is not None:
         #    # Skip adding a new movement if the new position is the same as the last one
         #    if distance(pose.Pos(), self.LAST_POSE.Pos()) < 0.1 and pose_angle_between(pose, self.LAST_POSE) < 0.1:
@@ -359,6 +365,7 @@ class RobotPost(object):
         
     def MoveC(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
         """Add a circular movement"""
+        self.COLLINEAR_FILTER.reset()
         self.page_size_control() # Important to control the maximum lines per program and not save last target on new program
         
         if self.LAST_POSE is not None:
@@ -375,6 +382,7 @@ class RobotPost(object):
         
     def setFrame(self, pose, frame_id, frame_name):
         """Change the robot reference frame"""
+        self.COLLINEAR_FILTER.reset()
         xyzwpr = Pose_2_Motoman(pose)
         if self.DONT_USE_MFRAME:
             self.ACTIVE_FRAME = None
@@ -403,6 +411,7 @@ class RobotPost(object):
         
     def setTool(self, pose, tool_id, tool_name):
         """Change the robot TCP"""
+        self.COLLINEAR_FILTER.reset()
         xyzwpr = Pose_2_Motoman(pose)
         if tool_id is None or tool_id < 0:
             if self.DONT_USE_SETTOOL:
@@ -425,6 +434,7 @@ class RobotPost(object):
         
     def Pause(self, time_ms):
         """Pause the robot program"""
+        self.COLLINEAR_FILTER.flush()
         if time_ms <= 0:
             self.addline('PAUSE')
         else:
@@ -432,16 +442,19 @@ class RobotPost(object):
         
     def setSpeed(self, speed_mms):
         """Changes the robot speed (in mm/s)"""
+        self.COLLINEAR_FILTER.flush()
         speed_cm_min = speed_mms * 60.0 / 10.0
         speedl = max(0.01,min(speed_cm_min,200.0)) # Important! Filter linear speed is in mm/s or cm/min (otherwise the program stops)
         self.STR_V = "V=%.1f" % speedl
     
     def setAcceleration(self, accel_mmss):
         """Changes the robot acceleration (in mm/s2)"""
+        self.COLLINEAR_FILTER.flush()
         self.addlog('Set acceleration not defined')
     
     def setSpeedJoints(self, speed_degs):
         """Changes the robot joint speed (in deg/s)"""
+        self.COLLINEAR_FILTER.flush()
         speedj = max(0.01,min(speed,100.0)) # Joint speed must be in %
         if speedj < 100:
             self.STR_VJ = "VJ=%.2f" % speedj
@@ -450,10 +463,12 @@ class RobotPost(object):
     
     def setAccelerationJoints(self, accel_degss):
         """Changes the robot joint acceleration (in deg/s2)"""
+        self.COLLINEAR_FILTER.flush()
         self.addlog('Set acceleration not defined')
         
     def setZoneData(self, zone_mm):
         """Changes the zone data approach (makes the movement more smooth)"""
+        self.COLLINEAR_FILTER.flush()
         if zone_mm < 0:
             self.STR_PL = ''
         else:
@@ -461,6 +476,7 @@ class RobotPost(object):
         
     def setDO(self, io_var, io_value):
         """Sets a variable (output) to a given value"""
+        self.COLLINEAR_FILTER.flush()
         if type(io_var) != str:  # set default variable name if io_var is a number
             io_var = 'OT#(%s)' % str(io_var)        
         if type(io_value) != str: # set default variable value if io_value is a number            
@@ -475,6 +491,7 @@ class RobotPost(object):
         
     def waitDI(self, io_var, io_value, timeout_ms=-1):
         """Waits for an input io_var to attain a given value io_value. Optionally, a timeout can be provided."""
+        self.COLLINEAR_FILTER.flush()
         if type(io_var) != str:  # set default variable name if io_var is a number
             io_var = 'IN#(%s)' % str(io_var)        
         if type(io_value) != str: # set default variable value if io_value is a number            
@@ -494,6 +511,7 @@ class RobotPost(object):
             
     def RunCode(self, code, is_function_call = False):
         """Adds code or a function call"""
+        self.COLLINEAR_FILTER.flush()
         if is_function_call:
             code = get_safe_name(code,8)
             #if code.startswith("ArcStart"):
@@ -509,6 +527,7 @@ class RobotPost(object):
         
     def RunMessage(self, message, iscomment = False):
         """Add a joint movement"""
+        self.COLLINEAR_FILTER.flush()
         if iscomment:
             for i in range(0,len(message), 29):
                 i2 = min(i + 29, len(message))
@@ -537,8 +556,18 @@ class RobotPost(object):
             
     def addline_targets(self, newline):
         """Add a line at the end of the program (used for targets)"""
+        self.flush_pulses()
         self.PROG_TARGETS.append(newline)
         
+    def flush_pulses(self):
+        """Add the joint targets of the current run to the targets section"""
+        if len(self.PULSES_RUN) == 0:
+            return
+        pulses = joints_2_pulses([joints for cid, joints in self.PULSES_RUN], self.PULSES_X_DEG)
+        for i in range(len(pulses)):
+            self.PROG_TARGETS.append('C%05i=' % self.PULSES_RUN[i][0] + ','.join(['%i' % p for p in pulses[i]]))
+        self.PULSES_RUN = []
+        
     def addlog(self, newline):
         """Add a log message"""
         if self.nProgs > 1 and not self.INCLUDE_SUB_PROGRAMS:
@@ -597,12 +626,9 @@ class RobotPost(object):
         self.setPulses()            
         cid = self.C_COUNT
         self.C_COUNT = self.C_COUNT + 1        
-                
-        str_pulses=[]        
-        for i in range(len(joints)):
-            str_pulses.append('%i' % round(joints[i] * self.PULSES_X_DEG[i]))
         
-        self.addline_targets('C%05i=' % cid + ','.join(str_pulses))         
+        # consecutive joint targets are converted to pulses together (see flush_pulses)
+        self.PULSES_RUN.append([cid, list(joints)])
         return cid
     
     def add_target_cartesian(self, pose, joints, conf_RLF):           
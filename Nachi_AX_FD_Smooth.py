@@ -55,7 +55,7 @@ def pose_2_str(pose,joints=None,reference=None):
     
 def angles_2_str(angles):
     """Converts a joint target to a string"""
-    return '(%s)' % (','.join(format(ji, ".5f") for ji in angles))
+    return '(%s)' % format_values(angles, '%.5f', ',')
 
 # ----------------------------------------------------    
 # Object class that handles the robot instructions/syntax
@@ -64,6 +64,7 @@ class RobotPost(object):
     BASE_PROGNAME = None #'MZ07L-01-A'
     MAX_LINES_X_PROG = 95000 # maximum number of lines per program
     PROG_ID = 5          # Program ID to store the program
+    SAVE_THREADS = 4     # number of threads used to save the sub programs
     nPROGS = 0
     SKIP_OUTPUT = False
     
@@ -144,18 +145,16 @@ class RobotPost(object):
             #self.nPROGS = self.nPROGS + 1 # Not required: We already added the counter
             self.nPROGS = len(self.PROGS)
             mainprog = '\' Main program %s calls %i subprograms\n' % (self.PROGRAM_NAME, self.nPROGS)
+            files = []
             for i in range(self.nPROGS):
                 fsavei = ('%s/%s.%03i' % (folder, progname_base, self.PROG_ID+i+1))
                 #mainprog = mainprog + ('%s.%03i\n' % (progname_base, self.PROG_ID+i+1))
                 mainprog += 'CALLP [%03i]\n' % (self.PROG_ID+i+1)
-                fid = open(fsavei, "w")
-                fid.write(self.PROGS[i])
-                fid.close()
+                files.append([fsavei, self.PROGS[i]])
                 self.PROG_FILES.append(fsavei)
             mainprog = mainprog + 'END\n'
-            fid = open(filesave, "w")
-            fid.write(mainprog)
-            fid.close()
+            # the main program is saved once all the sub programs are saved
+            save_files(files, [filesave, mainprog], self.SAVE_THREADS)
             self.PROG_FILES.append(filesave)
             print('SAVED: %s\n' % filesave) # tell RoboDK the path of the saved file
                            
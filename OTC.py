@@ -55,7 +55,7 @@ def pose_2_str(pose,joints=None,reference=None):
     
 def angles_2_str(angles):
     """Contverts a joint target to a string"""
-    return '(%s)' % (','.join(format(ji, ".5f") for ji in angles))
+    return '(%s)' % format_values(angles, '%.5f', ',')
 
 # ----------------------------------------------------    
 # Object class that handles the robot instructions/syntax
@@ -64,6 +64,7 @@ class RobotPost(object):
     BASE_PROGNAME = 'SRA120EL-01-A'
     MAX_LINES_X_PROG = 950 # maximum number of lines per program
     PROG_ID = 123          # Program ID to store the program
+    SAVE_THREADS = 4       # number of threads used to save the sub programs
     nPROGS = 0
     
     # other variables
@@ -120,17 +121,15 @@ class RobotPost(object):
             self.PROGS.append(self.PROG)
             self.nPROGS = self.nPROGS + 1
             mainprog = '\' Main program %s calls %.0f subprograms\n' % (self.PROGRAM_NAME, float(self.nPROGS))
+            files = []
             for i in range(len(self.PROGS)):
                 fsavei = ('%s/%s.%i' % (folder, progname_base, self.PROG_ID+i+1))
                 mainprog = mainprog + ('%s.%i\n' % (progname_base, self.PROG_ID+i+1))
-                fid = open(fsavei, "w")
-                fid.write(self.PROGS[i])
-                fid.close()
+                files.append([fsavei, self.PROGS[i]])
                 self.PROG_FILES.append(fsavei)
             mainprog = mainprog + 'END\n'
-            fid = open(filesave, "w")
-            fid.write(mainprog)
-            fid.close()
+            # the main program is saved once all the sub programs are saved
+            save_files(files, [filesave, mainprog], self.SAVE_THREADS)
             self.PROG_FILES.append(filesave)
             print('SAVED: %s\n' % filesave) # tell RoboDK the path of the saved file
                            
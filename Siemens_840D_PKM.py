@@ -92,7 +92,7 @@ class RobotPost(object):
     ROBOT_NAME = ''
     PROG_FILES = []
     
-    PROG = ''
+    PROG = NumberedLines('N%02i %s', 10, 10) # program lines (numbered when the program is saved)
     PROG_COUNT = 0
     LOG = ''
     nAxes = 6
@@ -102,7 +102,6 @@ class RobotPost(object):
     
     SPEED_UNITS_MIN = 5000 * MM_2_UNITS
     SPEED_DEG_MIN = 2000
-    Nline = 0
     
     LAST_X = None
     LAST_Y = None
@@ -144,18 +143,14 @@ class RobotPost(object):
         
     def joints_2_str(self, joints):
         """Prints a joint target"""
-        str = ''
-        data = ['ST1','ST2','ST3','A','C','G','H','I','J','K','L']
-        for i in range(len(joints)):
-            str = str + ('%s=%.6f ' % (data[i], joints[i]))
-        str = str[:-1]
-        return str
+        data = ['ST1=','ST2=','ST3=','A=','C=','G=','H=','I=','J=','K=','L=']
+        return format_values(joints, '%.6f', ' ', data)
     
     
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
         self.ROBOT_POST = robotpost
         self.ROBOT_NAME = robotname
-        self.PROG = ''
+        self.PROG = NumberedLines('N%02i %s', 10, 10)
         self.LOG = ''
         self.nAxes = robot_axes
         
@@ -219,7 +214,7 @@ class RobotPost(object):
         else:
             filesave = folder + '/' + progname
         fid = open(filesave, "w")
-        fid.write(self.PROG)
+        fid.write(self.PROG.text())
         fid.close()
         print('SAVED: %s\n' % filesave)
         #---------------------- show result
@@ -456,12 +451,11 @@ class RobotPost(object):
 # ------------------ private ----------------------                
     def addline(self, newline):
         """Add a program line"""
-        self.Nline = self.Nline + 10
-        self.PROG = self.PROG + ('N%02i ' % self.Nline) + newline + '\n'        
+        self.PROG.add(newline)
         
     def addcomment(self, newline):
         """Add a comment line"""
-        self.PROG = self.PROG + '; ' + newline + '\n'
+        self.PROG.add_unnumbered('; ' + newline)
         
     def addlog(self, newline):
         """Add a log message"""
@@ -509,7 +503,7 @@ def test_post():
     robot.MoveJ(None, [-46.18419, -6.77518, -20.54925, 71.38674, 49.58727, -302.54752] )
     robot.ProgFinish("Program")
     # robot.ProgSave(".","Program",True)
-    print(robot.PROG)
+    print(robot.PROG.text())
     if len(robot.LOG) > 0:
         mbox('Program generation LOG:\n\n' + robot.LOG)
 
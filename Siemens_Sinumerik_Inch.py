@@ -109,6 +109,8 @@ class RobotPost(object):
     LAST_Z = None
     LAST_POSE = None
     TRAORI = None
+    ARC_TOLERANCE = 0       # set the chord tolerance in mm to collapse linear movements into circular movements (0 disables arc fitting)
+    ARC_FITTER = None
     
     
     # ----------------------------------------------------
@@ -139,12 +141,8 @@ class RobotPost(object):
         
     def joints_2_str(self, joints):
         """Prints a joint target"""
-        str = ''
-        data = ['JT1','JT2','JT3','A','B','C','G','H','I','J','K','L']
-        for i in range(len(joints)):
-            str = str + ('%s=%.6f ' % (data[i], joints[i]))
-        str = str[:-1]
-        return str
+        data = ['JT1=','JT2=','JT3=','A=','B=','C=','G=','H=','I=','J=','K=','L=']
+        return format_values(joints, '%.6f', ' ', data)
     
     
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
@@ -153,8 +151,10 @@ class RobotPost(object):
         self.PROG = ''
         self.LOG = ''
         self.nAxes = robot_axes
+        self.ARC_FITTER = ArcFitter(self.add_movel, self.add_movec, self.ARC_TOLERANCE)
         
     def ProgStart(self, progname):
+        self.ARC_FITTER.reset()
         self.PROG_COUNT = self.PROG_COUNT + 1
         if self.PROG_COUNT <= 1:
             import datetime
@@ -203,6 +203,7 @@ class RobotPost(object):
         
         
     def ProgFinish(self, progname):
+        self.ARC_FITTER.reset()
         if self.PROG_COUNT <= 1:            
             self.addcomment('End of main program ' + progname)
             self.addline('M30')
@@ -264,6 +265,7 @@ class RobotPost(object):
         
     def MoveJ(self, pose, joints, conf_RLF=None):
         """Add a joint movement"""
+        self.ARC_FITTER.reset()
         self.set_joint_space()
         self.addline('G1 ' + self.joints_2_str(joints) + ' F%.1f' % self.SPEED_DEG_MIN)
         #self.addline('G0 ' + self.joints_2_str(joints)) # G0 is the fastest 
@@ -276,6 +278,10 @@ class RobotPost(object):
         
     def MoveL(self, pose, joints, conf_RLF=None):
         """Add a linear movement"""
+        self.ARC_FITTER.MoveL(pose, joints, conf_RLF)
+        
+    def add_movel(self, pose, joints, conf_RLF=None):
+        """Output a linear movement (arcs fitted by ARC_FITTER are output using MoveC)"""
         if pose is None:
             self.set_joint_space()
             self.addline('G1 ' + self.joints_2_str(joints) + ' F%.1f' % self.SPEED_UNITS_MIN)
@@ -315,6 +321,7 @@ class RobotPost(object):
         
     def MoveC(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
         """Add a circular movement"""
+        self.ARC_FITTER.reset()
         self.nId = self.nId + 1
         xyz1 = (self.REF_FRAME*pose1*self.INV_TOOL_FRAME).Pos()
         xyz2 = (self.REF_FRAME*pose2*self.INV_TOOL_FRAME).Pos()  
@@ -322,8 +329,17 @@ class RobotPost(object):
         #xyz2 = (pose2).Pos()          
         self.addline('G2 X%.3f Y%.3f Z%.3f I1=%.3f J1=%.3f K1=%.3f F%.1f' % (xyz2[0], xyz2[1], xyz2[2], xyz1[0], xyz1[1], xyz1[2], self.SPEED_UNITS_MIN))
         
+    def add_movec(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
+        """Output a circular movement fitted by ARC_FITTER"""
+        self.MoveC(pose1, joints1, pose2, joints2, conf_RLF_1, conf_RLF_2)
+        # force the next linear movement to output all the coordinates
+        self.LAST_X = None
+        self.LAST_Y = None
+        self.LAST_Z = None
+        
     def setFrame(self, pose, frame_id=None, frame_name=None):
         """Change the robot reference frame"""
+        self.ARC_FITTER.reset()
         self.addcomment('------ Update reference: %s ------' % (frame_name if frame_name is not None else ''))
         #self.addline('TRAORI')
         self.set_cartesian_space()
@@ -342,6 +358,7 @@ class RobotPost(object):
         
     def setTool(self, pose, tool_id=None, tool_name=None):
         """Change the robot TCP"""
+        self.ARC_FITTER.reset()
         #if tool_id is not None and tool_id > 0:
         #    self.addline('T%i D1' % tool_id)
         #    self.addcomment('Using controller definition for tool %i' % frame_id)
@@ -379,6 +396,7 @@ class RobotPost(object):
     
     def setSpeed(self, speed_mms):
         """Changes the robot speed (in mm/s)"""
+        self.ARC_FITTER.flush()
         self.SPEED_UNITS_MIN = speed_mms*60.0*MM_2_UNITS
     
     def setAcceleration(self, accel_mmss):
@@ -457,11 +475,13 @@ class RobotPost(object):
 # ------------------ private ----------------------                
     def addline(self, newline):
         """Add a program line"""
+        self.ARC_FITTER.flush()
         self.Nline = self.Nline + 1
         self.PROG = self.PROG + ('N%02i ' % self.Nline) + newline + '\n'        
         
     def addcomment(self, newline):
         """Add a comment line"""
+        self.ARC_FITTER.flush()
         self.PROG = self.PROG + '; ' + newline + '\n'
         
     def addlog(self, newline):
@@ -266,7 +266,7 @@ class RobotPost(object):
     PROG_FILES = []
     PROG_NAME = 'unknown'
     MAIN_FOLDER = 'ProgRoboDK'
-    PROG_PGX = ''
+    PROG_PGX = []
     PROG_MOVE_COUNT = 0
     PROG_MOVE_COUNT_MAX = 2000
     PROG_PGX_LIST = []
@@ -284,21 +284,21 @@ class RobotPost(object):
     SMOOTH = DEFAULT_SMOOTH
     REF_NAME = 'fPartReal'
     REF_CURRENT = 'world'
-    REF_DATA = ''
+    REF_DATA = []
     REF_COUNT = 0
     TOOL_NAME = 'tCad'
     TOOL_CURRENT = 'tProg'
-    TOOL_DATA = ''
+    TOOL_DATA = []
     TOOL_COUNT = 0
     SPEED_NAME = 'mSpeed'
     SPEED_CURRENT = 'mNomSpeed'
-    SPEED_DATA = ''
+    SPEED_DATA = []
     SPEED_COUNT = 0
     JOINT_NAME = 'jJoint'
-    JOINT_DATA = ''
+    JOINT_DATA = []
     JOINT_COUNT = 0
     POINT_NAME = 'pPoint'
-    POINT_DATA = ''
+    POINT_DATA = []
     POINT_COUNT = 0
     
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
@@ -307,6 +307,13 @@ class RobotPost(object):
         self.PROG = ''
         self.LOG = ''
         self.nAxes = robot_axes
+        self.PROG_PGX = []
+        self.REF_DATA = []
+        self.TOOL_DATA = []
+        self.SPEED_DATA = []
+        self.JOINT_DATA = []
+        self.POINT_DATA = []
+        self.PROG_DTX_LIST = []
         
     def ProgStart(self, progname):
         self.PROG_NAME = progname.lower()
@@ -450,6 +457,7 @@ class RobotPost(object):
             if foldersave is not None and len(foldersave) > 0:
                 foldersave = foldersave
             else:
+                self.remove_dtx()
                 return
         else:
             foldersave = folder
@@ -510,7 +518,7 @@ class RobotPost(object):
             fid = open(program_data, mode="w", encoding='utf-8')
             fid.write('\ufeff')
             #fid.write(DATA_DTX_MAIN % (pose_2_str(self.REF_DATA), self.TOOL_DATA))
-            fid.write(DATA_DTX % (self.TOOL_DATA, ''))
+            write_formatted(fid, DATA_DTX, (self.TOOL_DATA, ''))
             fid.close()
             #-----------------------------------
             # stop.pgx
@@ -536,56 +544,64 @@ class RobotPost(object):
             #-----------------------------------
             
         
-        for i in range(nprogs):
-            if nprogs > 1: # Always create a main program loading sub programs
-                folderprog_final = folderprog + '/' + self.PROG_NAME_LIST[i]
-            else:
-                folderprog_final = folderprog
+        try:
+            for i in range(nprogs):
+                if nprogs > 1: # Always create a main program loading sub programs
+                    folderprog_final = folderprog + '/' + self.PROG_NAME_LIST[i]
+                else:
+                    folderprog_final = folderprog
                 
-            if not DirExists(folderprog_final):
-                import os 
-                os.makedirs(folderprog_final)
+                if not DirExists(folderprog_final):
+                    import os 
+                    os.makedirs(folderprog_final)
             
-            #-----------------------------------
-            # start.pgx
-            start_file = folderprog_final + '/start.pgx'
-            show_file_list.append(start_file)
-            fid = open(start_file, mode="w", encoding='utf-8')
-            fid.write('\ufeff')
-            fid.write(self.PROG_PGX_LIST[i])
-            fid.close()
-            #-----------------------------------
-            # stop.pgx
-            stop_file = folderprog_final + '/stop.pgx'
-            fid = open(stop_file, mode="w", encoding='utf-8')
-            fid.write('\ufeff')
-            fid.write(STOP_PGX)
-            fid.close()
-            #-----------------------------------
-            # program.pjx
-            project_file = folderprog_final + '/%s.pjx' % self.PROG_NAME_LIST[i]
-            #show_file_list.append(project_file)
-            fid = open(project_file, mode="w", encoding='utf-8')
-            fid.write('\ufeff')
-            fid.write(self.PROG_PJX_LIST[i])
-            fid.close()
-            print('SAVED: %s\n' % project_file)
-            #-----------------------------------
-            # program.dtx
-            program_data = folderprog_final + '/%s.dtx' % self.PROG_NAME_LIST[i]
-            show_file_list.append(project_file)
-            fid = open(program_data, mode="w", encoding='utf-8')
-            fid.write('\ufeff')
-            fid.write(self.PROG_DTX_LIST[i])
-            fid.close()
-            #-----------------------------------
-            # program.ltx
-            ltx_f = folderprog + '/%s.ltx' % self.PROG_NAME_LIST[i]
-            fid = open(ltx_f, mode="w", encoding='utf-8')
-            fid.write('\ufeff')
-            fid.write(LTX_FILE)
-            fid.close()
-            #-----------------------------------
+                #-----------------------------------
+                # start.pgx
+                start_file = folderprog_final + '/start.pgx'
+                show_file_list.append(start_file)
+                fid = open(start_file, mode="w", encoding='utf-8')
+                fid.write('\ufeff')
+                fid.write(self.PROG_PGX_LIST[i])
+                fid.close()
+                #-----------------------------------
+                # stop.pgx
+                stop_file = folderprog_final + '/stop.pgx'
+                fid = open(stop_file, mode="w", encoding='utf-8')
+                fid.write('\ufeff')
+                fid.write(STOP_PGX)
+                fid.close()
+                #-----------------------------------
+                # program.pjx
+                project_file = folderprog_final + '/%s.pjx' % self.PROG_NAME_LIST[i]
+                #show_file_list.append(project_file)
+                fid = open(project_file, mode="w", encoding='utf-8')
+                fid.write('\ufeff')
+                fid.write(self.PROG_PJX_LIST[i])
+                fid.close()
+                print('SAVED: %s\n' % project_file)
+                #-----------------------------------
+                # program.dtx
+                program_data = folderprog_final + '/%s.dtx' % self.PROG_NAME_LIST[i]
+                show_file_list.append(project_file)
+                fid = open(program_data, mode="w", encoding='utf-8')
+                fid.write('\ufeff')
+                import os
+                import shutil
+                with open(self.PROG_DTX_LIST[i], encoding='utf-8') as fdata:
+                    shutil.copyfileobj(fdata, fid)
+                fid.close()
+                os.remove(self.PROG_DTX_LIST[i])
+                #-----------------------------------
+                # program.ltx
+                ltx_f = folderprog + '/%s.ltx' % self.PROG_NAME_LIST[i]
+                fid = open(ltx_f, mode="w", encoding='utf-8')
+                fid.write('\ufeff')
+                fid.write(LTX_FILE)
+                fid.close()
+                #-----------------------------------
+        finally:
+            # remove the module data that was not saved
+            self.remove_dtx()
         
         #self.UploadFTP(folderprog)
         self.PROG_FILES = folderprog
@@ -623,7 +639,7 @@ class RobotPost(object):
         #      <Value key="0" j1="0.000" j2="-10.000" j3="100.000" j4="0.000" j5="0.000" j6="-90.000" />
         self.JOINT_COUNT = self.JOINT_COUNT + 1    
         variable = 't%i' % (self.JOINT_COUNT)	
-        self.JOINT_DATA = self.JOINT_DATA + '\n    <joint name="t%i" public="false" privilege="0" >\n      <valueJoint index="0" >\n        <jointValue %s />\n      </valueJoint>\n    </joint>' % (self.JOINT_COUNT, angles_2_str(joints))
+        self.JOINT_DATA.append('\n    <joint name="t%i" public="false" privilege="0" >\n      <valueJoint index="0" >\n        <jointValue %s />\n      </valueJoint>\n    </joint>' % (self.JOINT_COUNT, angles_2_str(joints)))
         self.addline('movej(%s,%s,%s)' % (variable, self.TOOL_CURRENT, self.SPEED_CURRENT))
         #self.addline('waitEndMove()')
         
@@ -644,7 +660,7 @@ class RobotPost(object):
         # Configuration needs to be checked for older RoboDK versions
         self.POINT_COUNT = self.POINT_COUNT + 1    
         variable = 'p%i' % (self.POINT_COUNT)
-        self.POINT_DATA = self.POINT_DATA + '\n    <point name="p%i" public="false" privilege="0" >\n      <pFather alias="" name="world" fatherIndex="0" />\n      <valuePoint index="0" >\n        <tpValue %s />\n        <cpValue shoulder="ssame" elbow="esame" wrist="wsame"/>\n      </valuePoint>\n    </point>' % (self.POINT_COUNT, pose_2_str(poseabs))
+        self.POINT_DATA.append('\n    <point name="p%i" public="false" privilege="0" >\n      <pFather alias="" name="world" fatherIndex="0" />\n      <valuePoint index="0" >\n        <tpValue %s />\n        <cpValue shoulder="ssame" elbow="esame" wrist="wsame"/>\n      </valuePoint>\n    </point>' % (self.POINT_COUNT, pose_2_str(poseabs)))
         #movej(t1,flange,mNomSpeed)
         self.addline('movel(%s,%s,%s)' % (variable, self.TOOL_CURRENT, self.SPEED_CURRENT))
         
@@ -660,10 +676,10 @@ class RobotPost(object):
         # Configuration needs to be checked for older RoboDK versions
         self.POINT_COUNT = self.POINT_COUNT + 1    
         variable1 = 'p%i' % (self.POINT_COUNT)
-        self.POINT_DATA = self.POINT_DATA + '\n    <point name="p%i" public="false" privilege="0" >\n      <pFather alias="" name="world" fatherIndex="0" />\n      <valuePoint index="0" >\n        <tpValue %s />\n        <cpValue shoulder="ssame" elbow="esame" wrist="wsame"/>\n      </valuePoint>\n    </point>' % (self.POINT_COUNT, pose_2_str(pose1abs))
+        self.POINT_DATA.append('\n    <point name="p%i" public="false" privilege="0" >\n      <pFather alias="" name="world" fatherIndex="0" />\n      <valuePoint index="0" >\n        <tpValue %s />\n        <cpValue shoulder="ssame" elbow="esame" wrist="wsame"/>\n      </valuePoint>\n    </point>' % (self.POINT_COUNT, pose_2_str(pose1abs)))
         self.POINT_COUNT = self.POINT_COUNT + 1    
         variable2 = 'p%i' % (self.POINT_COUNT)
-        self.POINT_DATA = self.POINT_DATA + '\n    <point name="p%i" public="false" privilege="0" >\n      <pFather alias="" name="world" fatherIndex="0" />\n      <valuePoint index="0" >\n        <tpValue %s />\n        <cpValue shoulder="ssame" elbow="esame" wrist="wsame"/>\n      </valuePoint>\n    </point>' % (self.POINT_COUNT, pose_2_str(pose2abs))
+        self.POINT_DATA.append('\n    <point name="p%i" public="false" privilege="0" >\n      <pFather alias="" name="world" fatherIndex="0" />\n      <valuePoint index="0" >\n        <tpValue %s />\n        <cpValue shoulder="ssame" elbow="esame" wrist="wsame"/>\n      </valuePoint>\n    </point>' % (self.POINT_COUNT, pose_2_str(pose2abs)))
         
         #movej(t1,flange,mNomSpeed)
         self.addline('movec(%s,%s,%s,%s)' % (variable1, variable2, self.TOOL_CURRENT, self.SPEED_CURRENT))
@@ -772,9 +788,16 @@ class RobotPost(object):
             self.addline('popUpMsg("%s")' % message)
         
 # ------------------ private ----------------------                
+    def remove_dtx(self):
+        """Removes the temporary files with the module data that were not saved"""
+        for file_dtx in self.PROG_DTX_LIST:
+            if os.path.exists(file_dtx):
+                os.remove(file_dtx)
+        self.PROG_DTX_LIST = []
+        
     def addline(self, newline):
         """Add a program line"""
-        self.PROG_PGX = self.PROG_PGX + self.TAB_PGX + newline + '\n'
+        self.PROG_PGX.append(self.TAB_PGX + newline + '\n')
         
     def addlog(self, newline):
         """Add a log message"""
@@ -794,20 +817,25 @@ class RobotPost(object):
         if nprogs > 0:
             progname = progname + ('%i' % (nprogs+1))
             
-        self.PROG_PGX_LIST.append(START_PGX % self.PROG_PGX)
-        self.PROG_DTX_LIST.append(DATA_DTX % (self.JOINT_DATA, self.POINT_DATA, pose_2_str(self.TOOL)))
+        self.PROG_PGX_LIST.append(START_PGX % ''.join(self.PROG_PGX))
+        # spool the module data to a temporary file, it is copied to the program folder when the program is saved
+        import tempfile
+        fid = tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.dtx', delete=False)
+        write_formatted(fid, DATA_DTX, (self.JOINT_DATA, self.POINT_DATA, pose_2_str(self.TOOL)))
+        fid.close()
+        self.PROG_DTX_LIST.append(fid.name)
         self.PROG_PJX_LIST.append(PROGRAM_PJX % progname)
         self.PROG_NAME_LIST.append(progname)
-        self.PROG_PGX = ''
-        self.REF_DATA = ''
+        self.PROG_PGX = []
+        self.REF_DATA = []
         self.REF_COUNT = 0
-        self.TOOL_DATA = ''
+        self.TOOL_DATA = []
         self.TOOL_COUNT = 0
-        self.SPEED_DATA = ''
+        self.SPEED_DATA = []
         self.SPEED_COUNT = 0
-        self.JOINT_DATA = ''
+        self.JOINT_DATA = []
         self.JOINT_COUNT = 0
-        self.POINT_DATA = ''
+        self.POINT_DATA = []
         self.POINT_COUNT = 0
         self.PROG_MOVE_COUNT = 0        
         # initialise next program
@@ -862,7 +890,7 @@ def test_post():
     robot.MoveL(Pose([250, 150, 191.421356, 180, 0, -150]), [-43.82111, 3.29703, -40.29493, 56.02402, 56.61169, -249.23532] )
     robot.ProgFinish("Program")
     # robot.ProgSave(".","Program",True)
-    print(robot.PROG_PGX)
+    print(''.join(robot.PROG_PGX))
     if len(robot.LOG) > 0:
         mbox('Program generation LOG:\n\n' + robot.LOG)
 
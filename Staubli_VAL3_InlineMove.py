@@ -325,7 +325,7 @@ class RobotPost(object):
     PROG_FILES = []
     PROG_NAME = 'unknown'
     MAIN_FOLDER = 'ProgRoboDK'
-    PROG_PGX = ''
+    PROG_PGX = []
     PROG_MOVE_COUNT = 0
     PROG_MOVE_COUNT_MAX = 200
     LOG = ''
@@ -349,6 +349,7 @@ class RobotPost(object):
         self.PROG = ''
         self.LOG = ''
         self.nAxes = robot_axes
+        self.PROG_PGX = []
         
     def ProgStart(self, progname):
         self.PROG_NAME = progname
@@ -618,7 +619,7 @@ class RobotPost(object):
             main_data = folderprog_final + '/main.pgx'
             show_file_list.append(main_data)
             fid = open(main_data, "w")
-            fid.write(MAIN_PGX % (self.PROG_PGX_LIST[i]))
+            write_formatted(fid, MAIN_PGX, (self.PROG_PGX_LIST[i],))
             fid.close()
             #-----------------------------------
         
@@ -790,7 +791,7 @@ class RobotPost(object):
 # ------------------ private ----------------------                
     def addline(self, newline):
         """Add a program line"""
-        self.PROG_PGX = self.PROG_PGX + self.TAB_PGX + newline + '\n'
+        self.PROG_PGX.append(self.TAB_PGX + newline + '\n')
         
     def addlog(self, newline):
         """Add a log message"""
@@ -812,7 +813,7 @@ class RobotPost(object):
             
         self.PROG_PGX_LIST.append(self.PROG_PGX)
         self.PROG_NAME_LIST.append(progname)
-        self.PROG_PGX = ''        
+        self.PROG_PGX = []        
         self.PROG_MOVE_COUNT = 0        
         # initialise next program
         self.setSpeed(self.SPEED)
@@ -861,7 +862,7 @@ def test_post():
     robot.MoveL(Pose([250, 150, 191.421356, 180, 0, -150]), [-43.82111, 3.29703, -40.29493, 56.02402, 56.61169, -249.23532] )
     robot.ProgFinish("Program")
     # robot.ProgSave(".","Program",True)
-    print(robot.PROG_PGX)
+    print(''.join(robot.PROG_PGX))
     if len(robot.LOG) > 0:
         mbox('Program generation LOG:\n\n' + robot.LOG)
 
@@ -319,7 +319,7 @@ class RobotPost(object):
     PROG_FILES = []
     PROG_NAME = 'unknown'
     MAIN_FOLDER = 'ProgRoboDK'
-    PROG_PGX = ''
+    PROG_PGX = []
     PROG_MOVE_COUNT = 0
     PROG_MOVE_COUNT_MAX = 200
     PROG_PGX_LIST = []
@@ -337,23 +337,23 @@ class RobotPost(object):
     SMOOTH = DEFAULT_SMOOTH
     REF_NAME = 'fPartReal'
     REF_CURRENT = 'world[0]'
-    REF_DATA = ''
+    REF_DATA = []
     REF_COUNT = 0
     TOOL_NAME = 'tCad'
     TOOL_CURRENT = 'flange[0]'
-    TOOL_DATA = ''
+    TOOL_DATA = []
     TOOL_COUNT = 0
-    OTHER_DATA = '' # ntargets
+    OTHER_DATA = [] # ntargets
     OTHER_COUNT = 0
     SPEED_NAME = 'mSpeed'
     SPEED_CURRENT = 'mNomSpeed'
-    SPEED_DATA = ''
+    SPEED_DATA = []
     SPEED_COUNT = 0
     JOINT_NAME = 'jJoint'
-    JOINT_DATA = ''
+    JOINT_DATA = []
     JOINT_COUNT = 0
     POINT_NAME = 'pPoint'
-    POINT_DATA = ''
+    POINT_DATA = []
     POINT_COUNT = 0
     
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
@@ -362,6 +362,14 @@ class RobotPost(object):
         self.PROG = ''
         self.LOG = ''
         self.nAxes = robot_axes
+        self.PROG_PGX = []
+        self.REF_DATA = []
+        self.TOOL_DATA = []
+        self.SPEED_DATA = []
+        self.JOINT_DATA = []
+        self.POINT_DATA = []
+        self.OTHER_DATA = []
+        self.PROG_DTX_LIST = []
         for k,v in kwargs.items():
             if k == 'pose_turntable':
                 pose_turntable = v
@@ -511,6 +519,7 @@ class RobotPost(object):
             if foldersave is not None and len(foldersave) > 0:
                 foldersave = foldersave
             else:
+                self.remove_dtx()
                 return
         else:
             foldersave = folder
@@ -576,7 +585,7 @@ class RobotPost(object):
             program_data = folderprog + '/%s.dtx' % main_progname
             show_file_list.append(project_file)
             fid = open(program_data, "w")
-            fid.write(DATA_DTX_MAIN % (self.REF_DATA, self.TOOL_DATA, pose_2_str(self.FR_EXTERNAL_POSE)))
+            write_formatted(fid, DATA_DTX_MAIN, (self.REF_DATA, self.TOOL_DATA, pose_2_str(self.FR_EXTERNAL_POSE)))
             fid.close()
             #-----------------------------------
             # stop.pgx
@@ -592,51 +601,56 @@ class RobotPost(object):
             fid.close()
             #-----------------------------------
         
-        for i in range(nprogs):
-            if True: # nprogs > 1: # Always create a main program loading sub programs
-                folderprog_final = folderprog + '/' + self.PROG_NAME_LIST[i]
-            else:
-                folderprog_final = folderprog
+        try:
+            for i in range(nprogs):
+                if True: # nprogs > 1: # Always create a main program loading sub programs
+                    folderprog_final = folderprog + '/' + self.PROG_NAME_LIST[i]
+                else:
+                    folderprog_final = folderprog
                 
-            if not DirExists(folderprog_final):
-                import os 
-                os.makedirs(folderprog_final)
+                if not DirExists(folderprog_final):
+                    import os 
+                    os.makedirs(folderprog_final)
             
-            #-----------------------------------
-            # start.pgx
-            start_file = folderprog_final + '/start.pgx'
-            #show_file_list.append(start_file)
-            fid = open(start_file, "w")
-            fid.write(self.PROG_PGX_LIST[i])
-            fid.close()
-            #-----------------------------------
-            # stop.pgx
-            stop_file = folderprog_final + '/stop.pgx'
-            fid = open(stop_file, "w")
-            fid.write(STOP_PGX)
-            fid.close()            
-            #-----------------------------------
-            # setLink.pgx
-            setlink_file = folderprog_final + '/setLink.pgx'
-            fid = open(setlink_file, "w")
-            fid.write(SETLINK_PGX)
-            fid.close()
-            #-----------------------------------
-            # program.pjx
-            project_file = folderprog_final + '/%s.pjx' % self.PROG_NAME_LIST[i]
-            #show_file_list.append(project_file)
-            fid = open(project_file, "w")
-            fid.write(self.PROG_PJX_LIST[i])
-            fid.close()
-            print('SAVED: %s\n' % project_file)
-            #-----------------------------------
-            # program.dtx
-            program_data = folderprog_final + '/%s.dtx' % self.PROG_NAME_LIST[i]
-            #show_file_list.append(project_file)
-            fid = open(program_data, "w")
-            fid.write(self.PROG_DTX_LIST[i])
-            fid.close()
-            #-----------------------------------
+                #-----------------------------------
+                # start.pgx
+                start_file = folderprog_final + '/start.pgx'
+                #show_file_list.append(start_file)
+                fid = open(start_file, "w")
+                fid.write(self.PROG_PGX_LIST[i])
+                fid.close()
+                #-----------------------------------
+                # stop.pgx
+                stop_file = folderprog_final + '/stop.pgx'
+                fid = open(stop_file, "w")
+                fid.write(STOP_PGX)
+                fid.close()            
+                #-----------------------------------
+                # setLink.pgx
+                setlink_file = folderprog_final + '/setLink.pgx'
+                fid = open(setlink_file, "w")
+                fid.write(SETLINK_PGX)
+                fid.close()
+                #-----------------------------------
+                # program.pjx
+                project_file = folderprog_final + '/%s.pjx' % self.PROG_NAME_LIST[i]
+                #show_file_list.append(project_file)
+                fid = open(project_file, "w")
+                fid.write(self.PROG_PJX_LIST[i])
+                fid.close()
+                print('SAVED: %s\n' % project_file)
+                #-----------------------------------
+                # program.dtx
+                program_data = folderprog_final + '/%s.dtx' % self.PROG_NAME_LIST[i]
+                #show_file_list.append(project_file)
+                import os
+                import shutil
+                shutil.copyfile(self.PROG_DTX_LIST[i], program_data)
+                os.remove(self.PROG_DTX_LIST[i])
+                #-----------------------------------
+        finally:
+            # remove the module data that was not saved
+            self.remove_dtx()
         
         #self.UploadFTP(folderprog)
         self.PROG_FILES = folderprog
@@ -677,13 +691,13 @@ class RobotPost(object):
         if nextax > 0:
             var_extax = 'nTargetJoints%i' % self.OTHER_COUNT
             self.OTHER_COUNT = self.OTHER_COUNT + 1
-            self.OTHER_DATA += '    <Data name="%s" access="private" xsi:type="array" type="num" size="%i">\n' % (var_extax, nextax)
+            self.OTHER_DATA.append('    <Data name="%s" access="private" xsi:type="array" type="num" size="%i">\n' % (var_extax, nextax))
             for i in range(nextax):
-                self.OTHER_DATA += '      <Value key="%i" value="%.3f" />\n' % (i, joints[i+6])
-            self.OTHER_DATA += '    </Data>\n'
+                self.OTHER_DATA.append('      <Value key="%i" value="%.3f" />\n' % (i, joints[i+6]))
+            self.OTHER_DATA.append('    </Data>\n')
             
         variable = '%s[%i]' % (self.JOINT_NAME, self.JOINT_COUNT)	
-        self.JOINT_DATA = self.JOINT_DATA + '      <Value key="%i" %s />\n' % (self.JOINT_COUNT, angles_2_str(joints))
+        self.JOINT_DATA.append('      <Value key="%i" %s />\n' % (self.JOINT_COUNT, angles_2_str(joints)))
         self.JOINT_COUNT = self.JOINT_COUNT + 1
         if nextax > 0:
             self.addline('nTraj=$Xmovej(%s,%s[0],%s,%s)' % (variable, var_extax, self.TOOL_CURRENT, self.SPEED_CURRENT))        
@@ -703,10 +717,10 @@ class RobotPost(object):
         if nextax > 0:
             var_extax = 'nTarget%i' % self.OTHER_COUNT
             self.OTHER_COUNT = self.OTHER_COUNT + 1
-            self.OTHER_DATA += '    <Data name="%s" access="private" xsi:type="array" type="num" size="%i">\n' % (var_extax, nextax)
+            self.OTHER_DATA.append('    <Data name="%s" access="private" xsi:type="array" type="num" size="%i">\n' % (var_extax, nextax))
             for i in range(nextax):
-                self.OTHER_DATA += '      <Value key="%i" value="%.3f" />\n' % (i, joints[i+6])
-            self.OTHER_DATA += '    </Data>\n'
+                self.OTHER_DATA.append('      <Value key="%i" value="%.3f" />\n' % (i, joints[i+6]))
+            self.OTHER_DATA.append('    </Data>\n')
         
         if conf_RLF == None:
             str_config = 'shoulder="lefty" elbow="epositive" wrist="wpositive"'
@@ -714,7 +728,7 @@ class RobotPost(object):
             [rear, lowerarm, flip] = conf_RLF
             str_config = 'shoulder="%s" elbow="%s" wrist="%s"' % ("righty" if rear>0 else "lefty", "enegative" if lowerarm>0 else "epositive", "wnegative" if flip>0 else "wpositive")
         variable = '%s[%i]' % (self.POINT_NAME, self.POINT_COUNT)
-        self.POINT_DATA = self.POINT_DATA + '      <Value key="%i" %s %s fatherId="%s" />\n' % (self.POINT_COUNT, pose_2_str(pose), str_config, self.REF_CURRENT)
+        self.POINT_DATA.append('      <Value key="%i" %s %s fatherId="%s" />\n' % (self.POINT_COUNT, pose_2_str(pose), str_config, self.REF_CURRENT))
         self.POINT_COUNT = self.POINT_COUNT + 1
         if nextax > 0:
             self.addline('nTraj=$Xmovel(%s,%s[0],%s,%s)' % (variable, var_extax, self.TOOL_CURRENT, self.SPEED_CURRENT))        
@@ -733,8 +747,8 @@ class RobotPost(object):
             str_config = 'shoulder="%s" elbow="%s" wrist="%s"' % ("righty" if rear>0 else "lefty", "enegative" if lowerarm>0 else "epositive", "wnegative" if flip>0 else "wpositive")
         variable1 = '%s[%i]' % (self.POINT_NAME, self.POINT_COUNT)
         variable2 = '%s[%i]' % (self.POINT_NAME, self.POINT_COUNT+1)        
-        self.POINT_DATA = self.POINT_DATA + '      <Value key="%i" %s %s fatherId="%s" />\n' % (self.POINT_COUNT, pose_2_str(pose1), str_config, self.REF_CURRENT)
-        self.POINT_DATA = self.POINT_DATA + '      <Value key="%i" %s %s fatherId="%s" />\n' % (self.POINT_COUNT+1, pose_2_str(pose2), str_config, self.REF_CURRENT)        
+        self.POINT_DATA.append('      <Value key="%i" %s %s fatherId="%s" />\n' % (self.POINT_COUNT, pose_2_str(pose1), str_config, self.REF_CURRENT))
+        self.POINT_DATA.append('      <Value key="%i" %s %s fatherId="%s" />\n' % (self.POINT_COUNT+1, pose_2_str(pose2), str_config, self.REF_CURRENT))
         self.POINT_COUNT = self.POINT_COUNT + 2       
         self.addline('nTraj=movec(%s,%s,%s,%s)' % (variable1, variable2, self.TOOL_CURRENT, self.SPEED_CURRENT))
         
@@ -748,7 +762,7 @@ class RobotPost(object):
         self.REF = pose
         #      <Value key="0" x="600.000" y="0.000" z="-465.000" rx="0.400" ry="0.100" rz="-45.000" fatherId="world[0]" />
         self.REF_CURRENT = '%s[%i]' % (self.REF_NAME, self.REF_COUNT)
-        self.REF_DATA = self.REF_DATA + '      <Value key="%i" %s fatherId="world[0]" />\n' % (self.REF_COUNT, pose_2_str(self.FR_EXTERNAL_POSE*pose))
+        self.REF_DATA.append('      <Value key="%i" %s fatherId="world[0]" />\n' % (self.REF_COUNT, pose_2_str(self.FR_EXTERNAL_POSE*pose)))
         self.REF_COUNT = self.REF_COUNT + 1
         
     def setTool(self, pose, tool_id=None, tool_name=None):
@@ -762,7 +776,7 @@ class RobotPost(object):
         self.TOOL = pose
         #      <Value key="0" x="-5.972" y="209.431" z="55.323" rx="-90.190" ry="-0.880" rz="89.997" fatherId="flange[0]" ioLink="valve1" />
         self.TOOL_CURRENT = '%s[%i]' % (self.TOOL_NAME, self.TOOL_COUNT)
-        self.TOOL_DATA = self.TOOL_DATA + '      <Value key="%i" %s fatherId="flange[0]" ioLink="valve1" />\n' % (self.TOOL_COUNT, pose_2_str(pose))
+        self.TOOL_DATA.append('      <Value key="%i" %s fatherId="flange[0]" ioLink="valve1" />\n' % (self.TOOL_COUNT, pose_2_str(pose)))
         self.TOOL_COUNT = self.TOOL_COUNT + 1
         
     def Pause(self, time_ms):
@@ -780,7 +794,7 @@ class RobotPost(object):
         self.SPEED_CURRENT = '%s[%i]' % (self.SPEED_NAME, self.SPEED_COUNT)
         # blend = "off" / "joint" / "Cartesian"
         #self.SPEED_DATA = self.SPEED_DATA + '      <Value key="%i" accel="100" vel="100" decel="100" tmax="%.1f" rmax="100" blend="cartesian" leave="%.1f" reach="%0.1f" />\n' % (self.SPEED_COUNT, speed_mms, self.SMOOTH, self.SMOOTH)
-        self.SPEED_DATA = self.SPEED_DATA + '      <Value key="%i" tmax="%.1f" rmax="100" leave="%.1f" reach="%0.1f" />\n' % (self.SPEED_COUNT, speed_mms, self.SMOOTH, self.SMOOTH)
+        self.SPEED_DATA.append('      <Value key="%i" tmax="%.1f" rmax="100" leave="%.1f" reach="%0.1f" />\n' % (self.SPEED_COUNT, speed_mms, self.SMOOTH, self.SMOOTH))
         self.SPEED_COUNT = self.SPEED_COUNT + 1
     
     def setAcceleration(self, accel_mmss):
@@ -851,9 +865,16 @@ class RobotPost(object):
             self.addline('popUpMsg("%s")' % message)
         
 # ------------------ private ----------------------                
+    def remove_dtx(self):
+        """Removes the temporary files with the module data that were not saved"""
+        for file_dtx in self.PROG_DTX_LIST:
+            if os.path.exists(file_dtx):
+                os.remove(file_dtx)
+        self.PROG_DTX_LIST = []
+        
     def addline(self, newline):
         """Add a program line"""
-        self.PROG_PGX = self.PROG_PGX + self.TAB_PGX + newline + '\n'
+        self.PROG_PGX.append(self.TAB_PGX + newline + '\n')
         
     def addlog(self, newline):
         """Add a log message"""
@@ -873,22 +894,27 @@ class RobotPost(object):
         if nprogs > 0:
             progname = progname + ('%i' % (nprogs+1))
             
-        self.PROG_PGX_LIST.append(START_PGX % self.PROG_PGX)
-        self.PROG_DTX_LIST.append(DATA_DTX % (self.REF_NAME, self.REF_COUNT, self.REF_DATA,  self.JOINT_NAME, self.JOINT_COUNT, self.JOINT_DATA,  self.SPEED_NAME, self.SPEED_COUNT, self.SPEED_DATA,  self.POINT_NAME, self.POINT_COUNT, self.POINT_DATA,  self.TOOL_NAME, self.TOOL_COUNT, self.TOOL_DATA, self.OTHER_DATA))
+        self.PROG_PGX_LIST.append(START_PGX % ''.join(self.PROG_PGX))
+        # spool the module data to a temporary file, it is copied to the program folder when the program is saved
+        import tempfile
+        fid = tempfile.NamedTemporaryFile('w', suffix='.dtx', delete=False)
+        write_formatted(fid, DATA_DTX, (self.REF_NAME, self.REF_COUNT, self.REF_DATA,  self.JOINT_NAME, self.JOINT_COUNT, self.JOINT_DATA,  self.SPEED_NAME, self.SPEED_COUNT, self.SPEED_DATA,  self.POINT_NAME, self.POINT_COUNT, self.POINT_DATA,  self.TOOL_NAME, self.TOOL_COUNT, self.TOOL_DATA, self.OTHER_DATA))
+        fid.close()
+        self.PROG_DTX_LIST.append(fid.name)
         self.PROG_PJX_LIST.append(PROGRAM_PJX % progname)
         self.PROG_NAME_LIST.append(progname)
-        self.PROG_PGX = ''
-        self.REF_DATA = ''
+        self.PROG_PGX = []
+        self.REF_DATA = []
         self.REF_COUNT = 0
-        self.TOOL_DATA = ''
+        self.TOOL_DATA = []
         self.TOOL_COUNT = 0
-        self.OTHER_DATA = '' # ntargets
+        self.OTHER_DATA = [] # ntargets
         self.OTHER_COUNT = 0
-        self.SPEED_DATA = ''
+        self.SPEED_DATA = []
         self.SPEED_COUNT = 0
-        self.JOINT_DATA = ''
+        self.JOINT_DATA = []
         self.JOINT_COUNT = 0
-        self.POINT_DATA = ''
+        self.POINT_DATA = []
         self.POINT_COUNT = 0
         self.PROG_MOVE_COUNT = 0        
         # initialise next program
@@ -943,7 +969,7 @@ def test_post():
     robot.MoveL(Pose([250, 150, 191.421356, 180, 0, -150]), [-43.82111, 3.29703, -40.29493, 56.02402, 56.61169, -249.23532] )
     robot.ProgFinish("Program")
     # robot.ProgSave(".","Program",True)
-    print(robot.PROG_PGX)
+    print(''.join(robot.PROG_PGX))
     if len(robot.LOG) > 0:
         mbox('Program generation LOG:\n\n' + robot.LOG)
 
@@ -155,7 +155,7 @@ class RobotPost(object):
     ROBOT_POST = ''
     ROBOT_NAME = ''
     PROG_FILES = []
-    PROG_PGX = ''
+    PROG_PGX = []
     PROG_DTX = ''
     LOG = ''
     nAxes = 6
@@ -166,21 +166,21 @@ class RobotPost(object):
     SMOOTH = DEFAULT_SMOOTH
     REF_NAME = 'fReference'
     REF_CURRENT = 'world[0]'
-    REF_DATA = ''
+    REF_DATA = []
     REF_COUNT = 0
     TOOL_NAME = 'tTool'
     TOOL_CURRENT = 'flange[0]'
-    TOOL_DATA = ''
+    TOOL_DATA = []
     TOOL_COUNT = 0
     SPEED_NAME = 'mSpeed'
     SPEED_CURRENT = 'mNomSpeed'
-    SPEED_DATA = ''
+    SPEED_DATA = []
     SPEED_COUNT = 0
     JOINT_NAME = 'jJoint'
-    JOINT_DATA = ''
+    JOINT_DATA = []
     JOINT_COUNT = 0
     POINT_NAME = 'pPoint'
-    POINT_DATA = ''
+    POINT_DATA = []
     POINT_COUNT = 0
     
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
@@ -189,6 +189,12 @@ class RobotPost(object):
         self.PROG = ''
         self.LOG = ''
         self.nAxes = robot_axes
+        self.PROG_PGX = []
+        self.REF_DATA = []
+        self.TOOL_DATA = []
+        self.SPEED_DATA = []
+        self.JOINT_DATA = []
+        self.POINT_DATA = []
         
     def ProgStart(self, progname):
         self.addline('// Program %s start' % progname)
@@ -216,7 +222,7 @@ class RobotPost(object):
         # start.pgx
         start_file = folderprog + '/start.pgx'
         fid = open(start_file, "w")
-        fid.write(START_PGX % self.PROG_PGX)
+        write_formatted(fid, START_PGX, (self.PROG_PGX,))
         fid.close()
         #-----------------------------------
         # stop.pgx
@@ -235,7 +241,7 @@ class RobotPost(object):
         # program.dtx
         program_data = folderprog + '/%s.dtx' % progname
         fid = open(program_data, "w")
-        fid.write(DATA_DTX % (self.REF_NAME, self.REF_COUNT, self.REF_DATA,  self.JOINT_NAME, self.JOINT_COUNT, self.JOINT_DATA,  self.SPEED_NAME, self.SPEED_COUNT, self.SPEED_DATA,  self.POINT_NAME, self.POINT_COUNT, self.POINT_DATA,  self.TOOL_NAME, self.TOOL_COUNT, self.TOOL_DATA))
+        write_formatted(fid, DATA_DTX, (self.REF_NAME, self.REF_COUNT, self.REF_DATA,  self.JOINT_NAME, self.JOINT_COUNT, self.JOINT_DATA,  self.SPEED_NAME, self.SPEED_COUNT, self.SPEED_DATA,  self.POINT_NAME, self.POINT_COUNT, self.POINT_DATA,  self.TOOL_NAME, self.TOOL_COUNT, self.TOOL_DATA))
         fid.close()
         #-----------------------------------
         
@@ -270,7 +276,7 @@ class RobotPost(object):
         #waitEndMove()
         #      <Value key="0" j1="0.000" j2="-10.000" j3="100.000" j4="0.000" j5="0.000" j6="-90.000" />
         variable = '%s[%i]' % (self.JOINT_NAME, self.JOINT_COUNT)	
-        self.JOINT_DATA = self.JOINT_DATA + '      <Value key="%i" %s />\n' % (self.JOINT_COUNT, angles_2_str(joints))
+        self.JOINT_DATA.append('      <Value key="%i" %s />\n' % (self.JOINT_COUNT, angles_2_str(joints)))
         self.JOINT_COUNT = self.JOINT_COUNT + 1        
         self.addline('nTraj=movej(%s,%s,%s)' % (variable, self.TOOL_CURRENT, self.SPEED_CURRENT))
         #self.addline('waitEndMove()')
@@ -286,7 +292,7 @@ class RobotPost(object):
             [rear, lowerarm, flip] = conf_RLF
             str_config = 'shoulder="%s" elbow="%s" wrist="%s"' % ("righty" if rear>0 else "lefty", "enegative" if lowerarm>0 else "epositive", "wnegative" if flip>0 else "wpositive")
         variable = '%s[%i]' % (self.POINT_NAME, self.POINT_COUNT)
-        self.POINT_DATA = self.POINT_DATA + '      <Value key="%i" %s %s fatherId="%s" />\n' % (self.POINT_COUNT, pose_2_str(pose), str_config, self.REF_CURRENT)
+        self.POINT_DATA.append('      <Value key="%i" %s %s fatherId="%s" />\n' % (self.POINT_COUNT, pose_2_str(pose), str_config, self.REF_CURRENT))
         self.POINT_COUNT = self.POINT_COUNT + 1        
         self.addline('nTraj=movel(%s,%s,%s)' % (variable, self.TOOL_CURRENT, self.SPEED_CURRENT))
         
@@ -300,8 +306,8 @@ class RobotPost(object):
             str_config = 'shoulder="%s" elbow="%s" wrist="%s"' % ("righty" if rear>0 else "lefty", "enegative" if lowerarm>0 else "epositive", "wnegative" if flip>0 else "wpositive")
         variable1 = '%s[%i]' % (self.POINT_NAME, self.POINT_COUNT)
         variable2 = '%s[%i]' % (self.POINT_NAME, self.POINT_COUNT+1)        
-        self.POINT_DATA = self.POINT_DATA + '      <Value key="%i" %s %s fatherId="%s" />\n' % (self.POINT_COUNT, pose_2_str(pose1), str_config, self.REF_CURRENT)
-        self.POINT_DATA = self.POINT_DATA + '      <Value key="%i" %s %s fatherId="%s" />\n' % (self.POINT_COUNT+1, pose_2_str(pose2), str_config, self.REF_CURRENT)        
+        self.POINT_DATA.append('      <Value key="%i" %s %s fatherId="%s" />\n' % (self.POINT_COUNT, pose_2_str(pose1), str_config, self.REF_CURRENT))
+        self.POINT_DATA.append('      <Value key="%i" %s %s fatherId="%s" />\n' % (self.POINT_COUNT+1, pose_2_str(pose2), str_config, self.REF_CURRENT))
         self.POINT_COUNT = self.POINT_COUNT + 2       
         self.addline('nTraj=movec(%s,%s,%s,%s)' % (variable1, variable2, self.TOOL_CURRENT, self.SPEED_CURRENT))
         
@@ -309,14 +315,14 @@ class RobotPost(object):
         """Change the robot reference frame"""
         #      <Value key="0" x="600.000" y="0.000" z="-465.000" rx="0.400" ry="0.100" rz="-45.000" fatherId="world[0]" />
         self.REF_CURRENT = '%s[%i]' % (self.REF_NAME, self.REF_COUNT)
-        self.REF_DATA = self.REF_DATA + '      <Value key="%i" %s fatherId="world[0]" />\n' % (self.REF_COUNT, pose_2_str(pose))
+        self.REF_DATA.append('      <Value key="%i" %s fatherId="world[0]" />\n' % (self.REF_COUNT, pose_2_str(pose)))
         self.REF_COUNT = self.REF_COUNT + 1
         
     def setTool(self, pose, tool_id=None, tool_name=None):
         """Change the robot TCP"""
         #      <Value key="0" x="-5.972" y="209.431" z="55.323" rx="-90.190" ry="-0.880" rz="89.997" fatherId="flange[0]" ioLink="valve1" />
         self.TOOL_CURRENT = '%s[%i]' % (self.TOOL_NAME, self.TOOL_COUNT)
-        self.TOOL_DATA = self.TOOL_DATA + '      <Value key="%i" %s fatherId="flange[0]" ioLink="valve1" />\n' % (self.TOOL_COUNT, pose_2_str(pose))
+        self.TOOL_DATA.append('      <Value key="%i" %s fatherId="flange[0]" ioLink="valve1" />\n' % (self.TOOL_COUNT, pose_2_str(pose)))
         self.TOOL_COUNT = self.TOOL_COUNT + 1
         
     def Pause(self, time_ms):
@@ -333,7 +339,7 @@ class RobotPost(object):
         self.SPEED_CURRENT = '%s[%i]' % (self.SPEED_NAME, self.SPEED_COUNT)
         # blend = "off" / "joint" / "Cartesian"
         #self.SPEED_DATA = self.SPEED_DATA + '      <Value key="%i" accel="100" vel="100" decel="100" tmax="%.1f" rmax="100" blend="cartesian" leave="%.1f" reach="%0.1f" />\n' % (self.SPEED_COUNT, speed_mms, self.SMOOTH, self.SMOOTH)
-        self.SPEED_DATA = self.SPEED_DATA + '      <Value key="%i" tmax="%.1f" rmax="100" leave="%.1f" reach="%0.1f" blend="cartesian" />\n' % (self.SPEED_COUNT, speed_mms, self.SMOOTH, self.SMOOTH)
+        self.SPEED_DATA.append('      <Value key="%i" tmax="%.1f" rmax="100" leave="%.1f" reach="%0.1f" blend="cartesian" />\n' % (self.SPEED_COUNT, speed_mms, self.SMOOTH, self.SMOOTH))
         self.SPEED_COUNT = self.SPEED_COUNT + 1
     
     def setAcceleration(self, accel_mmss):
@@ -403,7 +409,7 @@ class RobotPost(object):
 # ------------------ private ----------------------                
     def addline(self, newline):
         """Add a program line"""
-        self.PROG_PGX = self.PROG_PGX + self.TAB_PGX + newline + '\n'
+        self.PROG_PGX.append(self.TAB_PGX + newline + '\n')
         
     def addlog(self, newline):
         """Add a log message"""
@@ -450,7 +456,7 @@ def test_post():
     robot.MoveL(Pose([250, 150, 191.421356, 180, 0, -150]), [-43.82111, 3.29703, -40.29493, 56.02402, 56.61169, -249.23532] )
     robot.ProgFinish("Program")
     # robot.ProgSave(".","Program",True)
-    print(robot.PROG_PGX)
+    print(''.join(robot.PROG_PGX))
     if len(robot.LOG) > 0:
         mbox('Program generation LOG:\n\n' + robot.LOG)
 
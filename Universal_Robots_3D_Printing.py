@@ -350,11 +350,19 @@ class RobotPost(object):
     PRINT_FLOW_2_SIGNAL = 0.05 # Ratio to convert the flow to an analog signal
     PRINT_FLOW_MAX_SIGNAL = 24 # Maximum signal to provide to the Extruder
     PRINT_ACCEL_MMSS = 1e9 # Acceleration (assume constant speed if we use rounding/blending)    
+    PRINT_LOOKAHEAD = 50 # Number of moves buffered to plan the extruder flow
+    PRINT_SIGNAL_TOLERANCE = 0 # Skip extruder signal updates that differ from the last signal by this value or less (set to -1 to output all updates)
     
     # Internal 3D Printing Parameters
     PRINT_POSE_LAST = None # Last pose printed
     PRINT_E_LAST = 0 # Last Extruder length
     PRINT_E_NEW = 0 # New Extruder Length
+    PRINT_MOVES = [] # Buffered moves: [distance_mm, add_material, speed_mms, program line]
+    PRINT_STOPPED = True # True if the robot stands still before the first buffered move
+    PRINT_SIGNAL_LAST = None # Last Extruder signal output (None if unknown)
+    PRINT_FLUSHING = False # True while print_flush outputs the buffered moves (addline must not flush again)
+    
+    CYCLE_TIME = None # cycle time estimator (the estimated time is reported when the program is saved)
     
     
     nPROGS = 0
@@ -369,12 +377,17 @@ class RobotPost(object):
     def __init__(self, robotpost=None, robotname=None, robot_axes = 6, **kwargs):
         self.ROBOT_POST = robotpost
         self.ROBOT_NAME = robotname
+        self.PRINT_MOVES = []
         for k,v in kwargs.items():
             if k == 'lines_x_prog':
                 self.MAX_LINES_X_PROG = v    
+        self.CYCLE_TIME = CycleTimeEstimator(self.SPEED_MS*1000, self.ACCEL_MSS*1000, self.SPEED_RADS*180/pi, self.ACCEL_RADSS*180/pi, self.BLEND_RADIUS_M*1000)
         
     def ProgStart(self, progname):
         progname = get_safe_name(progname)
+        self.print_flush(True)
+        self.PRINT_SIGNAL_LAST = None # the program can be called with any Extruder signal
+        self.CYCLE_TIME.ProgStart(progname)
         self.nPROGS = self.nPROGS + 1
         if self.nPROGS <= 1:
             self.TAB = ''
@@ -388,6 +401,7 @@ class RobotPost(object):
         
     def ProgFinish(self, progname):
         progname = get_safe_name(progname)
+        self.print_flush(True) # output the buffered moves with the program indentation
         self.TAB = ''
         if self.nPROGS <= 1:
             self.addline('# End of main program')
@@ -441,6 +455,7 @@ class RobotPost(object):
         fid.close()
     
         print('SAVED: %s\n' % filesave) # tell RoboDK the path of the saved file
+        print(self.CYCLE_TIME.report())
         self.PROG_FILES = filesave
         
         #---------------------------- SAVE URP (GZIP compressed XML file)-------------------------
@@ -571,6 +586,7 @@ class RobotPost(object):
         
     def MoveJ(self, pose, joints, conf_RLF=None):
         """Add a joint movement"""
+        self.CYCLE_TIME.MoveJ(pose, joints)
         if pose is None:
             blend_radius = "0"
             self.LAST_POS_ABS = None
@@ -584,53 +600,86 @@ class RobotPost(object):
         else:
             self.addline('movej(%s,accel_radss,speed_rads,0,%s)' % (angles_2_str(joints), blend_radius))
     
-    def new_move(self, pose2):
-        '''Output the Extruder signal to have a constant flow 
-        given the amount of material that needs to be extruded, 
-        the distance between the 2 points and the robot speed'''
-        if self.PRINT_POSE_LAST is None:
+    def new_move(self, pose2, newline):
+        '''Buffer a linear move (program line) with the amount of material that needs to be extruded
+        and the distance between the 2 points. The Extruder signal is calculated by print_flush'''
+        if self.PRINT_POSE_LAST is None or pose2 is None:
             self.PRINT_POSE_LAST = pose2
+            self.addline(newline)
             return
            
-        def Calculate_Time(Dist, Vmax, Amax):
-            '''Calculate the time to move Dist with Amax acceleration and Vmax speed'''
-            tacc = Vmax/Amax;
-            Xacc = 0.5*Amax*tacc*tacc;
-            if Dist <= 2*Xacc:
-                # Vmax is not reached
-                tacc = sqrt(Dist/Amax)
-                Ttot = tacc*2
-            else:
-                # Vmax is reached
-                Xvmax = Dist - 2*Xacc
-                Tvmax = Xvmax/Vmax
-                Ttot = 2*tacc + Tvmax
-            return Ttot
-           
         add_material = self.PRINT_E_NEW - self.PRINT_E_LAST
         self.PRINT_E_LAST = self.PRINT_E_NEW
-            
-        if add_material > 0:
-            distance_mm = norm(subs3(self.PRINT_POSE_LAST.Pos(), pose2.Pos()))
-            # calculate movement time in seconds
-            time_s = Calculate_Time(distance_mm, self.SPEED_MMS, self.PRINT_ACCEL_MMSS)
-            # add material
-            signal = min(self.PRINT_FLOW_MAX_SIGNAL , self.PRINT_FLOW_2_SIGNAL * add_material/time_s)
-            self.setDO(self.PRINT_E_AO,"%.3f" % (signal))
-        else:
-            # DO not add material
-            self.setDO(self.PRINT_E_AO,"0")
+        distance_mm = norm(subs3(self.PRINT_POSE_LAST.Pos(), pose2.Pos()))
+        self.PRINT_MOVES.append([distance_mm, add_material, self.SPEED_MMS, newline])
         
         # Remember the last position
         self.PRINT_POSE_LAST = pose2            
+        if len(self.PRINT_MOVES) > self.PRINT_LOOKAHEAD:
+            # keep the last move until we know if the robot stops after it
+            self.print_flush(False, True)
+            
+    def print_flush(self, stop=False, keep_last=False):
+        '''Output the buffered moves with the Extruder signal to have a constant flow.
+        The time of each move takes into account the acceleration after a stop and the deceleration before a stop.
+        Signal updates that do not change the last signal (within PRINT_SIGNAL_TOLERANCE) are skipped'''
+        moves = self.PRINT_MOVES
+        if len(moves) == 0:
+            return
+        if keep_last:
+            self.PRINT_MOVES = moves[-1:]
+            moves = moves[:-1]
+        else:
+            self.PRINT_MOVES = []
+        
+        self.PRINT_FLUSHING = True
+        try:
+            self.print_moves(moves, stop)
+        finally:
+            self.PRINT_FLUSHING = False
+            
+    def print_moves(self, moves, stop):
+        '''Output moves with the Extruder signal (see print_flush)'''
+        # number of stops of each move (the robot stops between moves if we don't use blending)
+        if self.BLEND_RADIUS_M > 0:
+            nstops = [0]*len(moves)
+            if self.PRINT_STOPPED:
+                nstops[0] = nstops[0] + 1
+            if stop:
+                nstops[-1] = nstops[-1] + 1
+            self.PRINT_STOPPED = stop
+        else:
+            nstops = [2]*len(moves)
+            self.PRINT_STOPPED = True
+        
+        # calculate movement times in seconds
+        times = [move_time(move[0], move[2], self.PRINT_ACCEL_MMSS, n) for move, n in zip(moves, nstops)]
+        for move, time_s in zip(moves, times):
+            add_material = move[1]
+            if add_material > 0:
+                if time_s > 0:
+                    # add material
+                    signal = min(self.PRINT_FLOW_MAX_SIGNAL , self.PRINT_FLOW_2_SIGNAL * add_material/time_s)
+                    self.print_signal("%.3f" % (signal))
+            else:
+                # DO not add material
+                self.print_signal("0")
+            self.addline(move[3])
+            
+    def print_signal(self, signal_str):
+        '''Output the Extruder signal if it changed'''
+        signal = float(signal_str)
+        if self.PRINT_SIGNAL_LAST is not None and abs(signal - self.PRINT_SIGNAL_LAST) <= self.PRINT_SIGNAL_TOLERANCE:
+            return
+        self.PRINT_SIGNAL_LAST = signal
+        self.setDO(self.PRINT_E_AO, signal_str)
             
     def MoveL(self, pose, joints, conf_RLF=None):
         """Add a linear movement"""
+        self.CYCLE_TIME.MoveL(pose, joints)
         # Movement in joint space or Cartesian space should give the same result:
         # pose_wrt_base = self.REF_FRAME*pose
         # self.addline('movel(%s,accel_mss,speed_ms,0,blend_radius_m)' % (pose_2_str(pose_wrt_base)))
-        self.new_move(pose) # used for 3D printing
-        
         if pose is None:
             blend_radius = "0"
             self.LAST_POS = None
@@ -642,9 +691,10 @@ class RobotPost(object):
             self.LAST_POS_ABS = pose_abs.Pos()
             
         if self.USE_MOVEP:
-            self.addline('movep(%s,accel_mss,speed_ms,%s)' % (target, blend_radius))
+            newline = 'movep(%s,accel_mss,speed_ms,%s)' % (target, blend_radius)
         else:
-            self.addline('movel(%s,accel_mss,speed_ms,0,%s)' % (target, blend_radius))
+            newline = 'movel(%s,accel_mss,speed_ms,0,%s)' % (target, blend_radius)
+        self.new_move(pose, newline) # used for 3D printing
         
         
     def MoveC(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
@@ -664,6 +714,7 @@ class RobotPost(object):
             self.MoveL(pose2, joints2, conf_RLF_2)
             return
             
+        self.CYCLE_TIME.MoveC(pose1, joints1, pose2, joints2)
         blend_radius = self.blend_radius_check(pose1_abs, 0.2)
         #blend_radius = '%.3f' % (0.001*radius) #'0'
         #blend_radius = '0'
@@ -687,6 +738,8 @@ class RobotPost(object):
         
     def Pause(self, time_ms):
         """Pause the robot program"""
+        self.CYCLE_TIME.Pause(time_ms)
+        self.print_flush(True)
         if time_ms <= 0:
             self.addline('halt() # reimplement this function to force stop')
         else:
@@ -698,22 +751,26 @@ class RobotPost(object):
         #    self.USE_MOVEP = True
         #else:
         #    self.USE_MOVEP = False
+        self.CYCLE_TIME.setSpeed(speed_mms)
         self.SPEED_MMS = speed_mms
         self.SPEED_MS = speed_mms/1000.0        
         self.addline('speed_ms    = %.3f' % self.SPEED_MS)
         
     def setAcceleration(self, accel_mmss):
         """Changes the robot acceleration (in mm/s2)"""    
+        self.CYCLE_TIME.setAcceleration(accel_mmss)
         self.ACCEL_MSS = accel_mmss/1000.0
         self.addline('accel_mss   = %.3f' % self.ACCEL_MSS)
         
     def setSpeedJoints(self, speed_degs):
         """Changes the robot joint speed (in deg/s)"""
+        self.CYCLE_TIME.setSpeedJoints(speed_degs)
         self.SPEED_RADS = speed_degs*pi/180
         self.addline('speed_rads  = %.3f' % self.SPEED_RADS)
     
     def setAccelerationJoints(self, accel_degss):
         """Changes the robot joint acceleration (in deg/s2)"""
+        self.CYCLE_TIME.setAccelerationJoints(accel_degss)
         self.ACCEL_RADSS = accel_degss*pi/180
         self.addline('accel_radss = %.3f' % self.ACCEL_RADSS)
         
@@ -721,6 +778,7 @@ class RobotPost(object):
         """Changes the zone data approach (makes the movement more smooth)"""
         if zone_mm < 0:
             zone_mm = 0            
+        self.CYCLE_TIME.setZoneData(zone_mm)
         self.BLEND_RADIUS_M = zone_mm / 1000.0
         self.addline('blend_radius_m = %.3f' % self.BLEND_RADIUS_M)
         
@@ -741,6 +799,8 @@ class RobotPost(object):
         
     def waitDI(self, io_var, io_value, timeout_ms=-1):
         """Waits for an input io_var to attain a given value io_value. Optionally, a timeout can be provided."""
+        self.CYCLE_TIME.stop()
+        self.print_flush(True)
         if type(io_var) != str:  # set default variable name if io_var is a number
             io_var = 'get_standard_digital_in(%s)' % str(io_var)        
         if type(io_value) != str: # set default variable value if io_value is a number            
@@ -775,6 +835,9 @@ class RobotPost(object):
                 self.USE_MOVEP = False
                 return
             
+            self.CYCLE_TIME.stop()
+            self.print_flush(True)
+            self.PRINT_SIGNAL_LAST = None # the program call may change the Extruder signal
             if not code.endswith(')'):
                 code = code + '()'
             self.addline(code)
@@ -787,6 +850,7 @@ class RobotPost(object):
         if iscomment:
             self.addline('# ' + message)
         else:
+            self.print_flush(True)
             self.addline('popup("%s","Message",False,False,blocking=True)' % message)
         
 # ------------------ private ----------------------
@@ -809,9 +873,12 @@ class RobotPost(object):
         
     def addline(self, newline):
         """Add a program line"""
+        if not self.PRINT_FLUSHING:
+            self.print_flush()
         if self.nPROGS <= 1:
             if len(self.PROG) > self.MAX_LINES_X_PROG:
                 self.prog_2_list()
+                self.CYCLE_TIME.ProgStart(self.MAIN_PROGNAME, True)
                 
             self.PROG.append(self.TAB + newline)
         else:
@@ -869,8 +936,44 @@ def test_post():
     if len(robot.LOG) > 0:
         mbox('Program generation LOG:\n\n' + robot.LOG)
 
+    test_print_order()
+    test_print_subprogram()
     input("Press Enter to close...")
 
+def test_print_order():
+    """Check that the moves are output in order when the extruder lookahead window is exceeded"""
+    robot = RobotPost('Universal Robotics', 'Generic UR robot')
+    robot.PRINT_LOOKAHEAD = 3
+    robot.PROG = [] # program lines are class attributes shared with the previous test
+    robot.ProgStart("PrintOrder")
+    robot.setSpeed(100)
+    robot.MoveL(Pose([0, 0, 100, 180, 0, 180]), [0, -90, 90, 0, 90, 0])
+    for i in range(1, 11):
+        robot.RunCode("Extruder(%i)" % i, True)
+        robot.MoveL(Pose([10*i, 0, 100, 180, 0, 180]), [0, -90, 90, 0, 90, 0])
+    robot.ProgFinish("PrintOrder")
+    moves = [line for line in robot.PROG if line.strip().startswith('move')]
+    xs = [float(line.split('[')[1].split(',')[0]) for line in moves]
+    if xs != sorted(xs):
+        raise Exception('Moves are not output in order: %s' % str(xs))
+
+def test_print_subprogram():
+    """Check that a subprogram keeps the indentation of the buffered moves and sets its own Extruder signal"""
+    robot = RobotPost('Universal Robotics', 'Generic UR robot')
+    robot.PROG = [] # program lines are class attributes shared with the previous test
+    robot.SUBPROG = []
+    for progname in ["PrintMain", "PrintSub"]:
+        robot.ProgStart(progname)
+        robot.setSpeed(100)
+        robot.MoveL(Pose([0, 0, 100, 180, 0, 180]), [0, -90, 90, 0, 90, 0])
+        robot.MoveL(Pose([10, 0, 100, 180, 0, 180]), [0, -90, 90, 0, 90, 0])
+        robot.ProgFinish(progname)
+    body = robot.SUBPROG[robot.SUBPROG.index('def PrintSub():')+1:robot.SUBPROG.index('end')]
+    if len([line for line in body if not line.startswith('  ')]) > 0:
+        raise Exception('Subprogram lines are not indented: %s' % str(body))
+    if len([line for line in body if 'set_standard_digital_out' in line]) == 0:
+        raise Exception('Subprogram does not set the Extruder signal')
+
 if __name__ == "__main__":
     """Function to call when the module is executed by itself: test"""
     test_post()
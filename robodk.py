@@ -85,6 +85,188 @@ def FileExists(file):
     """Returns true if the file exists"""
     return os.path.exists(file)
 
+def write_formatted(fid, template, values):
+    """Writes a string template formatted with values to an open file (same result as fid.write(template % values)).
+    Values provided as a list of strings are written one after the other, the formatted text is never built in memory.
+    
+    :param fid: file object opened for writing
+    :param template: string template with % placeholders
+    :param values: tuple of values (a list of strings can be used for any %s placeholder)"""
+    import re
+    if type(values) is not tuple:
+        values = (values,)
+    parts = re.split(r'(%[-+ #0]*[0-9]*(?:\.[0-9]+)?[a-zA-Z%])', template)
+    ivalue = 0
+    for i in range(len(parts)):
+        if i % 2 == 0:
+            fid.write(parts[i])
+        elif parts[i] == '%%':
+            fid.write('%')
+        else:
+            value = values[ivalue]
+            ivalue = ivalue + 1
+            if type(value) is list:
+                fid.writelines(value)
+            else:
+                fid.write(parts[i] % value)
+
+def save_files(files, main=None, threads=4, sync=True):
+    """Saves a set of text files. The files are written at the same time to a temporary folder and moved to their final path once they are all written.
+    The main file is moved last: a controller that loads the main program never sees a partial set of files.
+    
+    :param files: list of [path, text] of the files to save
+    :param main: [path, text] of the main file (optional)
+    :param threads: number of files written at the same time
+    :type threads: int
+    :param sync: flush the files to disk (fsync) before moving them
+    :type sync: bool"""
+    import concurrent.futures
+    import os
+    import shutil
+    import tempfile
+    files = list(files)
+    if main is not None:
+        files.append(main)
+    if len(files) == 0:
+        return
+    folder_tmp = tempfile.mkdtemp(prefix='.save', dir=getFileDir(files[-1][0]) or '.')
+    def write(i):
+        file_tmp = folder_tmp + '/%i' % i
+        with open(file_tmp, 'w') as fid:
+            fid.write(files[i][1])
+            if sync:
+                fid.flush()
+                os.fsync(fid.fileno())
+        return file_tmp
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(threads, 1)) as pool:
+            files_tmp = list(pool.map(write, range(len(files))))
+        for i in range(len(files)):
+            os.replace(files_tmp[i], files[i][0])
+    finally:
+        shutil.rmtree(folder_tmp, True)
+
+class SpoolFile(object):
+    """Text file written while a program is generated, before its final path is known.
+    Lines are kept in memory until buffer_lines lines are added, then they are written to a temporary file. save() copies the temporary file to its final path.
+    The temporary file is removed when the file is saved or closed, or when the object is released if the program is never saved.
+    
+    :param suffix: extension of the temporary file (for example: '.tid')
+    :type suffix: str
+    :param buffer_lines: maximum number of lines kept in memory
+    :type buffer_lines: int"""
+    def __init__(self, suffix='', buffer_lines=1000):
+        self.suffix = suffix
+        self.buffer_lines = buffer_lines
+        self.buffer = []
+        self.fid = None
+        
+    def write(self, text):
+        """Adds text to the file"""
+        self.buffer.append(text)
+        if len(self.buffer) >= self.buffer_lines:
+            self.flush()
+            
+    def flush(self):
+        """Writes the buffered text to the temporary file"""
+        import tempfile
+        if self.fid is None:
+            self.fid = tempfile.NamedTemporaryFile('w+', suffix=self.suffix)
+        self.fid.writelines(self.buffer)
+        self.buffer = []
+        
+    def getvalue(self):
+        """Returns the text of the file"""
+        if self.fid is None:
+            return ''.join(self.buffer)
+        self.flush()
+        self.fid.seek(0)
+        text = self.fid.read()
+        self.fid.seek(0, 2)
+        return text
+            
+    def save(self, filesave):
+        """Saves the file to filesave. The file can be saved only once."""
+        import shutil
+        with open(filesave, 'w') as fid:
+            if self.fid is not None:
+                self.flush()
+                self.fid.seek(0)
+                shutil.copyfileobj(self.fid, fid)
+            fid.writelines(self.buffer)
+        self.close()
+        
+    def close(self):
+        """Discards the file"""
+        if self.fid is not None:
+            self.fid.close()
+            self.fid = None
+        self.buffer = []
+
+class CSVTargetWriter(object):
+    """Writes the targets of a program to a CSV file while the program is generated (see :class:`.SpoolFile`).
+    Rows are kept as lists of values and formatted in blocks of block_rows rows. The optional process function is called with the rows of each block before they are formatted, so that values that depend on other rows (such as the distance to the previous target, see :func:`~robodk.target_distances`) are calculated once per block.
+    
+    :param row_format: format of one row, without the line break (for example: '%i;%.4f;%.4f;%.4f')
+    :type row_format: str
+    :param block_rows: number of rows formatted and written at once
+    :type block_rows: int
+    :param process: function called with the list of rows of each block (rows can be modified)"""
+    def __init__(self, row_format, block_rows=1000, process=None):
+        self.row_format = row_format + '\n'
+        self.block_rows = block_rows
+        self.process = process
+        self.rows = []
+        self.nrows = 0
+        self.file = SpoolFile('.csv', 1)
+        self.time_start = None
+        self.time_end = None
+        
+    def add(self, row):
+        """Adds a row (list of values)"""
+        if self.time_start is None:
+            import time
+            self.time_start = time.perf_counter()
+        self.rows.append(row)
+        if len(self.rows) >= self.block_rows:
+            self.flush()
+            
+    def flush(self):
+        """Processes, formats and writes the pending rows"""
+        if len(self.rows) == 0:
+            return
+        import time
+        rows = self.rows
+        self.rows = []
+        if self.process is not None:
+            self.process(rows)
+        row_format = self.row_format
+        self.file.write(''.join([row_format % tuple(row) for row in rows]))
+        self.nrows = self.nrows + len(rows)
+        self.time_end = time.perf_counter()
+        
+    def getvalue(self):
+        """Returns the text of the file"""
+        self.flush()
+        return self.file.getvalue()
+        
+    def save(self, filesave):
+        """Saves the CSV file to filesave. The file can be saved only once."""
+        self.flush()
+        self.file.save(filesave)
+        
+    def close(self):
+        """Discards the CSV file"""
+        self.rows = []
+        self.file.close()
+        
+    def report(self):
+        """Returns the number of rows written and the row throughput"""
+        if self.nrows == 0 or self.time_end is None:
+            return 'CSV targets: %i rows' % self.nrows
+        elapsed = max(self.time_end - self.time_start, 1e-6)
+        return 'CSV targets: %i rows in %.3f s (%.0f rows/s)' % (self.nrows, elapsed, self.nrows/elapsed)
+
 #----------------------------------------------------
 #--------      Generic math usage     ---------------
 
@@ -701,6 +883,164 @@ def angles_2_joints(jin, type):
         jout[4] = -jin[4]
         jout[5] = -jin[5]
     return jout
+
+def fk_batch(dh_table, joints, dh_type='dh', robot_type=None, base=None, tool=None, degrees=True, frames=False):
+    """Returns the flange poses of a robot for many joint values at once, as an (N,4,4) numpy array.
+    The joint value i is added to the rz value of row i of the table.
+
+    :param dh_table: one row per axis: [rz,tx,tz,rx] for dh or [rx,tx,tz,rz] for dhm
+    :param joints: robot joints (list of N joint lists or (N,nAxes) array)
+    :param dh_type: 'dh' (see :func:`.dh`) or 'dhm' (see :func:`.dhm`)
+    :param robot_type: if not None, joints are converted to angles between links (see :func:`.joints_2_angles`)
+    :param base: robot base pose (Mat or 4x4 array)
+    :param tool: tool pose (Mat or 4x4 array)
+    :param degrees: True if the joints are in degrees
+    :param frames: return the list of the poses of each link (without base and tool) instead of the flange poses"""
+    import numpy as np
+    joints = np.array(joints, dtype=float)
+    if joints.ndim == 1:
+        joints = joints.reshape(1, -1)
+    joints = joints_2_angles_batch(joints, robot_type)
+    if degrees:
+        joints = joints*(pi/180)
+    n = joints.shape[0]
+    table = np.array(dh_table, dtype=float)
+    pose = np.tile(np.eye(4), (n,1,1))
+    link_frames = []
+    for i in range(len(table)):
+        if dh_type == 'dhm':
+            rx = np.full(n, table[i,0])
+            rz = table[i,3] + joints[:,i]
+        else:
+            rz = table[i,0] + joints[:,i]
+            rx = np.full(n, table[i,3])
+        tx = table[i,1]
+        tz = table[i,2]
+        crx = np.cos(rx)
+        srx = np.sin(rx)
+        crz = np.cos(rz)
+        srz = np.sin(rz)
+        link = np.zeros((n,4,4))
+        link[:,3,3] = 1
+        if dh_type == 'dhm':
+            link[:,0,0] = crz
+            link[:,0,1] = -srz
+            link[:,0,3] = tx
+            link[:,1,0] = crx*srz
+            link[:,1,1] = crx*crz
+            link[:,1,2] = -srx
+            link[:,1,3] = -tz*srx
+            link[:,2,0] = srx*srz
+            link[:,2,1] = crz*srx
+            link[:,2,2] = crx
+            link[:,2,3] = tz*crx
+        else:
+            link[:,0,0] = crz
+            link[:,0,1] = -srz*crx
+            link[:,0,2] = srz*srx
+            link[:,0,3] = tx*crz
+            link[:,1,0] = srz
+            link[:,1,1] = crz*crx
+            link[:,1,2] = -crz*srx
+            link[:,1,3] = tx*srz
+            link[:,2,1] = srx
+            link[:,2,2] = crx
+            link[:,2,3] = tz
+        pose = np.matmul(pose, link)
+        link_frames.append(pose)
+    if frames:
+        return link_frames
+    if base is not None:
+        pose = np.matmul(np.array(base.rows if isinstance(base, Mat) else base, dtype=float), pose)
+    if tool is not None:
+        pose = np.matmul(pose, np.array(tool.rows if isinstance(tool, Mat) else tool, dtype=float))
+    return pose
+
+def joints_2_angles_batch(joints, type):
+    """Same as :func:`.joints_2_angles` for an (N,nAxes) numpy array of joints. Returns a new array."""
+    joints = joints.copy()
+    if type == 2:
+        joints[:,2] = -joints[:,1] - joints[:,2]
+        joints[:,3:6] = -joints[:,3:6]
+    elif type == 3:
+        joints[:,2:6] = -joints[:,2:6]
+    elif type == 4:
+        joints[:,2] = joints[:,1] + joints[:,2]
+    return joints
+
+def fk_check(dh_table, joints, poses, tol_mm=0.01, tol_deg=0.01, **kwargs):
+    """Checks that the robot joints reach the poses. Returns the indices of the targets where the position or the orientation is out of tolerance.
+    Other arguments are passed to :func:`.fk_batch` (dh_type, robot_type, base, tool, degrees).
+
+    :param dh_table: robot D-H table (see :func:`.fk_batch`)
+    :param joints: robot joints (N joint lists)
+    :param poses: flange poses (N Mat poses or (N,4,4) array)
+    :param tol_mm: position tolerance in mm
+    :param tol_deg: orientation tolerance in degrees"""
+    import numpy as np
+    poses = np.array([p.rows if isinstance(p, Mat) else p for p in poses], dtype=float)
+    fk = fk_batch(dh_table, joints, **kwargs)
+    error_mm = np.linalg.norm(fk[:,0:3,3] - poses[:,0:3,3], axis=1)
+    # angle of the rotation between both poses, from the trace of fk^T*pose
+    cos_angle = (np.einsum('nij,nij->n', fk[:,0:3,0:3], poses[:,0:3,0:3]) - 1)/2
+    error_deg = np.arccos(np.clip(cos_angle, -1, 1))*(180/pi)
+    return np.nonzero((error_mm > tol_mm) | (error_deg > tol_deg))[0].tolist()
+
+def fk_config_batch(dh_table, joints, dh_type='dh', robot_type=None, degrees=True):
+    """Returns the configuration flags [rear, lower, flip] of a 6 axis robot for many joint values, as an (N,3) numpy array of 0 and 1.
+    The flags are computed from the geometry of the robot (rear: wrist behind the first axis, lower: elbow down, flip: negative wrist angle) and do not follow the convention of a specific controller: use them to detect configuration changes (see :func:`.config_changes`).
+
+    :param dh_table: robot D-H table (see :func:`.fk_batch`)
+    :param joints: robot joints (N joint lists)"""
+    import numpy as np
+    link_frames = fk_batch(dh_table, joints, dh_type, robot_type, degrees=degrees, frames=True)
+    # frame of each joint: with dh the axis of joint i+1 is the z axis of link i
+    if dh_type == 'dhm':
+        shoulder, elbow, wrist = link_frames[1], link_frames[2], link_frames[4]
+    else:
+        shoulder, elbow, wrist = link_frames[0], link_frames[1], link_frames[3]
+    arm = elbow[:,0:3,3] - shoulder[:,0:3,3]
+    forearm = wrist[:,0:3,3] - elbow[:,0:3,3]
+    rear = np.einsum('ni,ni->n', wrist[:,0:3,3], link_frames[0][:,0:3,0]) < 0
+    lower = np.einsum('ni,ni->n', np.cross(arm, forearm), shoulder[:,0:3,2]) > 0
+    angles = joints_2_angles_batch(np.array(joints, dtype=float).reshape(len(link_frames[0]), -1), robot_type)
+    angle5 = angles[:,4]*(pi/180 if degrees else 1) + np.array(dh_table, dtype=float)[4, 3 if dh_type == 'dhm' else 0]
+    flip = np.sin(angle5) < 0
+    return np.array([rear, lower, flip], dtype=int).T
+
+def config_changes(config):
+    """Returns the indices of the targets where the configuration flags change with respect to the previous target (see :func:`.fk_config_batch`)"""
+    import numpy as np
+    config = np.asarray(config)
+    return (np.nonzero(np.any(config[1:] != config[:-1], axis=1))[0] + 1).tolist()
+
+NUMPY_MODULE = False # numpy module (None if it is not installed), see numpy_module
+
+def numpy_module():
+    """Returns the numpy module, or None if numpy is not installed. The import is attempted only once."""
+    global NUMPY_MODULE
+    if NUMPY_MODULE is False:
+        try:
+            import numpy
+            NUMPY_MODULE = numpy
+        except ImportError:
+            NUMPY_MODULE = None
+    return NUMPY_MODULE
+
+def joints_2_pulses(joints, pulses_x_deg, pulses_zero=0):
+    """Converts a block of joint targets to encoder pulses: round(pulses_zero + joint*pulses_x_deg) for each axis.
+    Blocks of 8 targets or more are converted with a single array operation if numpy is available. Returns a list of pulse lists (one per target).
+
+    :param joints: robot joints (list of N joint lists)
+    :param pulses_x_deg: pulses per degree (or per mm) of each axis
+    :param pulses_zero: pulses at the zero position"""
+    np = numpy_module()
+    naxes = len(joints[0]) if len(joints) > 0 else 0
+    if np is None or len(joints) < 8 or any([len(j) != naxes for j in joints]):
+        return [[round(pulses_zero + j[i]*pulses_x_deg[i]) for i in range(len(j))] for j in joints]
+    # rint rounds half to even, like round
+    pulses = np.rint(pulses_zero + np.array(joints, dtype=float).reshape(len(joints), naxes)*np.array(pulses_x_deg[:naxes], dtype=float))
+    return pulses.astype(np.int64).tolist()
                 
 #----------------------------------------------------
 #-------- Useful geometric tools ---------------                   
@@ -708,6 +1048,24 @@ def angles_2_joints(jin, type):
 def norm(p):
     """Returns the norm of a 3D vector"""
     return sqrt(p[0]*p[0] + p[1]*p[1] + p[2]*p[2])
+
+def target_distances(points, last=None):
+    """Returns the distance between consecutive points of a block of targets. The first distance is measured from the last point of the previous block (None if last is None).
+    Blocks of 8 points or more are calculated with a single array operation if numpy is available.
+
+    :param points: list of N [x,y,z] points
+    :param last: last [x,y,z] point of the previous block"""
+    if last is not None:
+        points = [last] + list(points)
+    np = numpy_module()
+    if np is None or len(points) < 8:
+        distances = [norm(subs3(points[i], points[i-1])) for i in range(1, len(points))]
+    else:
+        xyz = np.array(points, dtype=float)
+        distances = np.sqrt(np.sum(np.diff(xyz, axis=0)**2, axis=1)).tolist()
+    if last is None and len(points) > 0:
+        distances.insert(0, None)
+    return distances
    
 def normalize3(a):
     """Returns the unitary vector"""
@@ -794,7 +1152,1219 @@ def fitPlane(points):
     vplane = B[0:3].tolist()
     return pplane, vplane  
 
+def circle_3points(p1, p2, p3):
+    """Returns the center and the radius of the circle that passes through 3 points. Returns None if the points are collinear"""
+    a = subs3(p1,p3)
+    b = subs3(p2,p3)
+    axb = cross(a,b)
+    axb2 = dot(axb,axb)
+    if axb2 <= 1e-12*dot(a,a)*dot(b,b):
+        return None
+    center = add3(p3, mult3(cross(subs3(mult3(b,dot(a,a)),mult3(a,dot(b,b))),axb), 0.5/axb2))
+    return center, distance(center,p3)
+
+#----------------------------------------------------
+#-------- Path filters for post processors ---------
+
+class MoveLFilter(object):
+    """Look-ahead stage in front of the linear movements of a post processor.
+    Linear targets are buffered using MoveL while the buffered run of targets fits(). Otherwise, the run is output and a new run starts.
+    Targets that are not buffered are passed to movel(pose, joints, conf_RLF).
+    The post processor must call flush() before adding any other program line and reset() when the reference frame, the tool or the robot position changes.
+
+    :param movel: function that outputs a linear movement
+    :param tolerance: position tolerance in mm (0 disables the filter)
+    :type tolerance: float
+    :param tolerance_deg: orientation tolerance in deg (the orientation must remain constant along the run)
+    :type tolerance_deg: float
+    :param max_points: maximum number of linear targets buffered in one run
+    :type max_points: int"""
+    def __init__(self, movel, tolerance=0, tolerance_deg=0.01, max_points=500):
+        self.movel = movel
+        self.tolerance = tolerance
+        self.tolerance_rad = tolerance_deg*pi/180
+        self.max_points = max_points
+        self.start = None   # last linear target that was output (start point of the next run)
+        self.run = []       # buffered linear targets after the start target
+
+    def MoveL(self, pose, joints, conf_RLF=None):
+        """Add a linear movement"""
+        if self.tolerance <= 0 or pose is None:
+            self.reset()
+            self.movel(pose, joints, conf_RLF)
+            return
+
+        target = (pose, joints, conf_RLF)
+        if self.start is None:
+            self.movel(pose, joints, conf_RLF)
+            self.start = target
+            return
+
+        run = self.run + [target]
+        if len(run) > 1 and (len(run) > self.max_points or not self.fits(run)):
+            self.flush()
+            run = [target]
+        self.run = run
+
+    def same_orientation(self, pose, joints):
+        """Returns True if the orientation and the external axes of a target match the start target"""
+        pose0, joints0, conf0 = self.start
+        if pose_angle_between(pose0, pose) > self.tolerance_rad:
+            return False
+        if joints is not None and joints0 is not None and list(joints[6:]) != list(joints0[6:]):
+            return False
+        return True
+
+    def fits(self, run):
+        """Returns True if the run of targets can be output as one movement"""
+        return False
+
+    def output(self, run):
+        """Output a run of two or more buffered targets"""
+        for target in run:
+            self.movel(*target)
+
+    def flush(self):
+        """Output the buffered linear targets"""
+        run = self.run
+        if len(run) == 0:
+            return
+        self.run = []
+        if len(run) == 1:
+            self.movel(*run[0])
+        else:
+            self.output(run)
+        self.start = run[-1]
+
+    def reset(self):
+        """Output the buffered linear targets and forget the start point of the next run"""
+        self.flush()
+        self.start = None
+
+class ArcFitter(MoveLFilter):
+    """Look-ahead stage that collapses runs of linear movements lying on a circular arc into circular movements.
+    Fitted runs are passed to movec(pose1, joints1, pose2, joints2, conf_RLF_1, conf_RLF_2) using the middle and the last target of the run.
+    See :class:`.MoveLFilter`.
+
+    :param movel: function that outputs a linear movement
+    :param movec: function that outputs a circular movement
+    :param tolerance: chord tolerance in mm (0 disables arc fitting)
+    :type tolerance: float"""
+    def __init__(self, movel, movec, tolerance=0, tolerance_deg=0.01, max_points=500):
+        MoveLFilter.__init__(self, movel, tolerance, tolerance_deg, max_points)
+        self.movec = movec
+
+    def fits(self, run):
+        """Returns True if the start target and the run of targets lie on a circular arc within the tolerance"""
+        p0 = self.start[0].Pos()
+        pmid = run[(len(run)-1)//2][0].Pos()
+        pend = run[-1][0].Pos()
+        circle = circle_3points(p0, pmid, pend)
+        if circle is None:
+            return False
+
+        center, radius = circle
+        normal = normalize3(cross(subs3(pmid,p0), subs3(pend,pmid)))
+        u = subs3(p0,center)
+        w = cross(normal,u)
+        theta_last = 0
+        for pose, joints, conf_RLF in run:
+            if not self.same_orientation(pose, joints):
+                return False
+
+            v = subs3(pose.Pos(),center)
+            if abs(dot(v,normal)) > self.tolerance or abs(norm(v) - radius) > self.tolerance:
+                return False
+
+            # targets must progress along the arc and each chord must remain within the tolerance
+            theta = atan2(dot(v,w), dot(v,u))
+            if theta < 0:
+                theta = theta + 2*pi
+            step = theta - theta_last
+            if step <= 0 or step > pi or radius*(1-cos(0.5*step)) > self.tolerance:
+                return False
+            theta_last = theta
+
+        return True
+
+    def output(self, run):
+        """Output a run of targets as a circular movement"""
+        pose1, joints1, conf_RLF_1 = run[(len(run)-1)//2]
+        pose2, joints2, conf_RLF_2 = run[-1]
+        self.movec(pose1, joints1, pose2, joints2, conf_RLF_1, conf_RLF_2)
+
+class CollinearFilter(MoveLFilter):
+    """Look-ahead stage that merges runs of collinear linear movements with the same orientation into one linear movement.
+    The start and the end target of each run are kept. See :class:`.MoveLFilter`.
+
+    :param movel: function that outputs a linear movement
+    :param tolerance: maximum distance in mm from the merged targets to the resulting line (0 disables the filter)
+    :type tolerance: float
+    :param tolerance_deg: maximum orientation change in deg from the start target of the run
+    :type tolerance_deg: float"""
+    def fits(self, run):
+        """Returns True if the run of targets lies on the line between the start target and the last target within the tolerance"""
+        p0 = self.start[0].Pos()
+        vline = subs3(run[-1][0].Pos(),p0)
+        length2 = dot(vline,vline)
+        if length2 <= 0:
+            return False
+
+        t_last = 0
+        for pose, joints, conf_RLF in run:
+            if not self.same_orientation(pose, joints):
+                return False
+
+            # targets must progress along the line and remain within the tolerance
+            v = subs3(pose.Pos(),p0)
+            t = dot(v,vline)/length2
+            if t <= t_last or t > 1:
+                return False
+            if norm(subs3(v,mult3(vline,t))) > self.tolerance:
+                return False
+            t_last = t
+
+        return True
+
+    def output(self, run):
+        """Output the last target of the run (intermediate targets are skipped)"""
+        self.movel(*run[-1])
+
+#----------------------------------------------------
+#-------- Cycle time estimation ---------------
+
+def move_time(dist, vmax, amax, nstops=2):
+    """Returns the time in seconds to move a distance using a trapezoidal speed profile.
+    
+    :param dist: distance to move (mm or deg)
+    :param vmax: maximum speed (mm/s or deg/s)
+    :param amax: acceleration (mm/s2 or deg/s2)
+    :param nstops: number of ends of the movement where the robot stands still (2: the robot stops at the start and at the end, 0: blended movement at constant speed)
+    :type nstops: int"""
+    if dist <= 0 or vmax <= 0:
+        return 0
+    if amax <= 0:
+        return dist/vmax
+    tacc = vmax/amax
+    xacc = 0.5*amax*tacc*tacc
+    if dist <= nstops*xacc:
+        # vmax is not reached
+        tacc = sqrt(2*dist/(nstops*amax))
+        return nstops*tacc
+    # vmax is reached
+    return nstops*tacc + (dist - nstops*xacc)/vmax
+
+class CycleTimeEstimator(object):
+    """Estimates the cycle time of the programs generated by a post processor without running the simulation.
+    The post processor must forward the program, motion and speed calls (same names and arguments as the post processor methods).
+    The time of each instruction is calculated using a trapezoidal speed profile (see :func:`.move_time`). Blended movements (zone data > 0) do not stop the robot.
+    The estimated time is accumulated per instruction, per page and per program.
+
+    :param speed_mms: default linear speed (mm/s)
+    :param accel_mmss: default linear acceleration (mm/s2)
+    :param speed_degs: default joint speed (deg/s)
+    :param accel_degss: default joint acceleration (deg/s2)
+    :param zone_mm: default zone data (mm)"""
+    def __init__(self, speed_mms=100, accel_mmss=1000, speed_degs=30, accel_degss=300, zone_mm=0):
+        self.speed_mms = speed_mms
+        self.accel_mmss = accel_mmss
+        self.speed_degs = speed_degs
+        self.accel_degss = accel_degss
+        self.zone_mm = zone_mm
+        self.last_pose = None       # last robot pose (if known)
+        self.last_joints = None     # last robot joints (if known)
+        self.blending = False       # True if the robot does not stop at the end of the last movement
+        self.last_time = 0          # estimated time of the last instruction (s)
+        self.programs = []          # list of [progname, pages], each page is [time_s, instructions]
+
+    def ProgStart(self, progname, new_page=False):
+        """Start accumulating the time of a new program (or a new page of the current program)"""
+        if new_page and len(self.programs) > 0:
+            self.programs[-1][1].append([0, 0])
+        else:
+            self.programs.append([progname, [[0, 0]]])
+
+    def add(self, time_s):
+        """Add the time of one instruction to the current page and program"""
+        if len(self.programs) == 0:
+            self.ProgStart('Program')
+        page = self.programs[-1][1][-1]
+        page[0] = page[0] + time_s
+        page[1] = page[1] + 1
+        self.last_time = time_s
+        return time_s
+
+    def stop(self):
+        """Mark that the robot stands still (for example, when waiting for an input or calling a program)"""
+        self.blending = False
+
+    def move(self, dist, vmax, amax):
+        """Add the time of a movement given the distance, the speed and the acceleration"""
+        nstops = 0 if self.blending else 1
+        self.blending = self.zone_mm > 0
+        if not self.blending:
+            nstops = nstops + 1
+        return self.add(move_time(dist, vmax, amax, nstops))
+
+    def joints_distance(self, joints):
+        """Returns the largest joint displacement from the last robot joints (in deg or mm)"""
+        if joints is None or self.last_joints is None:
+            return 0
+        njoints = min(len(joints), len(self.last_joints))
+        if njoints == 0:
+            return 0
+        return max([abs(joints[i] - self.last_joints[i]) for i in range(njoints)])
+
+    def MoveJ(self, pose, joints, conf_RLF=None):
+        """Add the time of a joint movement"""
+        time_s = self.move(self.joints_distance(joints), self.speed_degs, self.accel_degss)
+        self.last_pose = pose
+        self.last_joints = joints
+        return time_s
+
+    def MoveL(self, pose, joints, conf_RLF=None):
+        """Add the time of a linear movement"""
+        if pose is not None and self.last_pose is not None:
+            time_s = self.move(distance(pose.Pos(), self.last_pose.Pos()), self.speed_mms, self.accel_mmss)
+        else:
+            time_s = self.move(self.joints_distance(joints), self.speed_degs, self.accel_degss)
+        self.last_pose = pose
+        self.last_joints = joints
+        return time_s
+
+    def MoveC(self, pose1, joints1, pose2, joints2, conf_RLF_1=None, conf_RLF_2=None):
+        """Add the time of a circular movement"""
+        if pose1 is None or pose2 is None or self.last_pose is None:
+            self.last_joints = joints1
+            return self.MoveL(pose2, joints2)
+
+        p0 = self.last_pose.Pos()
+        p1 = pose1.Pos()
+        p2 = pose2.Pos()
+        circle = circle_3points(p0, p1, p2)
+        if circle is None:
+            dist = distance(p0, p1) + distance(p1, p2)
+        else:
+            center, radius = circle
+            v1 = subs3(p1, center)
+            dist = radius*(angle3(subs3(p0, center), v1) + angle3(v1, subs3(p2, center)))
+        time_s = self.move(dist, self.speed_mms, self.accel_mmss)
+        self.last_pose = pose2
+        self.last_joints = joints2
+        return time_s
+
+    def Pause(self, time_ms):
+        """Add the time of a pause (a pause that waits for the user does not add time)"""
+        self.stop()
+        return self.add(max(time_ms, 0)*0.001)
+
+    def setSpeed(self, speed_mms):
+        """Changes the linear speed (in mm/s)"""
+        self.speed_mms = speed_mms
+
+    def setAcceleration(self, accel_mmss):
+        """Changes the linear acceleration (in mm/s2)"""
+        self.accel_mmss = accel_mmss
+
+    def setSpeedJoints(self, speed_degs):
+        """Changes the joint speed (in deg/s)"""
+        self.speed_degs = speed_degs
+
+    def setAccelerationJoints(self, accel_degss):
+        """Changes the joint acceleration (in deg/s2)"""
+        self.accel_degss = accel_degss
+
+    def setZoneData(self, zone_mm):
+        """Changes the zone data (in mm). The robot does not stop at the end of the movements if the zone data is greater than 0"""
+        self.zone_mm = zone_mm
+
+    def time(self, progname=None):
+        """Returns the estimated time of a program in seconds (all programs by default)"""
+        time_s = 0
+        for name, pages in self.programs:
+            if progname is None or name == progname:
+                time_s = time_s + sum([page[0] for page in pages])
+        return time_s
+
+    def report(self):
+        """Returns the estimated cycle time report as a string"""
+        report = 'Estimated cycle time: %.3f s\n' % self.time()
+        for name, pages in self.programs:
+            ninstructions = sum([page[1] for page in pages])
+            report = report + '  %s: %.3f s (%i instructions)\n' % (name, sum([page[0] for page in pages]), ninstructions)
+            if len(pages) > 1:
+                for i in range(len(pages)):
+                    report = report + '    Page %i: %.3f s (%i instructions)\n' % (i+1, pages[i][0], pages[i][1])
+        return report
+
+
+#----------------------------------------------------
+#-------- Program pages ---------------
+
+class ProgramPager(object):
+    """Decides when a program must be split in a new page (file). A page can be limited by a number of lines, a size in bytes and/or a number of targets.
+    The size is counted as lines are added. Pages are never split inside a logical block (see :func:`~robodk.ProgramPager.block_start`).
+
+    :param max_lines: maximum number of lines per page (0 means no limit)
+    :type max_lines: int
+    :param max_bytes: maximum size of each page in bytes (0 means no limit)
+    :type max_bytes: int
+    :param max_targets: maximum number of targets per page (0 means no limit)
+    :type max_targets: int
+    :param reserve_bytes: size of the text added to each page outside the counted lines (file header, page footer, ...)
+    :type reserve_bytes: int"""
+    def __init__(self, max_lines=0, max_bytes=0, max_targets=0, reserve_bytes=0):
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.max_targets = max_targets
+        self.reserve_bytes = reserve_bytes
+        self.lines = 0
+        self.bytes = 0
+        self.targets = 0
+        self.block = 0
+
+    def reset(self):
+        """Start counting a new page"""
+        self.lines = 0
+        self.bytes = 0
+        self.targets = 0
+
+    def add(self, text, nlines=1):
+        """Count a program line (text without the line break). Use nlines=0 to count the size of text added as a whole, such as a header."""
+        self.lines = self.lines + nlines
+        self.bytes = self.bytes + len(text) + nlines
+
+    def add_target(self, ntargets=1):
+        """Count a new target (call it once for each target of a movement)"""
+        self.targets = self.targets + ntargets
+
+    def block_start(self):
+        """Start a logical block that must remain in the same page (blocks can be nested)"""
+        self.block = self.block + 1
+
+    def block_end(self):
+        """End the last logical block started"""
+        self.block = max(0, self.block - 1)
+
+    def full(self, newline='', nlines=1):
+        """Returns True if a new page must be started before adding the line newline (or the block of nlines lines newline)"""
+        if self.block > 0 or self.lines == 0:
+            return False
+        if self.max_lines > 0 and self.lines + nlines - 1 > self.max_lines:
+            return True
+        if self.max_bytes > 0 and self.bytes + len(newline) + 1 + self.reserve_bytes > self.max_bytes:
+            return True
+        if self.max_targets > 0 and self.targets >= self.max_targets:
+            return True
+        return False
+
+class NumberedLines(object):
+    """Program lines numbered when the program is written. Iterating returns the header lines, the numbered program lines and the footer lines.
+    Lines are stored without their number: header lines can be added at any time without renumbering or shifting the program. Call reset to start the numbering again on a new page.
+
+    :param line_format: format of a numbered line given the line number and the line (for example: '%4i:%s' or 'N%02i %s')
+    :type line_format: str
+    :param start: number of the first line
+    :type start: int
+    :param step: increment of the line number
+    :type step: int"""
+    def __init__(self, line_format='%i %s', start=1, step=1):
+        self.line_format = line_format
+        self.start = start
+        self.step = step
+        self.reset()
+
+    def reset(self):
+        """Removes all the lines and starts the numbering again"""
+        self.header = [] # lines before the program (not numbered)
+        self.footer = [] # lines after the program (not numbered)
+        self.lines = []
+        self.numbers = {} # number of the lines that do not follow the previous numbered line (None for lines without number)
+        self.number = self.start - self.step # last number used
+        self.number_line = self.number # number of the last numbered line
+
+    def add(self, line):
+        """Adds a numbered line. Returns the line number."""
+        self.number = self.number + self.step
+        if self.number != self.number_line + self.step:
+            self.numbers[len(self.lines)] = self.number
+        self.number_line = self.number
+        self.lines.append(line)
+        return self.number
+
+    def add_unnumbered(self, line):
+        """Adds a line without number (such as a comment) to the program"""
+        self.numbers[len(self.lines)] = None
+        self.lines.append(line)
+
+    def skip(self, count=1):
+        """Skips line numbers. Returns the last number skipped."""
+        self.number = self.number + self.step*count
+        return self.number
+
+    def __iter__(self):
+        for line in self.header:
+            yield line
+        if len(self.numbers) == 0:
+            numbers = range(self.start, self.start + self.step*len(self.lines), self.step)
+            for line in map(self.line_format.__mod__, zip(numbers, self.lines)):
+                yield line
+        else:
+            number = self.start - self.step
+            for i in range(len(self.lines)):
+                if i in self.numbers:
+                    if self.numbers[i] is None:
+                        yield self.lines[i]
+                        continue
+                    number = self.numbers[i]
+                else:
+                    number = number + self.step
+                yield self.line_format % (number, self.lines[i])
+        for line in self.footer:
+            yield line
+
+    def text(self):
+        """Returns the program text, each line followed by a new line"""
+        return ''.join([line + '\n' for line in self])
+
+class ProgramPage(object):
+    """Page (file) of a program made of segments that are written in order: lists of lines or any object that iterates over lines (such as :class:`.NumberedLines`).
+    Segments are not copied when the page is assembled: headers and target sections are added as new segments instead of being inserted in the program lines.
+    Iterating returns the lines of all the segments.
+
+    :param segments: list of segments
+    :type segments: list"""
+    def __init__(self, segments=None):
+        self.segments = segments if segments is not None else []
+
+    def add(self, segment):
+        """Adds a segment at the end of the page"""
+        self.segments.append(segment)
+
+    def __iter__(self):
+        for segment in self.segments:
+            for line in segment:
+                yield line
+
+class PageManifest(object):
+    """Remembers the hash of each file (page) of a program saved in a folder, so that only the pages that changed since the last time are saved again.
+    The hash of each file sent to the robot is recorded separately once the upload succeeds, so that the pages of a failed upload are sent again the next time (see :func:`~robodk.PageManifest.unsent`).
+    The manifest is a JSON file saved in the same folder as the program files.
+    The files of the previous version that are not part of the program anymore are removed when the manifest is saved.
+
+    :param manifest_file: path of the manifest file
+    :type manifest_file: str"""
+    def __init__(self, manifest_file):
+        import json
+        self.file = manifest_file
+        self.previous = {}
+        self.current = {}
+        self.sent = {}
+        if FileExists(manifest_file):
+            try:
+                with open(manifest_file, 'r') as fid:
+                    data = json.load(fid)
+                self.previous = data.get('saved', {})
+                self.sent = data.get('sent', {})
+            except (ValueError, AttributeError):
+                self.previous = {}
+                self.sent = {}
+
+    def changed(self, filesave, text):
+        """Returns True if the file must be saved (the text changed since the last time or the file does not exist). The new hash is recorded.
+
+        :param filesave: path of the program file
+        :param text: contents of the program file"""
+        import hashlib
+        return self.changed_digest(filesave, hashlib.sha1(text.encode('utf-8')).hexdigest())
+
+    def changed_digest(self, filesave, digest):
+        """Same as :func:`~robodk.PageManifest.changed` for a file with a known hash (SHA-1 hex digest of the contents)"""
+        name = getBaseName(filesave)
+        self.current[name] = digest
+        return self.previous.get(name) != digest or not FileExists(filesave)
+
+    def unsent(self, files):
+        """Returns the files that must be sent to the robot: files that changed since the last successful upload (see :func:`~robodk.PageManifest.set_sent`)
+
+        :param files: paths of the program files
+        :type files: list of str"""
+        return [filesave for filesave in files if self.sent.get(getBaseName(filesave)) != self.current.get(getBaseName(filesave))]
+
+    def set_sent(self, files):
+        """Records that the files were sent to the robot successfully and saves the manifest
+
+        :param files: paths of the program files
+        :type files: list of str"""
+        for filesave in files:
+            name = getBaseName(filesave)
+            if name in self.current:
+                self.sent[name] = self.current[name]
+        self.save()
+
+    def save(self):
+        """Saves the manifest and removes the files of the previous version that are not used anymore"""
+        import json
+        folder = getFileDir(self.file)
+        for name in self.previous:
+            if name not in self.current and FileExists(os.path.join(folder, name)):
+                os.remove(os.path.join(folder, name))
+        self.previous = dict(self.current)
+        self.sent = dict([(name, digest) for name, digest in self.sent.items() if name in self.current])
+        with open(self.file, 'w') as fid:
+            json.dump({'saved':self.current, 'sent':self.sent}, fid, indent=1, sort_keys=True)
+
+class PageWriter(object):
+    """Writes the pages (files) of a program as soon as each page is complete. Pages are written to a temporary folder because the program folder is only known when the program is saved.
+    save() moves the pages to the program folder. The names of the pages (see :func:`~robodk.PageWriter.index`) are used to generate the main program.
+
+    :param header: text written at the start of each page (file header)
+    :type header: str
+    :param extension: extension of the page files
+    :type extension: str"""
+    def __init__(self, header='', extension=''):
+        self.header = header
+        self.extension = extension
+        self.folder = None
+        self.names = []
+        self.digests = []
+        self.time_start = None
+        self.time_end = None
+
+    def add(self, name, text):
+        """Writes a complete page
+
+        :param name: program name of the page (file name without extension)
+        :param text: program text of the page (without the header)"""
+        import hashlib
+        import tempfile
+        import time
+        if self.folder is None:
+            self.folder = tempfile.mkdtemp(prefix='pages')
+            self.time_start = time.perf_counter()
+        text = self.header + text
+        with open(self.folder + '/%i' % len(self.names), 'w') as fid:
+            fid.write(text)
+        self.names.append(name)
+        self.digests.append(hashlib.sha1(text.encode('utf-8')).hexdigest())
+        self.time_end = time.perf_counter()
+
+    def index(self):
+        """Returns the names of the pages, in order"""
+        return self.names
+
+    def save(self, folder, manifest=None):
+        """Moves the pages to the program folder. Pages that did not change according to the manifest (see :class:`.PageManifest`) are not replaced.
+        Returns a list of [path, changed] for each page."""
+        import shutil
+        saved = []
+        for i in range(len(self.names)):
+            filesave = folder + '/' + self.names[i] + '.' + self.extension
+            changed = manifest is None or manifest.changed_digest(filesave, self.digests[i])
+            if changed:
+                shutil.move(self.folder + '/%i' % i, filesave)
+            saved.append([filesave, changed])
+        self.close()
+        return saved
+
+    def close(self):
+        """Discards the pages that were not saved"""
+        import shutil
+        if self.folder is not None:
+            shutil.rmtree(self.folder, True)
+            self.folder = None
+
+    def report(self):
+        """Returns the number of pages written and the pages written per second"""
+        if len(self.names) == 0:
+            return 'Pages: 0'
+        elapsed = max(self.time_end - self.time_start, 1e-6)
+        return 'Pages: %i written in %.3f s (%.1f pages/s)' % (len(self.names), elapsed, len(self.names)/elapsed)
+
+
+#----------------------------------------------------
+#-------- Program line templates ---------------
+
+def bind_template(template, values):
+    """Formats some fields of a string template and returns a template for the remaining fields.
+    For example, bind_template('MoveL %s,%s,%s;', [None, 'v100', 'z1']) returns 'MoveL %s,v100,z1;'.
+
+    :param template: string template with % placeholders
+    :param values: one value for each placeholder of the template (None leaves the placeholder for later)
+    :type values: list"""
+    import re
+    parts = re.split(r'(%[-+ #0]*[0-9]*(?:\.[0-9]+)?[a-zA-Z%])', template)
+    ivalue = 0
+    for i in range(1, len(parts), 2):
+        if parts[i] == '%%':
+            continue
+        value = values[ivalue]
+        ivalue = ivalue + 1
+        if value is not None:
+            parts[i] = (parts[i] % value).replace('%', '%%')
+    return ''.join(parts)
+
+class LineTemplates(object):
+    """Cache of program line templates with the modal values (tool, frame, speed, zone, ...) already formatted.
+    Only the fields that change for each line (targets, target names, ...) remain to be formatted.
+    Call :func:`~robodk.LineTemplates.reset` when a modal value changes."""
+    def __init__(self):
+        self.templates = {}
+
+    def reset(self):
+        """Forget all templates (a modal value changed)"""
+        self.templates = {}
+
+    def get(self, key, template, values):
+        """Returns the template named key, formatting the modal values the first time (see :func:`~robodk.bind_template`)
+
+        :param key: template name
+        :param template: string template with % placeholders
+        :param values: modal values for the template (None for the fields formatted for each line)
+        :type values: list"""
+        line = self.templates.get(key)
+        if line is None:
+            line = bind_template(template, values)
+            self.templates[key] = line
+        return line
+
+class DataRecords(object):
+    """Data records shared by all the instructions that use the same parameters (for example, the KUKA PDAT and LDAT motion data).
+    Each distinct record is declared once, when it is first used, and records are numbered in that order. Instructions reference a record by its number.
+
+    :param declaration: declaration line template: the record number (%s) followed by the record parameters
+    :type declaration: str"""
+    def __init__(self, declaration):
+        self.declaration = declaration
+        self.ids = {}
+
+    def get(self, values, lines):
+        """Returns the number of the record with the given parameters (as a string). The declaration of a new record is added to lines.
+
+        :param values: record parameters
+        :type values: tuple
+        :param lines: declaration lines (such as the lines of a KUKA DAT file)
+        :type lines: list"""
+        record_id = self.ids.get(values)
+        if record_id is None:
+            record_id = '%i' % (len(self.ids) + 1)
+            self.ids[values] = record_id
+            lines.append(self.declaration % ((record_id,) + values))
+        return record_id
+
+
+#----------------------------------------------------
+#-------- Number formatting ---------------
+
+FORMAT_PATTERNS = {}
+
+def format_pattern(nvalues, fmt='%.3f', sep=',', labels=None):
+    """Returns the format pattern for nvalues numbers (cached). Optional labels are written before each value (for example, 'A1 ').
+
+    :param nvalues: number of values
+    :type nvalues: int
+    :param fmt: format of each value
+    :type fmt: str
+    :param sep: separator between values
+    :type sep: str
+    :param labels: label of each value
+    :type labels: list of str"""
+    key = (nvalues, fmt, sep, None if labels is None else tuple(labels[:nvalues]))
+    pattern = FORMAT_PATTERNS.get(key)
+    if pattern is None:
+        if labels is None:
+            pattern = sep.join([fmt]*nvalues)
+        else:
+            pattern = sep.join([labels[i].replace('%','%%') + fmt for i in range(nvalues)])
+        FORMAT_PATTERNS[key] = pattern
+    return pattern
+
+def format_values(values, fmt='%.3f', sep=',', labels=None):
+    """Formats a list of numbers at a fixed precision in one call. The result is the same as sep.join([fmt % v for v in values]).
+
+    :param values: list of numbers
+    :type values: list of float
+    :param fmt: format of each value
+    :type fmt: str
+    :param sep: separator between values
+    :type sep: str
+    :param labels: label of each value (optional)
+    :type labels: list of str"""
+    return format_pattern(len(values), fmt, sep, labels) % tuple(values)
+
+def format_block(rows, fmt='%.3f', sep=',', newline='\n', labels=None):
+    """Formats a block of rows of numbers (for example, a list of joint targets), with one line per row. All rows must have the same size.
+    The result is the same as newline.join([format_values(row, fmt, sep, labels) for row in rows]).
+
+    :param rows: list of rows of numbers
+    :type rows: list of list of float
+    :param fmt: format of each value
+    :type fmt: str
+    :param sep: separator between values
+    :type sep: str
+    :param newline: separator between rows
+    :type newline: str
+    :param labels: label of each value (optional)
+    :type labels: list of str"""
+    if len(rows) == 0:
+        return ''
+    pattern = format_pattern(len(rows[0]), fmt, sep, labels)
+    values = []
+    for row in rows:
+        values.extend(row)
+    return newline.join([pattern]*len(rows)) % tuple(values)
+
+
+#----------------------------------------------------
+#-------- Program cache ---------------
+
+def hash_update(hasher, value):
+    """Adds a value (number, string, list, pose, ...) to a hash object. Numbers are added with full precision.
+
+    :param hasher: hash object (see hashlib)
+    :param value: value to add"""
+    if isinstance(value, Mat):
+        hasher.update(b'M')
+        hash_update(hasher, value.rows)
+    elif isinstance(value, (list, tuple)):
+        hasher.update(b'[')
+        for item in value:
+            hash_update(hasher, item)
+            hasher.update(b',')
+        hasher.update(b']')
+    elif isinstance(value, dict):
+        hash_update(hasher, sorted(value.items()))
+    else:
+        hasher.update(repr(value).encode('utf-8'))
+
+class ProgramCache(object):
+    """On-disk cache of generated programs. Each entry is a folder named after the hash of the program and holds the files generated by ProgSave and a meta.json file.
+    The least recently used entries are removed when the cache gets bigger than max_size.
+
+    :param folder: cache folder (a RoboDK_PostCache folder in the temporary folder by default)
+    :type folder: str
+    :param max_size: maximum size of the cache in bytes
+    :type max_size: int"""
+    def __init__(self, folder=None, max_size=500e6):
+        import os
+        import tempfile
+        if folder is None:
+            folder = os.path.join(tempfile.gettempdir(), 'RoboDK_PostCache')
+        self.folder = folder
+        self.max_size = max_size
+        self.size = None # size of the cache in bytes (None until the cache folder is scanned by evict)
+
+    def entry(self, key):
+        """Returns the folder of the cache entry key"""
+        return self.folder + '/' + key
+
+    def get(self, key):
+        """Returns the metadata of the entry key, or None if the program is not in the cache"""
+        import json
+        import os
+        meta_file = self.entry(key) + '/meta.json'
+        if not FileExists(meta_file):
+            return None
+        with open(meta_file, 'r') as fid:
+            meta = json.load(fid)
+        os.utime(meta_file) # the modification time of meta.json is the last time the entry was used
+        return meta
+
+    def restore(self, key, meta, folder):
+        """Copies the files of the entry key to folder. Files are copied (not hard-linked): posts overwrite the program files in place, which would modify the cache entry."""
+        import os
+        import shutil
+        for filename in meta['files']:
+            file_src = self.entry(key) + '/files/' + filename
+            file_dst = folder + '/' + filename
+            if not DirExists(getFileDir(file_dst)):
+                os.makedirs(getFileDir(file_dst))
+            shutil.copyfile(file_src, file_dst)
+
+    def store(self, key, meta, folder):
+        """Adds the files meta['files'] of folder (relative paths) to the cache as entry key"""
+        import json
+        import os
+        import shutil
+        folder_tmp = self.entry(key) + '.tmp%i' % os.getpid()
+        size = 0
+        for filename in meta['files']:
+            file_dst = folder_tmp + '/files/' + filename
+            if not DirExists(getFileDir(file_dst)):
+                os.makedirs(getFileDir(file_dst))
+            shutil.copyfile(folder + '/' + filename, file_dst)
+            size = size + os.path.getsize(file_dst)
+        with open(folder_tmp + '/meta.json', 'w') as fid:
+            json.dump(meta, fid)
+        size = size + os.path.getsize(folder_tmp + '/meta.json')
+        try:
+            os.rename(folder_tmp, self.entry(key))
+            if self.size is not None:
+                self.size = self.size + size
+        except OSError:
+            # another process added the same program
+            shutil.rmtree(folder_tmp, True)
+        # the cache folder is scanned the first time and when the cache gets too big
+        if self.size is None or self.size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        """Removes the least recently used entries until the cache is smaller than max_size"""
+        import os
+        import shutil
+        entries = []
+        size_total = 0
+        for key in os.listdir(self.folder):
+            meta_file = self.entry(key) + '/meta.json'
+            if not FileExists(meta_file):
+                continue
+            size = 0
+            for path, dirs, files in os.walk(self.entry(key)):
+                size = size + sum([os.path.getsize(path + '/' + f) for f in files])
+            entries.append([os.path.getmtime(meta_file), size, key])
+            size_total = size_total + size
+        entries.sort()
+        while size_total > self.max_size and len(entries) > 1:
+            last_used, size, key = entries.pop(0)
+            shutil.rmtree(self.entry(key), True)
+            size_total = size_total - size
+        self.size = size_total
+
+class CachedPost(object):
+    """Robot post wrapper that serves repeated programs from a :class:`.ProgramCache`.
+    Calls to the post are recorded and hashed together with the source code of the post and of this toolbox, the post arguments and the program name.
+    The post runs the recorded calls only if the program is not in the cache. For example:
+    robot = CachedPost(RobotPost, r'KUKA_KRC4', r'KUKA KR 6', 6, lines_x_prog=1000)
+
+    :param post_class: RobotPost class of the post processor
+    :param cache: program cache (a :class:`.ProgramCache` in the default folder if None)"""
+    def __init__(self, post_class, robotpost=None, robotname=None, robot_axes=6, cache=None, **kwargs):
+        import hashlib
+        object.__setattr__(self, 'post', post_class(robotpost, robotname, robot_axes, **kwargs))
+        object.__setattr__(self, 'cache', cache if cache is not None else ProgramCache())
+        object.__setattr__(self, 'calls', [])
+        object.__setattr__(self, 'hasher', hashlib.sha1())
+        for source in [sys.modules[post_class.__module__].__file__, __file__]:
+            with open(source, 'rb') as fid:
+                self.hasher.update(fid.read())
+        hash_update(self.hasher, [robotpost, robotname, robot_axes, kwargs])
+
+    def __getattr__(self, name):
+        attr = getattr(self.post, name)
+        if not callable(attr) or name in ['ProgSave', 'ProgSendRobot']:
+            self.replay()
+            return getattr(self.post, name)
+        def record(*args, **kwargs):
+            self.calls.append([name, args, kwargs])
+            hash_update(self.hasher, [name, args, kwargs])
+        return record
+
+    def __setattr__(self, name, value):
+        self.calls.append(['__setattr__', (name, value), {}])
+        hash_update(self.hasher, ['__setattr__', name, value])
+
+    def replay(self):
+        """Runs the recorded calls on the post"""
+        calls = self.calls
+        object.__setattr__(self, 'calls', [])
+        for name, args, kwargs in calls:
+            if name == '__setattr__':
+                setattr(self.post, *args)
+            else:
+                getattr(self.post, name)(*args, **kwargs)
+
+    def ProgSave(self, folder, progname, ask_user = False, show_result = False):
+        """Saves the program, from the cache if the same program was saved before"""
+        import io
+        import os
+        import contextlib
+        if ask_user or show_result or not DirExists(folder):
+            # the files are chosen or opened by the user: run the post
+            self.replay()
+            return self.post.ProgSave(folder, progname, ask_user, show_result)
+
+        folder = folder.replace('\\', '/').rstrip('/')
+        hasher = self.hasher.copy()
+        hash_update(hasher, ['ProgSave', progname])
+        key = hasher.hexdigest()
+        meta = self.cache.get(key)
+        if meta is not None:
+            self.cache.restore(key, meta, folder)
+            for line in meta['output']:
+                print(line.replace('%FOLDER%', folder))
+            prog_files = meta['prog_files']
+            if type(prog_files) is list:
+                prog_files = [f.replace('%FOLDER%', folder) for f in prog_files]
+            elif type(prog_files) is str:
+                prog_files = prog_files.replace('%FOLDER%', folder)
+            self.post.PROG_FILES = prog_files
+            object.__setattr__(self, 'calls', [])
+            return
+
+        def list_files():
+            files = {}
+            for path, dirs, filenames in os.walk(folder):
+                for f in filenames:
+                    file_path = (path + '/' + f).replace('\\', '/')
+                    stat = os.stat(file_path)
+                    files[file_path[len(folder)+1:]] = (stat.st_size, stat.st_mtime_ns)
+            return files
+
+        files_before = list_files()
+        self.replay()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.post.ProgSave(folder, progname, ask_user, show_result)
+        output = output.getvalue()
+        sys.stdout.write(output)
+        files_after = list_files()
+        files = [f for f in files_after if files_before.get(f) != files_after[f]]
+        prog_files = getattr(self.post, 'PROG_FILES', None)
+        if type(prog_files) is list:
+            prog_files = [f.replace('\\', '/').replace(folder, '%FOLDER%') for f in prog_files]
+        elif type(prog_files) is str:
+            prog_files = prog_files.replace('\\', '/').replace(folder, '%FOLDER%')
+        else:
+            prog_files = None
+        meta = {'progname':progname, 'time':time.time(), 'files':files, 'prog_files':prog_files}
+        meta['output'] = [line.replace('\\', '/').replace(folder, '%FOLDER%') for line in output.splitlines()]
+        if not DirExists(self.cache.folder):
+            os.makedirs(self.cache.folder)
+        self.cache.store(key, meta, folder)
+
                 
+#----------------------------------------------------
+#-------- Post server ---------------
+
+POST_MTIMES = {} # modification time of the post modules loaded by post_run
+
+def post_module(name):
+    """Returns the post module name, imported once and reloaded when its file changes"""
+    import importlib
+    import os
+    module = sys.modules.get(name)
+    if module is None:
+        module = importlib.import_module(name)
+    elif POST_MTIMES.get(name, os.path.getmtime(module.__file__)) != os.path.getmtime(module.__file__):
+        module = importlib.reload(module)
+    POST_MTIMES[name] = os.path.getmtime(module.__file__)
+    return module
+
+def post_run(program, post=None, folder=None):
+    """Runs a program generated by RoboDK (the Python script that calls the post) in this process, without dialogs.
+    Post modules stay loaded between calls. Returns a dict with the saved files (saved), the log of the post (log), the printed output (output), the error if the program failed (error) and the run time in seconds (time).
+
+    :param program: path of the program generated by RoboDK
+    :type program: str
+    :param post: name of the post to use instead of the one imported by the program
+    :type post: str
+    :param folder: folder to save the program to instead of the one given to ProgSave
+    :type folder: str"""
+    import builtins
+    import contextlib
+    import copy
+    import io
+    import os
+    import traceback
+    import types
+    t_start = time.time()
+    result = {'saved':[], 'log':'', 'output':'', 'error':None}
+    modules = []
+
+    def post_class(module):
+        base = module.RobotPost
+        class JobPost(base):
+            def __init__(self, *args, **kwargs):
+                # lists and dicts defined in the class would be shared by all the programs run by this process
+                for cls in reversed(base.__mro__):
+                    for attr, value in vars(cls).items():
+                        if not attr.startswith('__') and isinstance(value, (list, dict)):
+                            setattr(self, attr, copy.copy(value))
+                base.__init__(self, *args, **kwargs)
+            def ProgSave(self, folder_prog, progname, ask_user=False, show_result=False):
+                result['log'] = result['log'] + getattr(self, 'LOG', '')
+                if folder is not None:
+                    folder_prog = folder
+                if not DirExists(folder_prog):
+                    os.makedirs(folder_prog)
+                return base.ProgSave(self, folder_prog, progname, False, False)
+        return JobPost
+
+    def import_post(name, globals=None, locals=None, fromlist=(), level=0):
+        module = builtins.__import__(name, globals, locals, fromlist, level)
+        if level != 0 or not hasattr(module, 'RobotPost'):
+            return module
+        module = post_module(post if post is not None else name)
+        if module not in modules:
+            modules.append(module)
+            module.mbox = lambda msg, *args, **kwargs: result.update(log=result['log'] + str(msg) + '\n')
+        job_module = types.ModuleType(module.__name__)
+        job_module.__dict__.update(module.__dict__)
+        job_module.RobotPost = post_class(module)
+        return job_module
+
+    job_builtins = dict(builtins.__dict__)
+    job_builtins['__import__'] = import_post
+    job_globals = {'__name__':'__main__', '__file__':program, '__builtins__':job_builtins}
+    output = io.StringIO()
+    try:
+        with open(program, 'r') as fid:
+            code = compile(fid.read(), program, 'exec')
+        with contextlib.redirect_stdout(output):
+            exec(code, job_globals)
+    except BaseException:
+        result['error'] = traceback.format_exc()
+    finally:
+        for module in modules:
+            module.mbox = mbox
+    result['output'] = output.getvalue()
+    result['saved'] = [line[6:].strip() for line in result['output'].splitlines() if line.startswith('SAVED:')]
+    result['time'] = time.time() - t_start
+    return result
+
+POST_SERVER_ADDRESS = ('127.0.0.1', 20600) # default address of the post server (local connections only)
+
+def post_server_keyfile():
+    """Returns the path of the file that holds the key of the post server (readable by the current user only)"""
+    import os
+    return os.path.join(os.path.expanduser('~'), '.robodk_postserver.key')
+
+def post_server_key(key_file=None, create=False):
+    """Returns the key shared by the post server and its clients.
+
+    :param key_file: path of the key file (see :func:`.post_server_keyfile`)
+    :param create: generate a new random key and save it to the key file"""
+    import os
+    if key_file is None:
+        key_file = post_server_keyfile()
+    if create:
+        authkey = os.urandom(32)
+        if FileExists(key_file):
+            os.remove(key_file)
+        fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as fid:
+            fid.write(authkey)
+        return authkey
+    if not FileExists(key_file):
+        raise Exception('Post server key not found: %s (start the post server first)' % key_file)
+    with open(key_file, 'rb') as fid:
+        return fid.read()
+
+def post_worker_init(path):
+    """Initializes a worker process of the post server"""
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+class PostServer(object):
+    """Post server: keeps the post processors loaded in a pool of worker processes and runs the programs sent with :func:`.post_client`.
+    The server runs any program it receives: it only accepts local connections, and clients must know the key of the server.
+    If no key is given, a random key is generated and saved to a file that only the current user can read (see :func:`.post_server_key`).
+    Start the server from a command line with: python robodk.py postserver [workers] [port]
+    Or from Python:
+    PostServer(workers=4).serve_forever()
+
+    :param address: ('127.0.0.1', port) or the name of a pipe (r'\\\\.\\pipe\\RoboDK_Posts' on Windows)
+    :param workers: number of worker processes (number of programs generated at the same time)
+    :type workers: int
+    :param authkey: key shared with the clients (a random key saved to key_file by default)
+    :type authkey: bytes
+    :param key_file: file where the random key is saved (see :func:`.post_server_keyfile`)"""
+    def __init__(self, address=POST_SERVER_ADDRESS, workers=4, authkey=None, key_file=None):
+        import collections
+        import threading
+        if type(address) is tuple and address[0] not in ['127.0.0.1', 'localhost', '::1']:
+            raise Exception('The post server only accepts local connections: %s' % str(address))
+        self.address = address
+        self.key_file = key_file
+        self.workers = workers
+        self.authkey = authkey
+        self.pool = None
+        self.lock = threading.Lock()
+        self.jobs = 0
+        self.errors = 0
+        self.latency = collections.deque(maxlen=10000) # seconds from request to reply of the last jobs
+        self.run_time = collections.deque(maxlen=10000) # seconds running the program of the last jobs
+
+    def serve_forever(self):
+        """Accepts connections until the process is stopped (or a client sends {'cmd':'stop'})"""
+        import multiprocessing
+        import os
+        import threading
+        from multiprocessing import AuthenticationError
+        from multiprocessing.connection import Listener
+        if self.authkey is None:
+            self.authkey = post_server_key(self.key_file, True)
+        self.pool = multiprocessing.Pool(self.workers, post_worker_init, (os.path.dirname(os.path.abspath(__file__)),))
+        self.listener = Listener(self.address, backlog=64, authkey=self.authkey)
+        print('Post server listening on %s with %i workers' % (str(self.listener.address), self.workers))
+        try:
+            while True:
+                try:
+                    conn = self.listener.accept()
+                except (EOFError, AuthenticationError):
+                    continue
+                except OSError:
+                    break
+                thread = threading.Thread(target=self.handle, args=(conn,))
+                thread.daemon = True
+                thread.start()
+        finally:
+            self.pool.terminate()
+
+    def handle(self, conn):
+        """Replies to the requests of one client"""
+        try:
+            while True:
+                request = conn.recv()
+                if request.get('cmd') == 'metrics':
+                    conn.send(self.metrics())
+                elif request.get('cmd') == 'stop':
+                    conn.send({'stopped':True})
+                    self.listener.close()
+                    return
+                else:
+                    t_start = time.time()
+                    result = self.pool.apply(post_run, (request['program'], request.get('post'), request.get('folder')))
+                    result['latency'] = time.time() - t_start
+                    with self.lock:
+                        self.jobs = self.jobs + 1
+                        self.errors = self.errors + (result['error'] is not None)
+                        self.latency.append(result['latency'])
+                        self.run_time.append(result['time'])
+                    conn.send(result)
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def metrics(self):
+        """Returns the number of jobs and errors and the latency statistics (in seconds) of the last jobs"""
+        def stats(values):
+            values = sorted(values)
+            if len(values) == 0:
+                return {}
+            return {'mean':sum(values)/len(values), 'p50':values[len(values)//2], 'p95':values[int(len(values)*0.95)], 'max':values[-1]}
+        with self.lock:
+            return {'jobs':self.jobs, 'errors':self.errors, 'workers':self.workers, 'latency':stats(self.latency), 'run_time':stats(self.run_time)}
+
+def post_client(program, post=None, folder=None, address=POST_SERVER_ADDRESS, authkey=None, key_file=None):
+    """Sends a program to a :class:`.PostServer` and returns the result (see :func:`.post_run`).
+
+    :param program: path of the program generated by RoboDK, or {'cmd':'metrics'} to get the metrics of the server
+    :param authkey: key of the server (read from key_file by default, see :func:`.post_server_key`)"""
+    from multiprocessing.connection import Client
+    if authkey is None:
+        authkey = post_server_key(key_file)
+    conn = Client(address, authkey=authkey)
+    try:
+        if isinstance(program, dict):
+            conn.send(program)
+        else:
+            conn.send({'program':program, 'post':post, 'folder':folder})
+        return conn.recv()
+    finally:
+        conn.close()
+
 #----------------------------------------------------
 #--------       Mat matrix class      ---------------
 
@@ -1310,23 +2880,24 @@ def UploadFileFTP(file_path_name, server_ip, remote_path, username, password):
     return True
 
 def UploadFTP(program, robot_ip, remote_path, ftp_user, ftp_pass):
-    """Upload a program or a list of programs to the robot through FTP provided the connection parameters"""
+    """Upload a program or a list of programs to the robot through FTP provided the connection parameters. Returns True if all the programs were sent."""
     # Iterate through program list if it is a list of files
     if isinstance(program, list):
         if len(program) == 0:
             print('POPUP: Nothing to transfer')
-            return
+            return True
+        success = True
         for prog in program:
-            UploadFTP(prog, robot_ip, remote_path, ftp_user, ftp_pass)
-        return
+            success = UploadFTP(prog, robot_ip, remote_path, ftp_user, ftp_pass) and success
+        return success
     
     import os
     if os.path.isfile(program):
         print('Sending program file %s...' % program)
-        UploadFileFTP(program, robot_ip, remote_path, ftp_user, ftp_pass)
+        return UploadFileFTP(program, robot_ip, remote_path, ftp_user, ftp_pass)
     else:
         print('Sending program folder %s...' % program)
-        UploadDirFTP(program, robot_ip, remote_path, ftp_user, ftp_pass)    
+        return UploadDirFTP(program, robot_ip, remote_path, ftp_user, ftp_pass)
 
 
 
@@ -1481,3 +3052,15 @@ def mbox(msg, b1='OK', b2='Cancel', frame=True, t=False, entry=None):
     # the function pauses here until the mainloop is quit
     msgbox.root.destroy()
     return msgbox.returning
+
+def post_server_main(argv):
+    """Starts a post server from a command line: python robodk.py postserver [workers] [port]"""
+    workers = int(argv[0]) if len(argv) > 0 else 4
+    port = int(argv[1]) if len(argv) > 1 else POST_SERVER_ADDRESS[1]
+    PostServer((POST_SERVER_ADDRESS[0], port), workers).serve_forever()
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'postserver':
+        # run the server from the robodk module (not __main__) so that the worker processes can import its functions
+        import robodk
+        robodk.post_server_main(sys.argv[2:])